@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Archival of completed stages of long auctions.
+
+Texas auction gets a pause and a main round stage for every bid, so
+document of long auction is mostly history. Database keeps completed stages
+in gzip compressed JSON attachment of auction document and only the live
+tail inline:
+
+    {
+        "current_stage": 412,
+        "stages_offset": 400,
+        "stages": [<stage 400>, <stage 401>, ...],
+        "_attachments": {"stages.json.gz": {...}}
+    }
+
+Index of stage in full list is its index in inline list plus
+'stages_offset'. Worker always gets document with full list of stages.
+"""
+import gzip
+import json
+from base64 import b64encode
+from StringIO import StringIO
+
+from openprocurement.auction.texas.serialization import encode_default
+from openprocurement.auction.texas.structures import approximate_size
+
+ARCHIVE_ATTACHMENT = 'stages.json.gz'
+
+
+def pack_stages(stages):
+    """
+    Return gzip compressed JSON of stages
+    """
+    buffer = StringIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as archive:
+        json.dump(stages, archive, default=encode_default)
+    return buffer.getvalue()
+
+
+def unpack_stages(data):
+    with gzip.GzipFile(fileobj=StringIO(data), mode='rb') as archive:
+        return json.load(archive)
+
+
+def archive_offset(auction_document, archived, max_stages=None, max_size=None, keep=10):
+    """
+    Return number of stages which should be archived
+
+    :param auction_document: auction document with full list of stages
+    :param archived: number of stages archived already
+    :param max_stages: number of inline stages which triggers archival
+    :param max_size: approximate size in bytes of inline stages which
+                     triggers archival
+    :param keep: number of completed stages which are kept inline
+    """
+    stages = auction_document.get('stages', [])
+    inline = stages[archived:]
+    if not (max_stages and len(inline) > max_stages or max_size and approximate_size(inline) > max_size):
+        return archived
+    # only stages before current one are completed
+    return max(archived, min(auction_document.get('current_stage', 0), len(stages)) - keep)
+
+
+def split_stages(public_document, archived, offset):
+    """
+    Keep only stages after offset inline in document which is going to be
+    saved and attach archive if it is grown
+
+    :param public_document: top level copy of auction document
+    :param archived: number of stages in the current archive
+    :param offset: number of stages which should be archived
+    """
+    stages = public_document['stages']
+    attachments = dict(public_document.get('_attachments', {}))
+    if offset > archived:
+        attachments[ARCHIVE_ATTACHMENT] = {
+            'content_type': 'application/gzip',
+            'data': b64encode(pack_stages(list(stages[:offset]))),
+        }
+    else:
+        attachments.setdefault(ARCHIVE_ATTACHMENT, {'stub': True})
+    public_document['_attachments'] = attachments
+    public_document['stages'] = stages[offset:]
+    public_document['stages_offset'] = offset
+
+
+def join_stages(public_document, archived_stages):
+    """
+    Restore full list of stages of document got from database
+    """
+    offset = public_document.pop('stages_offset')
+    public_document['stages'] = archived_stages[:offset] + public_document.get('stages', [])
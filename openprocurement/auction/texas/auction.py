@@ -1,6 +1,5 @@
 import logging
 import sys
-from copy import deepcopy
 from datetime import datetime, timedelta
 
 from zope.component.globalregistry import getGlobalSiteManager
@@ -14,6 +13,7 @@ from openprocurement.auction.texas.journal import (
     AUCTION_WORKER_SERVICE_AUCTION_CANCELED,
     AUCTION_WORKER_SERVICE_STOP_AUCTION_WORKER,
     AUCTION_WORKER_SERVICE_END_FIRST_PAUSE,
+    AUCTION_WORKER_SERVICE_RESTORE_FROM_SNAPSHOT,
     AUCTION_WORKER_API_AUCTION_CANCEL,
     AUCTION_WORKER_API_AUCTION_NOT_EXIST,
 )
@@ -24,24 +24,42 @@ from openprocurement.auction.utils import (
 from openprocurement.auction.worker_core.constants import TIMEZONE
 
 from openprocurement.auction.texas import utils
+from openprocurement.auction.texas.bidders import BidderRegistry
 from openprocurement.auction.texas.constants import (
     MULTILINGUAL_FIELDS,
     ADDITIONAL_LANGUAGES,
     DEADLINE_HOUR,
+    END,
+    MAIN_ROUND,
+    PAUSE,
     ROUND_DURATION
 )
 from openprocurement.auction.texas.context import IContext
-from openprocurement.auction.texas.datasource import IDataSource
+from openprocurement.auction.texas.transitions import CANCELED_STAGE
+from openprocurement.auction.texas.datasource import (
+    AUCTION_DATA_PROJECTION,
+    IDataSource,
+    project
+)
 from openprocurement.auction.texas.database import IDatabase
+from openprocurement.auction.texas.recovery import prepare_snapshotter
 from openprocurement.auction.texas.scheduler import IJobService
 from openprocurement.auction.texas.server import run_server
+from openprocurement.auction.texas.state import AuctionState
 from openprocurement.auction.texas.scheduler import SCHEDULER
 
 LOGGER = logging.getLogger('Auction Worker Texas')
 
 
 class Auction(object):
-    """Auction Worker Class"""
+    """Auction Worker Class
+
+    Auction data, bidders data, bids mapping and auction protocol are handed
+    over to the context without copying. Once stored, they are owned by the
+    context: worker never changes them in place, it either builds new objects
+    while synchronizing with API or gets its own copy from the context, changes
+    it and stores it back.
+    """
 
     def __init__(self, tender_id, worker_defaults={}, debug=False):
         super(Auction, self).__init__()
@@ -49,11 +67,11 @@ class Auction(object):
         self.debug = debug
         self._end_auction_event = Event()
         self.worker_defaults = worker_defaults
-        self.auction_protocol = {}
         self.retries = 10
         self.bidders_count = 0
         self.bidders_data = []
         self.bids_mapping = {}
+        self.bidder_registry = BidderRegistry()
 
         gsm = getGlobalSiteManager()
 
@@ -63,11 +81,33 @@ class Auction(object):
         self.job_service = gsm.queryUtility(IJobService)
 
         self.context['end_auction_event'] = self._end_auction_event
+        self.context['bidder_registry'] = self.bidder_registry
+        self.snapshotter = prepare_snapshotter(
+            self.context, self.worker_defaults.get('recovery'), self.tender_id
+        )
 
     def schedule_auction(self):
-        self.context['auction_document'] = self.database.get_auction_document(
-            self.context['auction_doc_id']
+        self.context['auction_document'] = AuctionState.from_document(
+            self.database.get_auction_document(self.context['auction_doc_id'])
         )
+        if self.restore_from_snapshot():
+            if not self._schedule_restored_jobs():
+                self._end_auction_event.set()
+                return
+        else:
+            self._synchronize_context()
+            self._schedule_jobs()
+
+        self.server = run_server(
+            self,
+            None,  # TODO: add mapping expire
+            LOGGER
+        )
+        self.context['server'] = self.server
+        if self.snapshotter is not None:
+            self.snapshotter.start()
+
+    def _synchronize_context(self):
         with utils.update_auction_document(self.context, self.database) as auction_document:
             if self.debug:
                 LOGGER.info("Get _auction_data from auction_document")
@@ -75,49 +115,114 @@ class Auction(object):
                     'test_auction_data', {}
                 )
             self.synchronize_auction_info()
-            self.context['auction_data'] = deepcopy(self._auction_data)
-            self.context['bidders_data'] = deepcopy(self.bidders_data)
-            self.context['bids_mapping'] = deepcopy(self.bids_mapping)
-            self.auction_protocol = utils.prepare_auction_protocol(self.context)
-            self.context['auction_protocol'] = deepcopy(self.auction_protocol)
+            self.context['auction_data'] = self._auction_data
+            self.context['bidders_data'] = self.bidders_data
+            self.context['bids_mapping'] = self.bids_mapping
+            self.context['auction_protocol'] = utils.prepare_auction_protocol(self.context)
+
+    def restore_from_snapshot(self):
+        """
+        Restore context from the local snapshot written before restart of
+        worker. Snapshot is used only if auction document in database has
+        revision of the last save made before snapshot.
+
+        :return: True if context was restored
+        """
+        if self.snapshotter is None:
+            return False
+        snapshot = self.snapshotter.load()
+        if snapshot is None:
+            return False
+        if snapshot['saved_rev'] != self.context.view('auction_document').get('_rev'):
+            LOGGER.info("Snapshot of auction {} is outdated".format(self.context['auction_doc_id']))
+            return False
+
+        auction_document = AuctionState.from_document(snapshot['auction_document'])
+        # revision kept by snapshotted document could be older than saved one
+        auction_document['_rev'] = snapshot['saved_rev']
+        self.context['auction_document'] = auction_document
+        self.context['saved_rev'] = snapshot['saved_rev']
+        self._auction_data = snapshot['auction_data']
+        self.bidders_data = snapshot['bidders_data']
+        self.bids_mapping = snapshot['bids_mapping']
+        self.bidder_registry.load(snapshot['bidder_registry'])
+        self.context['auction_data'] = self._auction_data
+        self.context['bidders_data'] = self.bidders_data
+        self.context['bids_mapping'] = self.bids_mapping
+        self.context['auction_protocol'] = snapshot['auction_protocol']
+        self._set_start_date()
+        LOGGER.info("Auction {} restored from snapshot with rev {}".format(
+            self.context['auction_doc_id'], snapshot['saved_rev']
+        ), extra={"MESSAGE_ID": AUCTION_WORKER_SERVICE_RESTORE_FROM_SNAPSHOT})
+        return True
 
+    def _schedule_jobs(self):
         # Add job that starts auction server
         SCHEDULER.add_job(
             self.start_auction,
             'date',
             run_date=utils.convert_datetime(
-                self.context['auction_document']['stages'][0]['start']
+                self.context.view('auction_document')['stages'][0]['start']
             ),
             name="Start of Auction",
             id="auction:start"
         )
 
         # Add job that switch current_stage to round stage
-        start = utils.convert_datetime(self.context['auction_document']['stages'][1]['start'])
+        start = utils.convert_datetime(self.context.view('auction_document')['stages'][1]['start'])
         self.job_service.add_pause_job(start)
 
         # Add job that end auction
-        start = utils.convert_datetime(self.context['auction_document']['stages'][1]['start']) + timedelta(seconds=ROUND_DURATION)
+        start = utils.convert_datetime(self.context.view('auction_document')['stages'][1]['start']) + timedelta(seconds=ROUND_DURATION)
         self.job_service.add_ending_main_round_job(start)
 
-        self.server = run_server(
-            self,
-            None,  # TODO: add mapping expire
-            LOGGER
-        )
-        self.context['server'] = self.server
+    def _schedule_restored_jobs(self):
+        """
+        Add jobs for the current stage of restored auction
+
+        :return: False if restored auction is already finished
+        """
+        auction_document = self.context.view('auction_document')
+        current_stage = auction_document['current_stage']
+        if current_stage == -1:
+            self._schedule_jobs()
+            return True
+        if current_stage < -1 or auction_document['stages'][current_stage]['type'] == END:
+            return False
+
+        stages = auction_document['stages']
+        deadline = utils.set_specific_hour(datetime.now(TIMEZONE), DEADLINE_HOUR)
+        if stages[current_stage]['type'] == PAUSE:
+            if current_stage + 1 < len(stages) and stages[current_stage + 1]['type'] == MAIN_ROUND:
+                round_start_date = utils.convert_datetime(stages[current_stage + 1]['start'])
+                self.job_service.add_pause_job(round_start_date)
+                self.job_service.add_ending_main_round_job(
+                    utils.get_round_ending_time(round_start_date, ROUND_DURATION, deadline)
+                )
+            else:
+                self.job_service.add_ending_main_round_job(deadline)
+        else:
+            round_start_date = utils.convert_datetime(stages[current_stage]['start'])
+            self.job_service.add_ending_main_round_job(
+                utils.get_round_ending_time(round_start_date, ROUND_DURATION, deadline)
+            )
+        return True
 
     def wait_to_end(self):
         request_id = generate_request_id()
 
         self._end_auction_event.wait()
+        if self.snapshotter is not None:
+            self.snapshotter.stop()
+            self.snapshotter.remove()
         LOGGER.info("Stop auction worker",
                     extra={"JOURNAL_REQUEST_ID": request_id,
                            "MESSAGE_ID": AUCTION_WORKER_SERVICE_STOP_AUCTION_WORKER})
 
     def start_auction(self):
         request_id = generate_request_id()
-        self.auction_protocol['timeline']['auction_start']['time'] = datetime.now(TIMEZONE).isoformat()
+        auction_protocol = self.context['auction_protocol']
+        auction_protocol['timeline']['auction_start']['time'] = datetime.now(TIMEZONE).isoformat()
 
         LOGGER.info(
             '---------------- Start auction  ----------------',
@@ -126,37 +231,31 @@ class Auction(object):
         )
         self.synchronize_auction_info()
         with utils.lock_server(self.context['server_actions']), utils.update_auction_document(self.context, self.database) as auction_document:
-            self._prepare_initial_bids(auction_document)
+            self._prepare_initial_bids(auction_document, auction_protocol)
             auction_document["current_stage"] = 0
             LOGGER.info("Switched current stage to {}".format(
                 auction_document['current_stage']
             ))
 
     def cancel_auction(self):
-        self.context['auction_document'] = self.database.get_auction_document(
-            self.context['auction_doc_id']
+        rev = self.database.apply_transition(
+            self.context['auction_doc_id'], 'cancel',
+            end_date=datetime.now(TIMEZONE).isoformat()
         )
-        if self.context['auction_document']:
-            with utils.update_auction_document(self.context, self.database) as auction_document:
-                LOGGER.info("Auction {} canceled".format(self.context['auction_doc_id']),
-                            extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_CANCELED})
-                auction_document["current_stage"] = -100
-                auction_document["endDate"] = datetime.now(TIMEZONE).isoformat()
-                LOGGER.info("Change auction {} status to 'canceled'".format(self.context['auction_doc_id']),
-                            extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_STATUS_CANCELED})
+        if rev:
+            LOGGER.info("Auction {} canceled".format(self.context['auction_doc_id']),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_CANCELED})
+            LOGGER.info("Change auction {} status to 'canceled'".format(self.context['auction_doc_id']),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_STATUS_CANCELED})
         else:
             LOGGER.info("Auction {} not found".format(self.context['auction_doc_id']),
                         extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_NOT_FOUND})
 
     def reschedule_auction(self):
-        self.context['auction_document'] = self.database.get_auction_document(
-            self.context['auction_doc_id']
-        )
-        if self.context['auction_document']:
-            with utils.update_auction_document(self.context, self.database) as auction_document:
-                LOGGER.info("Auction {} has not started and will be rescheduled".format(self.context['auction_doc_id']),
-                            extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_RESCHEDULE})
-                auction_document["current_stage"] = -101
+        rev = self.database.apply_transition(self.context['auction_doc_id'], 'reschedule')
+        if rev:
+            LOGGER.info("Auction {} has not started and will be rescheduled".format(self.context['auction_doc_id']),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_RESCHEDULE})
         else:
             LOGGER.info("Auction {} not found".format(self.context['auction_doc_id']),
                         extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_NOT_FOUND})
@@ -182,9 +281,7 @@ class Auction(object):
             auction_document = {"_rev": public_document["_rev"]}
         if self.debug:
             auction_document['mode'] = 'test'
-            auction_document['test_auction_data'] = deepcopy(
-                self._auction_data
-            )
+            auction_document['test_auction_data'] = self._auction_data
 
         self.synchronize_auction_info(prepare=True)
 
@@ -193,13 +290,13 @@ class Auction(object):
         if self.worker_defaults.get('sandbox_mode', False):
             pause, main_round = utils.prepare_auction_stages(
                 self.startDate,
-                deepcopy(auction_document),
+                auction_document,
                 fast_forward=True
             )
         else:
             pause, main_round = utils.prepare_auction_stages(
                 self.startDate,
-                deepcopy(auction_document)
+                auction_document
             )
 
         auction_document['stages'] = [pause, main_round]
@@ -211,11 +308,10 @@ class Auction(object):
             # auction can't start after deadline
             self.reschedule_auction()
             return
-        self.datasource.set_participation_urls(self._auction_data)
+        self.datasource.set_participation_urls(self._auction_data, self.bidder_registry)
 
-    def _prepare_initial_bids(self, auction_document):
-        bids = deepcopy(self.bidders_data)
-        bids_info = sorting_start_bids_by_amount(bids)
+    def _prepare_initial_bids(self, auction_document, auction_protocol):
+        bids_info = sorting_start_bids_by_amount(self.bidders_data)
         # Prepare initial bids in document and protocol
         for index, bid in enumerate(bids_info):
             auction_document['initial_bids'].append(
@@ -226,13 +322,13 @@ class Auction(object):
                     amount=bid['value']['amount']
                 )
             )
-            self.auction_protocol['timeline']['auction_start']['initial_bids'].append({
+            auction_protocol['timeline']['auction_start']['initial_bids'].append({
                 'bidder': bid['id'],
                 'date': bid['date'],
                 'amount': bid['value']['amount'],
                 'bid_number': self.bids_mapping[bid['id']]
             })
-        self.context['auction_protocol'] = deepcopy(self.auction_protocol)
+        self.context['auction_protocol'] = auction_protocol
 
     def _prepare_auction_document_data(self, auction_document):
         auction_document.update({
@@ -274,24 +370,24 @@ class Auction(object):
     def _set_auction_data(self, prepare=False):
         # Get auction from api and set it to _auction_data
         request_id = generate_request_id()
+        # only fields used by worker are kept for the whole auction
         if prepare:
-            self._auction_data = self.datasource.get_data()
+            self._auction_data = project(self.datasource.get_data(), AUCTION_DATA_PROJECTION)
         else:
             self._auction_data = {'data': {}}
 
         auction_data = self.datasource.get_data(public=False)
 
         if auction_data:
-            self._auction_data['data'].update(auction_data['data'])
+            self._auction_data['data'].update(
+                project(auction_data, AUCTION_DATA_PROJECTION)['data']
+            )
             self.startDate = utils.convert_datetime(
                 self._auction_data['data']['auctionPeriod']['startDate']
             )
             del auction_data
         else:
-            auction_document = self.database.get_auction_document(self.context['auction_doc_id'])
-            if auction_document:
-                auction_document["current_stage"] = -100
-                self.database.save_auction_document(auction_document, self.context['auction_doc_id'])
+            if self.database.apply_transition(self.context['auction_doc_id'], 'set_stage', stage=CANCELED_STAGE):
                 LOGGER.warning("Cancel auction: {}".format(
                     self.context['auction_doc_id']
                 ), extra={"JOURNAL_REQUEST_ID": request_id,
@@ -330,6 +426,46 @@ class Auction(object):
         ]
 
     def _set_mapping(self):
-        for index, bid in enumerate(self.bidders_data):
-            if bid['id'] not in self.bids_mapping:
-                self.bids_mapping[self.bidders_data[index]['id']] = len(self.bids_mapping.keys()) + 1
+        self.bidder_registry.update(self._auction_data['data'].get('bids', []))
+        # new mapping is built every time, previous one could be already
+        # owned by context
+        self.bids_mapping = self.bidder_registry.numbers()
+
+
+def cancel_auctions(database, auction_doc_ids):
+    """
+    Cancel many auctions at once, the same way as Auction.cancel_auction
+    cancels one
+
+    :return: dict of identifiers of auctions mapped to new revisions of
+             their documents or None if auction was not found
+    """
+    revisions = database.apply_transitions(
+        auction_doc_ids, 'cancel', end_date=datetime.now(TIMEZONE).isoformat()
+    )
+    for auction_doc_id in auction_doc_ids:
+        if revisions.get(auction_doc_id):
+            LOGGER.info("Auction {} canceled".format(auction_doc_id),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_CANCELED})
+            LOGGER.info("Change auction {} status to 'canceled'".format(auction_doc_id),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_STATUS_CANCELED})
+        else:
+            LOGGER.info("Auction {} not found".format(auction_doc_id),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_NOT_FOUND})
+    return revisions
+
+
+def reschedule_auctions(database, auction_doc_ids):
+    """
+    Reschedule many auctions at once, the same way as
+    Auction.reschedule_auction reschedules one
+    """
+    revisions = database.apply_transitions(auction_doc_ids, 'reschedule')
+    for auction_doc_id in auction_doc_ids:
+        if revisions.get(auction_doc_id):
+            LOGGER.info("Auction {} has not started and will be rescheduled".format(auction_doc_id),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_RESCHEDULE})
+        else:
+            LOGGER.info("Auction {} not found".format(auction_doc_id),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_AUCTION_NOT_FOUND})
+    return revisions
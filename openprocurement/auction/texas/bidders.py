@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Registry of auction bidders shared by worker, views and datasource.
+"""
+from openprocurement.auction.texas.structures import Record
+
+
+class BidderRecord(Record):
+    """
+    Number of bidder in auction and its status
+    """
+    __slots__ = fields = ('number', 'active')
+
+
+class BidderRegistry(object):
+    """
+    Bidders of auction indexed by bidder id.
+
+    Bidders are numbered in order of registration, only active bidders get
+    numbers. Bidder keeps its number even if it becomes inactive later.
+    """
+
+    def __init__(self):
+        self._bidders = {}
+        self._count = 0
+        # participation hashes by secret and hash function they were
+        # computed with
+        self._hashes = {}
+
+    def add(self, bidder_id, active=True, number=None):
+        """
+        Register bidder or update status of registered one
+
+        :param bidder_id: id of bidder
+        :param active: if bidder takes part in auction
+        :param number: number of bidder, next free number is used if omitted
+        """
+        bidder = self._bidders.get(bidder_id)
+        if bidder is None:
+            bidder = self._bidders[bidder_id] = BidderRecord()
+        bidder['active'] = active
+        if number is not None:
+            bidder['number'] = number
+            self._count = max(self._count, number)
+        elif active and bidder.get('number') is None:
+            self._count += 1
+            bidder['number'] = self._count
+
+    def update(self, bids):
+        """
+        Register bids of auction data
+
+        :param bids: bids from auction data
+        """
+        for bid in bids:
+            self.add(bid['id'], active=bid.get('status', 'active') == 'active')
+
+    def __contains__(self, bidder_id):
+        return bidder_id in self._bidders
+
+    def __len__(self):
+        return len(self._bidders)
+
+    def is_active(self, bidder_id):
+        bidder = self._bidders.get(bidder_id)
+        return bidder is not None and bidder['active']
+
+    def number(self, bidder_id, default=None):
+        bidder = self._bidders.get(bidder_id)
+        if bidder is None:
+            return default
+        return bidder.get('number', default)
+
+    def numbers(self):
+        """
+        Return mapping of bidder ids to bidder numbers
+        """
+        return dict(
+            (bidder_id, bidder['number'])
+            for bidder_id, bidder in self._bidders.iteritems()
+            if bidder.get('number') is not None
+        )
+
+    def to_document(self):
+        """
+        Return bidders as dictionary ready to be serialized to JSON,
+        participation hashes are not included
+        """
+        return dict(
+            (bidder_id, dict(bidder.iteritems()))
+            for bidder_id, bidder in self._bidders.iteritems()
+        )
+
+    def load(self, bidders):
+        """
+        Replace bidders with ones from dictionary returned by to_document
+        """
+        self._bidders = dict(
+            (bidder_id, BidderRecord(bidder)) for bidder_id, bidder in bidders.iteritems()
+        )
+        self._count = max([bidder.get('number') or 0 for bidder in bidders.itervalues()] or [0])
+
+    def participation_hash(self, bidder_id, hash_secret, hash_function):
+        """
+        Return participation hash of bidder, it is computed with hash_function
+        only once for the same secret
+
+        :param bidder_id: id of registered bidder
+        :param hash_secret: secret used to compute hash
+        :param hash_function: function of bidder id and secret
+        """
+        if bidder_id not in self._bidders:
+            raise KeyError(bidder_id)
+        hashes = self._hashes.setdefault((hash_secret, hash_function), {})
+        participation_hash = hashes.get(bidder_id)
+        if participation_hash is None:
+            participation_hash = hashes[bidder_id] = hash_function(bidder_id, hash_secret)
+        return participation_hash
@@ -39,7 +39,7 @@ class BidsHandler(object):
         )
         # Updating auction document with bid data
         with utils.update_auction_document(self.context, self.database) as auction_document:
-            bid['bidder_name'] = self.context['bids_mapping'].get(bid['bidder_id'], False)
+            bid['bidder_name'] = self.context['bidder_registry'].number(bid['bidder_id'], False)
             result = utils.prepare_results_stage(**bid)
             auction_document['stages'][current_stage].update(result)
             results = auction_document['results']
@@ -83,7 +83,7 @@ class BidsHandler(object):
             auction_document["current_stage"] += 1
 
         LOGGER.info('---------------- Start stage {0} ----------------'.format(
-            self.context['auction_document']["current_stage"]),
+            self.context.view('auction_document')["current_stage"]),
             extra={"JOURNAL_REQUEST_ID": request_id,
                    "MESSAGE_ID": AUCTION_WORKER_SERVICE_START_NEXT_STAGE}
         )
@@ -3,6 +3,7 @@ from gevent import monkey
 monkey.patch_all()
 
 import argparse
+import json
 import logging.config
 import os
 import sys
@@ -13,11 +14,18 @@ from zope.component.globalregistry import getGlobalSiteManager
 
 from openprocurement.auction.worker_core import constants as C
 
-from openprocurement.auction.texas.auction import Auction, SCHEDULER
+from openprocurement.auction.texas.auction import (
+    Auction,
+    SCHEDULER,
+    cancel_auctions,
+    reschedule_auctions,
+)
 from openprocurement.auction.texas.context import prepare_context, IContext
 from openprocurement.auction.texas.database import prepare_database, IDatabase
 from openprocurement.auction.texas.datasource import prepare_datasource, IDataSource
 from openprocurement.auction.texas.scheduler import prepare_job_service, IJobService
+from openprocurement.auction.texas.serialization import use_codec
+from openprocurement.auction.texas.wal import prepare_journal
 
 
 def register_utilities(worker_config, auction_id):
@@ -31,11 +39,12 @@ def register_utilities(worker_config, auction_id):
 
     # Register database
     database_config = worker_config.get('database', {})
-    database = prepare_database(database_config)
+    database = prepare_journal(prepare_database(database_config), database_config, auction_id)
     gsm.registerUtility(database, IDatabase)
 
     # Register context
     context_config = worker_config.get('context', {})
+    context_config.update(auction_id=auction_id)
     context = prepare_context(context_config)
     context['auction_doc_id'] = auction_id
     context['worker_defaults'] = worker_config
@@ -49,10 +58,65 @@ def register_utilities(worker_config, auction_id):
     gsm.registerUtility(job_service, IJobService)
 
 
+def parse_key(value):
+    """
+    Parse key of index given in command line, JSON values like -101 are
+    parsed, anything else, e.g. date, is kept as string
+    """
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def query_auctions(worker_config, args):
+    database = prepare_database(worker_config.get('database', {}))
+    rows, bookmark = database.query_auctions(
+        args.auction_doc_id,
+        start_key=parse_key(args.start),
+        end_key=parse_key(args.end),
+        limit=args.limit,
+        bookmark=json.loads(args.bookmark) if args.bookmark else None
+    )
+    for key, auction_doc_id in rows:
+        print "{}\t{}".format(json.dumps(key), auction_doc_id)
+    if bookmark:
+        print "Next page: --bookmark '{}'".format(json.dumps(bookmark))
+
+
+def read_auction_ids(value):
+    """
+    Return identifiers of auctions given as comma separated list or as
+    '@<path>' to file with one identifier per line
+    """
+    if value.startswith('@'):
+        with open(value[1:]) as ids_file:
+            return [line.strip() for line in ids_file if line.strip()]
+    return [auction_doc_id for auction_doc_id in value.split(',') if auction_doc_id]
+
+
+BULK_COMMANDS = {
+    'bulk_cancel': cancel_auctions,
+    'bulk_reschedule': reschedule_auctions,
+}
+
+
+def apply_bulk_command(worker_config, args):
+    # transitions are applied to database directly, journal of worker
+    # isn't needed
+    database = prepare_database(worker_config.get('database', {}))
+    BULK_COMMANDS[args.cmd](database, read_auction_ids(args.auction_doc_id))
+    database.flush()
+
+
 def main():
     parser = argparse.ArgumentParser(description='---- Auction ----')
     parser.add_argument('cmd', type=str, help='')
-    parser.add_argument('auction_doc_id', type=str, help='auction_doc_id')
+    parser.add_argument('auction_doc_id', type=str,
+                        help='auction_doc_id, name of index for query command or comma separated '
+                             'auction_doc_ids or @<file with auction_doc_ids> for bulk commands')
     parser.add_argument('auction_worker_config', type=str,
                         help='Auction Worker Configuration File')
     parser.add_argument('--with_api_version', type=str, help='Tender Api Version')
@@ -61,6 +125,10 @@ def main():
     parser.add_argument('-debug', dest='debug', action='store_const',
                         const=True, default=False,
                         help='Debug mode for auction')
+    parser.add_argument('--start', type=str, help='The least key of index for query command')
+    parser.add_argument('--end', type=str, help='The greatest key of index for query command')
+    parser.add_argument('--limit', type=int, default=100, help='Number of auctions in page for query command')
+    parser.add_argument('--bookmark', type=str, help='Bookmark of page for query command')
 
     args = parser.parse_args()
 
@@ -68,7 +136,7 @@ def main():
         worker_defaults = yaml.load(open(args.auction_worker_config))
         if args.with_api_version:
             worker_defaults['resource_api_version'] = args.with_api_version
-        if args.cmd != 'cleanup':
+        if args.cmd not in ('cleanup', 'query') and args.cmd not in BULK_COMMANDS:
             worker_defaults['handlers']['journal']['TENDER_ID'] = args.auction_doc_id
 
         worker_defaults['handlers']['journal']['TENDERS_API_VERSION'] = worker_defaults['resource_api_version']
@@ -79,6 +147,19 @@ def main():
         print "Auction worker defaults config not exists!!!"
         sys.exit(1)
 
+    # codec of couchdb-python is global for process, so it is installed
+    # once for all databases of worker
+    use_codec(worker_defaults.get('database', {}).get('json_codec', 'json'))
+
+    if args.cmd == 'query':
+        # queries need only database, not auction
+        query_auctions(worker_defaults, args)
+        return
+    if args.cmd in BULK_COMMANDS:
+        # one process changes all auctions, without API and auction
+        apply_bulk_command(worker_defaults, args)
+        return
+
     register_utilities(worker_defaults, args.auction_doc_id)
     auction = Auction(args.auction_doc_id, worker_defaults=worker_defaults, debug=args.debug)
     if args.cmd == 'run':
@@ -96,6 +177,7 @@ def main():
         auction.reschedule_auction()
     elif args.cmd == 'prepare_auction_protocol':
         auction.post_auction_protocol()
+    auction.database.flush()
 
 
 if __name__ == "__main__":
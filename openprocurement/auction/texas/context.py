@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import sys
 from copy import deepcopy
 from pkg_resources import iter_entry_points
+from timeit import default_timer
 
 from gevent.event import Event
 from gevent.lock import BoundedSemaphore
@@ -8,6 +10,12 @@ from gevent.pywsgi import WSGIServer
 from zope.interface import (
     Interface,
     implementer,
+    Attribute
+)
+
+from openprocurement.auction.texas.bidders import BidderRegistry
+from openprocurement.auction.texas.structures import (
+    approximate_size, draft, freeze, read_only
 )
 
 
@@ -20,10 +28,76 @@ class IContext(Interface):
     Interface for objects which are serves as mapping for shared objects among
     other AuctionWorker components
     """
+    profiler = Attribute('ContextProfiler which collects access statistics or None if profiling is disabled')
+
     def get(self, key, default=None):
         # Should return default value if key does not exist
         raise NotImplementedError
 
+    def view(self, key, default=None):
+        # Should return read-only representation of stored object without
+        # copying it. Should return default value if key does not exist
+        raise NotImplementedError
+
+    def version(self, key):
+        # Should return generation of stored object, which is increased every
+        # time object is stored. Should return 0 if key was never stored
+        raise NotImplementedError
+
+    def wait_for_change(self, key, version, timeout=None):
+        # Should block until generation of stored object becomes greater than
+        # provided version or timeout expires. Should return current generation
+        raise NotImplementedError
+
+
+class ContextProfiler(object):
+    """
+    Collects statistics of access to context objects: number of gets, views
+    and sets, time spent on copying objects in and out of context and
+    approximate number of copied bytes per key
+    """
+    counters = ('gets', 'views', 'sets', 'copy_time', 'copied_bytes')
+
+    def __init__(self):
+        self._stats = {}
+
+    def _key_stats(self, key):
+        if key not in self._stats:
+            self._stats[key] = dict.fromkeys(self.counters, 0)
+        return self._stats[key]
+
+    def record_get(self, key, copy_time, copied_bytes):
+        stats = self._key_stats(key)
+        stats['gets'] += 1
+        stats['copy_time'] += copy_time
+        stats['copied_bytes'] += copied_bytes
+
+    def record_view(self, key):
+        self._key_stats(key)['views'] += 1
+
+    def record_set(self, key, copy_time, copied_bytes):
+        stats = self._key_stats(key)
+        stats['sets'] += 1
+        stats['copy_time'] += copy_time
+        stats['copied_bytes'] += copied_bytes
+
+    def stats(self):
+        return deepcopy(self._stats)
+
+    def report(self):
+        """
+        Return statistics formatted as table, keys with the highest copying
+        cost go first
+        """
+        lines = ['{:<20} {:>8} {:>8} {:>8} {:>12} {:>14}'.format(
+            'key', 'gets', 'views', 'sets', 'copy time, s', 'copied bytes'
+        )]
+        for key, stats in sorted(self._stats.items(), key=lambda item: -item[1]['copy_time']):
+            lines.append('{:<20} {gets:>8} {views:>8} {sets:>8} {copy_time:>12.6f} {copied_bytes:>14}'.format(
+                key, **stats
+            ))
+        return '\n'.join(lines)
+
 
 @implementer(IContext)
 class DictContext(object):
@@ -34,6 +108,16 @@ class DictContext(object):
     _mapping: object, that actually stores all the shared data
     :type _mapping: dict
 
+    _versions: generation of every stored object
+    :type _versions: dict
+
+    _changes: events which are set when corresponding object is stored
+    :type _changes: dict
+
+    profiler: collects statistics of access to context objects, enabled with
+    'profile' option of context config
+    :type profiler: ContextProfiler
+
     types_to_return_copy_of: only copy of object stored in context mapping
     should be returned while getting if its type is defined in this sequence
     :type types_to_return_copy_of: tuple
@@ -44,14 +128,19 @@ class DictContext(object):
 
     """
     _mapping = None
+    _versions = None
+    _changes = None
+    profiler = None
     types_to_return_copy_of = (list, dict, set)
     acceptable_fields = {
         'auction_data': {'type': dict},
         'auction_doc_id': {'type': str},
         'auction_document': {'type': dict},
         'auction_protocol': {'type': dict},
+        'bidder_registry': {'type': BidderRegistry},
         'bidders_data': {'type': list},
         'bids_mapping': {'type': dict},
+        'saved_rev': {'type': basestring},
         'end_auction_event': {'type': Event},
         'server': {'type': WSGIServer},
         'server_actions': {'type': BoundedSemaphore},
@@ -63,15 +152,15 @@ class DictContext(object):
         'types': 'Value of field {} must be {} type'
     }
 
-    def __init__(self, _):
+    def __init__(self, config):
         self._mapping = dict()
+        self._versions = dict()
+        self._changes = dict()
+        if config.get('profile', False):
+            self.profiler = ContextProfiler()
 
     def __getitem__(self, key):
-        value = self._mapping[key]
-        # return copy of object if its type in types_to_return_copy_of sequence
-        if isinstance(value, self.types_to_return_copy_of):
-            return deepcopy(value)
-        return value
+        return self._get(key, self._mapping[key])
 
     def __setitem__(self, key, value):
         # check if object could be stored in context mapping
@@ -82,18 +171,111 @@ class DictContext(object):
             raise ContextException(self.error_messages['types'].format(
                 key, self.acceptable_fields[key]['type'])
             )
-        self._mapping[key] = value
+        if self.profiler is None:
+            self._mapping[key] = self._store(value)
+        else:
+            start = default_timer()
+            stored = self._mapping[key] = self._store(value)
+            self.profiler.record_set(
+                key, default_timer() - start, self._stored_size(value, stored)
+            )
+        self._versions[key] = self._versions.get(key, 0) + 1
+        # wake up everyone who waits for change of this object
+        changed = self._changes.pop(key, None)
+        if changed is not None:
+            changed.set()
 
     def get(self, key, default=None):
-        value = self._mapping.get(key, default)
+        return self._get(key, self._mapping.get(key, default))
+
+    def view(self, key, default=None):
+        if self.profiler is not None:
+            self.profiler.record_view(key)
+        return read_only(self._mapping.get(key, default))
+
+    def version(self, key):
+        return self._versions.get(key, 0)
+
+    def wait_for_change(self, key, version, timeout=None):
+        while self.version(key) <= version:
+            changed = self._changes.setdefault(key, Event())
+            if not changed.wait(timeout):
+                break
+        return self.version(key)
+
+    def _get(self, key, value):
+        if self.profiler is None:
+            return self._load(value)
+        start = default_timer()
+        loaded = self._load(value)
+        self.profiler.record_get(
+            key, default_timer() - start, self._loaded_size(value, loaded)
+        )
+        return loaded
+
+    def _load(self, value):
         # return copy of object if its type in types_to_return_copy_of sequence
         if isinstance(value, self.types_to_return_copy_of):
             return deepcopy(value)
         return value
 
+    def _store(self, value):
+        return value
+
+    def _stored_size(self, original, stored):
+        if stored is original:
+            return 0
+        return approximate_size(stored)
+
+    def _loaded_size(self, original, loaded):
+        if loaded is original:
+            return 0
+        return approximate_size(loaded)
+
+
+@implementer(IContext)
+class SnapshotContext(DictContext):
+    """
+    Implementation of AuctionWorker context which keeps every stored object
+    as an immutable snapshot
+
+    Storing an object freezes it, reusing already frozen parts of it. Getting
+    an object returns a copy-on-write draft of the snapshot, so only the parts
+    of the object which are actually accessed are copied, and changes of the
+    draft never affect the snapshot. Readers that don't change anything could
+    use snapshot method to get shared snapshot itself without any copying.
+    """
+
+    def snapshot(self, key, default=None):
+        return self._mapping.get(key, default)
+
+    view = snapshot
+
+    def _load(self, value):
+        return draft(value)
+
+    def _store(self, value):
+        if isinstance(value, self.types_to_return_copy_of):
+            return freeze(value)
+        return value
+
+    def _stored_size(self, original, stored):
+        if stored is original:
+            return 0
+        # only parts of stored value which are not frozen yet are copied
+        return approximate_size(original, skip_frozen=True)
+
+    def _loaded_size(self, original, loaded):
+        if loaded is original:
+            return 0
+        # only top level of the value is copied while getting draft, the rest
+        # is copied later on access
+        return sys.getsizeof(loaded)
+
 
 CONTEXT_MAPPING = {
     'dict': DictContext,
+    'snapshot': SnapshotContext,
 }
 
 
@@ -2,29 +2,91 @@
 import logging
 from pkg_resources import iter_entry_points
 
-from copy import deepcopy
+import gevent
 from couchdb import Database, Session
-from couchdb.http import HTTPError, RETRYABLE_ERRORS
+from couchdb.http import HTTPError, ResourceConflict, ResourceNotFound, RETRYABLE_ERRORS
+from gevent.event import AsyncResult
 
 from zope.interface import (
+    Attribute,
     Interface,
     implementer,
 )
 
 from openprocurement.auction.utils import generate_request_id
 
+from openprocurement.auction.texas.retry import RetryPolicy
+from openprocurement.auction.texas.archive import (
+    ARCHIVE_ATTACHMENT,
+    archive_offset,
+    join_stages,
+    split_stages,
+    unpack_stages,
+)
+from openprocurement.auction.texas.header import (
+    HEADER_FIELDS,
+    HEADER_ID,
+    header_digest,
+    join_header,
+    split_header,
+)
+from openprocurement.auction.texas.metrics import DatabaseMetrics
+from openprocurement.auction.texas.queries import VIEWS, check_index
+from openprocurement.auction.texas.serialization import encoded_size
+from openprocurement.auction.texas.structures import draft, freeze
+from openprocurement.auction.texas.transitions import TRANSITIONS
 from openprocurement.auction.texas.journal import (
     AUCTION_WORKER_DB_GET_DOC,
     AUCTION_WORKER_DB_GET_DOC_ERROR, AUCTION_WORKER_DB_GET_DOC_UNHANDLED_ERROR, AUCTION_WORKER_DB_SAVE_DOC,
-    AUCTION_WORKER_DB_SAVE_DOC_ERROR, AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR)
+    AUCTION_WORKER_DB_SAVE_DOC_CONFLICT, AUCTION_WORKER_DB_SAVE_DOC_ERROR,
+    AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR, AUCTION_WORKER_DB_TRANSITION,
+    AUCTION_WORKER_DB_TRANSITION_ERROR)
 
 LOGGER = logging.getLogger("Auction Worker Texas")
 
+DESIGN_DOCUMENT_ID = '_design/auctions'
+
+# CouchDB update functions which match transitions from
+# openprocurement.auction.texas.transitions
+UPDATE_HANDLERS = {
+    'set_stage': """function(doc, req) {
+    if (!doc) {
+        return [null, {code: 404, body: 'Auction document not found'}];
+    }
+    doc.current_stage = parseInt(req.query.stage, 10);
+    return [doc, JSON.stringify({current_stage: doc.current_stage})];
+}""",
+    'increment_stage': """function(doc, req) {
+    if (!doc) {
+        return [null, {code: 404, body: 'Auction document not found'}];
+    }
+    doc.current_stage += 1;
+    return [doc, JSON.stringify({current_stage: doc.current_stage})];
+}""",
+    'cancel': """function(doc, req) {
+    if (!doc) {
+        return [null, {code: 404, body: 'Auction document not found'}];
+    }
+    doc.current_stage = -100;
+    doc.endDate = req.query.end_date;
+    return [doc, JSON.stringify({current_stage: doc.current_stage})];
+}""",
+    'reschedule': """function(doc, req) {
+    if (!doc) {
+        return [null, {code: 404, body: 'Auction document not found'}];
+    }
+    doc.current_stage = -101;
+    return [doc, JSON.stringify({current_stage: doc.current_stage})];
+}""",
+}
+
 
 class IDatabase(Interface):
     """
     Interface for objects which are responsible for work with database
     """
+    metrics = Attribute('DatabaseMetrics with latency histograms and counters of operations')
+
     def get_auction_document(self, auction_doc_id):
         """
         Retrieve auction document from database using provided identifier
@@ -44,6 +106,154 @@ class IDatabase(Interface):
         """
         raise NotImplementedError
 
+    def flush(self):
+        """
+        Wait until all saves which are not written to database yet are
+        written
+        """
+        raise NotImplementedError
+
+    def apply_transition(self, auction_doc_id, transition, **params):
+        """
+        Atomically apply transition from
+        openprocurement.auction.texas.transitions.TRANSITIONS to auction
+        document in database
+
+        :param auction_doc_id: identifier of document in database
+        :param transition: name of transition
+        :param params: parameters of transition
+        :return: new revision of document or None if document does not exist
+                 or transition failed
+        """
+        raise NotImplementedError
+
+    def apply_transitions(self, auction_doc_ids, transition, **params):
+        """
+        Apply transition to many auction documents at once, e.g. to cancel
+        auctions which were canceled by API in bulk
+
+        :param auction_doc_ids: identifiers of documents in database
+        :param transition: name of transition
+        :param params: parameters of transition
+        :return: dict of identifiers of documents mapped to their new
+                 revisions or None if document does not exist or transition
+                 failed
+        """
+        raise NotImplementedError
+
+    def query_auctions(self, index, start_key=None, end_key=None, limit=100, bookmark=None):
+        """
+        Query auction documents by index from
+        openprocurement.auction.texas.queries.INDEXES
+
+        :param index: name of index
+        :param start_key: the least key of rows, ignored with bookmark
+        :param end_key: the greatest key of rows
+        :param limit: maximum number of rows in page
+        :param bookmark: bookmark of page returned by previous query
+        :return: list of rows (key, auction_doc_id) sorted by key and
+                 bookmark of the next page or None if page is the last one
+        """
+        raise NotImplementedError
+
+
+def apply_transition_by_saving(database, auction_doc_id, transition, **params):
+    """
+    Apply transition for databases which can't do it atomically: get
+    document, change it and save it back. None is returned if document is
+    missing or isn't saved
+    """
+    auction_document = database.get_auction_document(auction_doc_id)
+    if not auction_document:
+        return None
+    TRANSITIONS[transition](auction_document, **params)
+    if database.save_auction_document(auction_document, auction_doc_id) is None:
+        return None
+    return auction_document.get('_rev')
+
+
+def apply_transitions_one_by_one(database, auction_doc_ids, transition, **params):
+    """
+    Apply transition to many documents for databases which have no bulk
+    operations
+    """
+    return dict(
+        (auction_doc_id, database.apply_transition(auction_doc_id, transition, **params))
+        for auction_doc_id in auction_doc_ids
+    )
+
+
+class CoalescingWriter(object):
+    """
+    Merges saves of the same document issued within a window into one
+    write of the latest state of document
+
+    Attributes:
+        window: time in seconds during which saves are merged
+        :type window: float
+    """
+
+    def __init__(self, save, window):
+        """
+        :param save: function which actually writes document, called with
+                     document and its identifier
+        :param window: time in seconds during which saves are merged
+        """
+        self._save = save
+        self.window = window
+        self._pending = {}
+        self._in_flight = {}
+
+    def save(self, auction_document, auction_doc_id):
+        """
+        Schedule write of document. Document must not be changed after it
+        was passed to this method.
+
+        :return: future which is resolved with result of the write
+        :rtype: gevent.event.AsyncResult
+        """
+        pending = self._pending.get(auction_doc_id)
+        if pending is None:
+            pending = self._pending[auction_doc_id] = [auction_document, AsyncResult()]
+            gevent.spawn_later(self.window, self._write, auction_doc_id)
+        else:
+            pending[0] = auction_document
+        return pending[1]
+
+    def flush(self):
+        for auction_doc_id in list(self._pending):
+            self._write(auction_doc_id)
+        for result in self._in_flight.values():
+            result.wait()
+
+    def flush_document(self, auction_doc_id):
+        """
+        Write pending save of document at once and wait for its write
+        """
+        self._write(auction_doc_id)
+        in_flight = self._in_flight.get(auction_doc_id)
+        if in_flight is not None:
+            in_flight.wait()
+
+    def _write(self, auction_doc_id):
+        pending = self._pending.pop(auction_doc_id, None)
+        if pending is None:
+            # already written by flush
+            return
+        auction_document, result = pending
+        # writes of the same document never overlap
+        previous = self._in_flight.get(auction_doc_id)
+        if previous is not None:
+            previous.wait()
+        self._in_flight[auction_doc_id] = result
+        try:
+            result.set(self._save(auction_document, auction_doc_id))
+        except Exception as e:
+            result.set_exception(e)
+        finally:
+            if self._in_flight.get(auction_doc_id) is result:
+                del self._in_flight[auction_doc_id]
+
 
 @implementer(IDatabase)
 class CouchDB(object):
@@ -56,13 +266,241 @@ class CouchDB(object):
         db_request_retries: Number of retries of database requesting in case
                             error occurred during getting or saving document
         :type db_request_retries: int
+        retry_policy: Delays between retries of getting or saving document
+                      and circuit breaker, configured by 'retry' section.
+                      Retries are made only by this policy, not by session
+        :type retry_policy: openprocurement.auction.texas.retry.RetryPolicy
+        sole_writer: If worker is the only writer of its auction document.
+                     In this mode the last known '_rev' of document is used
+                     for saving instead of getting document before every
+                     save, document is re-read only on conflict
+        :type sole_writer: bool
+        coalesce_window: If set, saves of document issued within this number
+                         of seconds are merged into one write and
+                         save_auction_document returns a future
+        :type coalesce_window: float
+        update_handlers: If transitions are applied by update functions of
+                         design document, which is installed on start.
+                         Otherwise document is got, changed and saved back
+        :type update_handlers: bool
+        json_codec: Name of JSON codec from
+                    openprocurement.auction.texas.serialization.CODECS used
+                    for all requests to CouchDB. Codec of couchdb-python is
+                    global for process, so it is installed once on start of
+                    worker by openprocurement.auction.texas.cli, not by
+                    database
+        :type json_codec: str
+        cache_documents: If the last got or saved version of document is
+                         kept. Cached document is returned if HEAD request
+                         shows its revision is still the latest one, so
+                         unchanged document isn't downloaded and parsed
+        :type cache_documents: bool
+        archive_stages: Number of inline stages after which completed
+                        stages are moved to compressed attachment, see
+                        openprocurement.auction.texas.archive
+        :type archive_stages: int
+        archive_size: Approximate size in bytes of inline stages after
+                      which completed stages are archived
+        :type archive_size: int
+        archive_keep: Number of completed stages which are kept inline on
+                      archival
+        :type archive_keep: int
+        split_header: If static fields of document are kept in separate
+                      header document, which is written only when they
+                      change, see openprocurement.auction.texas.header
+        :type split_header: bool
+        metrics: Latency histograms of operations, bytes written and
+                 counters of retries and conflicts
+        :type metrics: openprocurement.auction.texas.metrics.DatabaseMetrics
     """
     _db = None
+    _writer = None
     db_request_retries = 10
+    sole_writer = False
+    update_handlers = False
+    cache_documents = False
+    archive_stages = None
+    archive_size = None
+    archive_keep = 10
+    split_header = False
 
     def __init__(self, config):
         self._db = Database(str(config["COUCH_DATABASE"]),
-                            session=Session(retry_delays=range(10)))
+                            session=Session(retry_delays=[]))
+        self.retry_policy = RetryPolicy.from_config(config.get('retry', {}), self.db_request_retries)
+        self.metrics = DatabaseMetrics()
+        self.sole_writer = config.get('sole_writer', self.sole_writer)
+        self._revisions = {}
+        self.cache_documents = config.get('cache_documents', self.cache_documents)
+        # frozen versions of documents, drafts of them are returned
+        self._documents = {}
+        self.archive_stages = config.get('archive_stages', self.archive_stages)
+        self.archive_size = config.get('archive_size', self.archive_size)
+        self.archive_keep = config.get('archive_keep', self.archive_keep)
+        # numbers of archived stages of documents
+        self._archived = {}
+        self.split_header = config.get('split_header', self.split_header)
+        # digests and revisions of the last known headers of documents
+        self._headers = {}
+        if config.get('coalesce_window'):
+            self._writer = CoalescingWriter(self._save_auction_document, config['coalesce_window'])
+        self.update_handlers = config.get('update_handlers', self.update_handlers)
+        if self.update_handlers:
+            self.install_design_document()
+
+    def install_design_document(self):
+        """
+        Save design document with update functions of transitions and
+        views of indexes if it is missing or outdated
+        """
+        for _ in self.retry_policy.attempts():
+            design_document = self._db.get(DESIGN_DOCUMENT_ID) or {'_id': DESIGN_DOCUMENT_ID}
+            if design_document.get('updates') == UPDATE_HANDLERS and design_document.get('views') == VIEWS:
+                return
+            design_document['updates'] = UPDATE_HANDLERS
+            design_document['views'] = VIEWS
+            try:
+                self._db.save(design_document)
+                return
+            except ResourceConflict:
+                # workers started at the same time install it concurrently,
+                # design document is got again and checked
+                LOGGER.info("Design document {} is saved by another worker".format(DESIGN_DOCUMENT_ID))
+
+    def query_auctions(self, index, start_key=None, end_key=None, limit=100, bookmark=None):
+        """
+        Query view of index, design document is installed if it is missing.
+        Queries are not retried, errors are raised to caller.
+        """
+        check_index(index)
+        # one more row is requested, it starts the next page
+        options = {'limit': limit + 1}
+        if bookmark:
+            options['startkey'], options['startkey_docid'] = bookmark
+        elif start_key is not None:
+            options['startkey'] = start_key
+        if end_key is not None:
+            options['endkey'] = end_key
+        view = '{}/{}'.format(DESIGN_DOCUMENT_ID.split('/')[1], index)
+        try:
+            rows = list(self._db.view(view, **options))
+        except ResourceNotFound:
+            self.install_design_document()
+            rows = list(self._db.view(view, **options))
+        next_bookmark = [rows[limit].key, rows[limit].id] if len(rows) > limit else None
+        return [(row.key, row.value) for row in rows[:limit]], next_bookmark
+
+    def apply_transition(self, auction_doc_id, transition, **params):
+        # pending coalesced save would overwrite result of transition
+        if self._writer is not None:
+            self._writer.flush_document(auction_doc_id)
+        if not self.update_handlers:
+            return self._apply_transition_by_saving(auction_doc_id, transition, **params)
+        request_id = generate_request_id()
+        try:
+            with self.metrics.measure('transition', auction_doc_id):
+                headers, _ = self._db.update_doc(
+                    '{}/{}'.format(DESIGN_DOCUMENT_ID.split('/')[1], transition),
+                    auction_doc_id, **params
+                )
+        except ResourceNotFound:
+            return None
+        except HTTPError, e:
+            # transitions are not idempotent, so they are never retried
+            LOGGER.error("Error while apply transition {} to document: {}".format(transition, e),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+            return None
+        rev = headers.get('X-Couch-Update-NewRev')
+        self._revisions[auction_doc_id] = rev
+        self._documents.pop(auction_doc_id, None)
+        LOGGER.info("Applied transition {} to auction document {} with new rev {}".format(
+            transition, auction_doc_id, rev
+        ), extra={"JOURNAL_REQUEST_ID": request_id, "MESSAGE_ID": AUCTION_WORKER_DB_TRANSITION})
+        return rev
+
+    def _apply_transition_by_saving(self, auction_doc_id, transition, **params):
+        """
+        Get document, change it and write it with revision it was got with,
+        so revision is not got once more before write
+        """
+        auction_document = self.get_auction_document(auction_doc_id)
+        if not auction_document:
+            return None
+        TRANSITIONS[transition](auction_document, **params)
+        with self.metrics.measure('save', auction_doc_id):
+            self._write_auction_document(auction_document, auction_doc_id, fresh_revision=True)
+        return auction_document.get('_rev')
+
+    def apply_transitions(self, auction_doc_ids, transition, **params):
+        """
+        Get documents with one request to _all_docs, apply transition to
+        them in memory and save them with one request to _bulk_docs.
+        Documents which got conflict are got and saved again.
+
+        Like update handlers, transition is applied to live documents as
+        they are stored: header and archived stages are not joined, see
+        openprocurement.auction.texas.transitions. Stubs of attachments
+        are saved back, so archive of stages is kept.
+        """
+        request_id = generate_request_id()
+        if self._writer is not None:
+            for auction_doc_id in auction_doc_ids:
+                self._writer.flush_document(auction_doc_id)
+        revisions = dict.fromkeys(auction_doc_ids)
+        remaining = list(auction_doc_ids)
+        for _ in self.retry_policy.attempts():
+            try:
+                rows = self._db.view('_all_docs', keys=remaining, include_docs=True)
+                # missing and deleted documents come without doc
+                documents = [row.doc for row in rows if row.doc]
+                for auction_document in documents:
+                    TRANSITIONS[transition](auction_document, **params)
+                results = self._db.update(documents) if documents else []
+                self.retry_policy.breaker.success()
+            except HTTPError, e:
+                self.retry_policy.breaker.failure()
+                LOGGER.error("Error while apply transition {} to documents: {}".format(transition, e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+                continue
+            except Exception, e:
+                self.retry_policy.breaker.failure()
+                errcode = e.args[0]
+                if errcode in RETRYABLE_ERRORS:
+                    LOGGER.error("Error while apply transition {} to documents: {}".format(transition, e),
+                                 extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+                    continue
+                LOGGER.critical("Unhandled error: {}".format(e),
+                                extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+                break
+            remaining = []
+            for success, auction_doc_id, rev in results:
+                if success:
+                    revisions[auction_doc_id] = rev
+                    self._revisions[auction_doc_id] = rev
+                    self._documents.pop(auction_doc_id, None)
+                elif isinstance(rev, ResourceConflict):
+                    remaining.append(auction_doc_id)
+                else:
+                    LOGGER.error("Error while apply transition {} to document {}: {}".format(
+                        transition, auction_doc_id, rev
+                    ), extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+            if not remaining:
+                break
+            LOGGER.warning("Conflict while apply transition {} to documents {}".format(transition, remaining),
+                           extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_CONFLICT})
+        LOGGER.info("Applied transition {} to {} of {} auction documents".format(
+            transition, len([rev for rev in revisions.values() if rev]), len(revisions)
+        ), extra={"JOURNAL_REQUEST_ID": request_id, "MESSAGE_ID": AUCTION_WORKER_DB_TRANSITION})
+        return revisions
+
+    def _attempts(self, auction_doc_id):
+        """
+        Yield attempts of retry policy counting retries
+        """
+        for attempt in self.retry_policy.attempts():
+            if attempt:
+                self.metrics.increment('retries', auction_doc_id)
+            yield attempt
 
     def _update_revision(self, auction_document, auction_doc_id):
         """
@@ -75,9 +513,61 @@ class CouchDB(object):
         :return:
         """
         public_document = self.get_auction_document(auction_doc_id)
-        if public_document and public_document.get('_rev') != auction_document['_rev']:
+        if public_document and public_document.get('_rev') != auction_document.get('_rev'):
             auction_document["_rev"] = public_document["_rev"]
 
+    def _prepare_revision(self, auction_document, auction_doc_id):
+        """
+        Set '_rev' field of document which is going to be saved. Sole writer
+        uses the last known revision, otherwise revision is got from database
+
+        :param auction_document: auction document object
+        :param auction_doc_id: identifier of document in database
+        :return:
+        """
+        if self.sole_writer and auction_doc_id in self._revisions:
+            auction_document['_rev'] = self._revisions[auction_doc_id]
+        else:
+            self._update_revision(auction_document, auction_doc_id)
+
+    def _merge_conflict(self, auction_document, auction_doc_id):
+        """
+        Merge document changed by someone else into provided document.
+        Fields of provided document win, fields that exist only in database
+        are kept.
+
+        :param auction_document: auction document object
+        :param auction_doc_id: identifier of document in database
+        :return:
+        """
+        self._revisions.pop(auction_doc_id, None)
+        public_document = self.get_auction_document(auction_doc_id)
+        for key, value in public_document.items():
+            auction_document.setdefault(key, value)
+        if public_document:
+            auction_document['_rev'] = public_document['_rev']
+
+    def _head_revision(self, auction_doc_id):
+        """
+        Return the latest revision of document from ETag of HEAD response or
+        None if it is unknown
+        """
+        try:
+            _, headers, _ = self._db.resource.head(auction_doc_id)
+        except ResourceNotFound:
+            self._documents.pop(auction_doc_id, None)
+            return None
+        except Exception, e:
+            LOGGER.error("Error while get revision of document: {}".format(e),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_GET_DOC_ERROR})
+            return None
+        etag = headers.get('etag')
+        return etag.strip('"') if etag else None
+
+    def _cache_document(self, public_document, auction_doc_id):
+        if self.cache_documents:
+            self._documents[auction_doc_id] = freeze(public_document)
+
     def get_auction_document(self, auction_doc_id):
         """
         Retrieve auction document from couchdb database using provided identifier
@@ -85,21 +575,41 @@ class CouchDB(object):
         :param auction_doc_id: identifier of document in couchdb database
         :return: auction document object from couchdb database
         """
+        with self.metrics.measure('get', auction_doc_id):
+            return self._read_auction_document(auction_doc_id)
+
+    def _read_auction_document(self, auction_doc_id):
         request_id = generate_request_id()
-        retries = self.db_request_retries
-        while retries:
+        cached = self._documents.get(auction_doc_id)
+        if cached is not None and self._head_revision(auction_doc_id) == cached['_rev']:
+            LOGGER.info("Get cached auction document {0[_id]} with rev {0[_rev]}".format(cached),
+                        extra={"JOURNAL_REQUEST_ID": request_id,
+                               "MESSAGE_ID": AUCTION_WORKER_DB_GET_DOC})
+            return draft(cached)
+        for _ in self._attempts(auction_doc_id):
             try:
                 public_document = self._db.get(auction_doc_id)
-                if public_document:
-                    LOGGER.info("Get auction document {0[_id]} with rev {0[_rev]}".format(public_document),
-                                extra={"JOURNAL_REQUEST_ID": request_id,
-                                       "MESSAGE_ID": AUCTION_WORKER_DB_GET_DOC})
-                    return public_document
+                self.retry_policy.breaker.success()
+                if not public_document:
+                    # missing document is not an error to retry
+                    return {}
+                if 'stages_offset' in public_document:
+                    self._join_archived_stages(public_document, auction_doc_id)
+                if 'header_id' in public_document:
+                    self._join_header(public_document, auction_doc_id)
+                LOGGER.info("Get auction document {0[_id]} with rev {0[_rev]}".format(public_document),
+                            extra={"JOURNAL_REQUEST_ID": request_id,
+                                   "MESSAGE_ID": AUCTION_WORKER_DB_GET_DOC})
+                self._revisions[auction_doc_id] = public_document['_rev']
+                self._cache_document(public_document, auction_doc_id)
+                return public_document
 
             except HTTPError, e:
+                self.retry_policy.breaker.failure()
                 LOGGER.error("Error while get document: {}".format(e),
                              extra={'MESSAGE_ID': AUCTION_WORKER_DB_GET_DOC_ERROR})
             except Exception, e:
+                self.retry_policy.breaker.failure()
                 errcode = e.args[0]
                 if errcode in RETRYABLE_ERRORS:
                     LOGGER.error("Error while get document: {}".format(e),
@@ -107,34 +617,155 @@ class CouchDB(object):
                 else:
                     LOGGER.critical("Unhandled error: {}".format(e),
                                     extra={'MESSAGE_ID': AUCTION_WORKER_DB_GET_DOC_UNHANDLED_ERROR})
-            retries -= 1
         return {}
 
+    def _join_archived_stages(self, public_document, auction_doc_id):
+        archive = self._db.get_attachment(public_document, ARCHIVE_ATTACHMENT)
+        if archive is None:
+            raise HTTPError('Archive of stages of document {} is missing'.format(auction_doc_id))
+        self._archived[auction_doc_id] = public_document['stages_offset']
+        join_stages(public_document, unpack_stages(archive.read()))
+
+    def _join_header(self, public_document, auction_doc_id):
+        header = self._db.get(public_document['header_id'])
+        if header is None:
+            raise HTTPError('Header of document {} is missing'.format(auction_doc_id))
+        header_fields = dict((field, header[field]) for field in HEADER_FIELDS if field in header)
+        self._headers[auction_doc_id] = (header_digest(header_fields), header['_rev'])
+        join_header(public_document, header_fields)
+
+    def _save_header(self, public_document, auction_doc_id):
+        """
+        Move static fields of document which is going to be saved to header
+        document and save it if its content changed
+
+        :return: True if header is saved or unchanged
+        """
+        header = split_header(public_document, auction_doc_id)
+        if not header:
+            return True
+        digest = header_digest(header)
+        known_digest, rev = self._headers.get(auction_doc_id, (None, None))
+        if digest == known_digest:
+            return True
+        header_document = dict(header, _id=HEADER_ID.format(auction_doc_id))
+        for _ in self._attempts(auction_doc_id):
+            try:
+                if rev is None:
+                    rev = (self._db.get(header_document['_id']) or {}).get('_rev')
+                if rev is not None:
+                    header_document['_rev'] = rev
+                _, rev = self._db.save(header_document)
+                self.retry_policy.breaker.success()
+                self.metrics.record('bytes_written', auction_doc_id, encoded_size())
+                self._headers[auction_doc_id] = (digest, rev)
+                LOGGER.info("Saved header of auction document {0} with rev {1}".format(auction_doc_id, rev),
+                            extra={"MESSAGE_ID": AUCTION_WORKER_DB_SAVE_DOC})
+                return True
+            except ResourceConflict, e:
+                self.metrics.increment('conflicts', auction_doc_id)
+                LOGGER.warning("Conflict while save header document: {}".format(e),
+                               extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_CONFLICT})
+                rev = None
+            except HTTPError, e:
+                self.retry_policy.breaker.failure()
+                LOGGER.error("Error while save header document: {}".format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_ERROR})
+            except Exception, e:
+                self.retry_policy.breaker.failure()
+                errcode = e.args[0]
+                if errcode in RETRYABLE_ERRORS:
+                    LOGGER.error("Error while save header document: {}".format(e),
+                                 extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_ERROR})
+                else:
+                    LOGGER.critical("Unhandled error: {}".format(e),
+                                    extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR})
+        return False
+
+    def _archive_stages(self, public_document, auction_doc_id):
+        """
+        Move completed stages of document which is going to be saved to
+        archive if it is configured
+
+        :return: number of archived stages
+        """
+        archived = self._archived.get(auction_doc_id, 0)
+        if not (self.archive_stages or self.archive_size) or 'stages' not in public_document:
+            return archived
+        offset = archive_offset(
+            public_document, archived, self.archive_stages, self.archive_size, self.archive_keep
+        )
+        if offset:
+            split_stages(public_document, archived, offset)
+        return offset
+
     def save_auction_document(self, auction_document, auction_doc_id):
         """
         Save provided auction document to couchdb database
 
         :param auction_document: auction document object
         :param auction_doc_id: identifier of document in database
-        :return:
+        :return: id and revision of saved document or, if saves are
+                 coalesced, future which is resolved with them
+        """
+        if self._writer is not None:
+            return self._writer.save(auction_document, auction_doc_id)
+        return self._save_auction_document(auction_document, auction_doc_id)
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def _save_auction_document(self, auction_document, auction_doc_id):
+        with self.metrics.measure('save', auction_doc_id):
+            return self._write_auction_document(auction_document, auction_doc_id)
+
+    def _write_auction_document(self, auction_document, auction_doc_id, fresh_revision=False):
+        """
+        :param fresh_revision: if document has revision it was just got
+                               with, the first attempt is made with it
         """
         request_id = generate_request_id()
-        public_document = deepcopy(dict(auction_document))
-        retries = self.db_request_retries
-        while retries:
+        # only top level is copied, nested structures are encoded by codec
+        # straight from the ones worker keeps, see
+        # openprocurement.auction.texas.serialization
+        public_document = dict(auction_document)
+        archived = self._archive_stages(public_document, auction_doc_id)
+        # header is saved first, so live document never refers to missing one
+        if self.split_header and not self._save_header(public_document, auction_doc_id):
+            return None
+        for _ in self._attempts(auction_doc_id):
             try:
-                self._update_revision(public_document, auction_doc_id)
+                if not fresh_revision:
+                    self._prepare_revision(public_document, auction_doc_id)
                 response = self._db.save(public_document)
+                self.retry_policy.breaker.success()
+                self.metrics.record('bytes_written', auction_doc_id, encoded_size())
                 if len(response) == 2:
                     LOGGER.info("Saved auction document {0} with rev {1}".format(*response),
                                 extra={"JOURNAL_REQUEST_ID": request_id,
                                        "MESSAGE_ID": AUCTION_WORKER_DB_SAVE_DOC})
                     auction_document['_rev'] = response[1]
+                    self._revisions[auction_doc_id] = response[1]
+                    self._archived[auction_doc_id] = archived
+                    self._cache_document(dict(auction_document, _rev=response[1]), auction_doc_id)
                     return response
+            except ResourceConflict, e:
+                self.metrics.increment('conflicts', auction_doc_id)
+                LOGGER.warning("Conflict while save document: {}".format(e),
+                               extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_CONFLICT})
+                fresh_revision = False
+                if self.sole_writer:
+                    self._merge_conflict(public_document, auction_doc_id)
+                    if self.split_header:
+                        # merged document has fields of header
+                        split_header(public_document, auction_doc_id)
             except HTTPError, e:
+                self.retry_policy.breaker.failure()
                 LOGGER.error("Error while save document: {}".format(e),
                              extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_ERROR})
             except Exception, e:
+                self.retry_policy.breaker.failure()
                 errcode = e.args[0]
                 if errcode in RETRYABLE_ERRORS:
                     LOGGER.error("Error while save document: {}".format(e),
@@ -144,7 +775,6 @@ class CouchDB(object):
                                     extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR})
             if "_rev" in public_document:
                 LOGGER.debug("Retry save document changes")
-            retries -= 1
 
 
 DATABASE_MAPPING = {
@@ -22,6 +22,11 @@ from openprocurement.auction.utils import (
     get_latest_bid_for_bidder,
     calculate_hash
 )
+from openprocurement.auction.texas.bidders import BidderRegistry
+from openprocurement.auction.texas.constants import (
+    ADDITIONAL_LANGUAGES,
+    MULTILINGUAL_FIELDS
+)
 from openprocurement.auction.texas.utils import (
     get_active_bids,
     open_bidders_name,
@@ -39,6 +44,56 @@ from openprocurement.auction.texas.journal import (
 LOGGER = logging.getLogger("Auction Worker Texas")
 
 
+# Fields of auction data which are used by worker. True keeps value as is,
+# dictionary keeps only listed fields of mapping and list with single
+# projection applies it to every element of sequence.
+AUCTION_DATA_PROJECTION = {
+    'data': dict(
+        [
+            ('id', True),
+            ('auctionID', True),
+            ('procurementMethodType', True),
+            ('procuringEntity', True),
+            ('auctionPeriod', {'startDate': True}),
+            ('value', True),
+            ('minimalStep', True),
+            ('items', True),
+            ('bids', [{
+                'id': True,
+                'date': True,
+                'status': True,
+                'owner': True,
+                'value': True,
+            }]),
+        ] + [
+            (field, True) for field in MULTILINGUAL_FIELDS
+        ] + [
+            ('{}_{}'.format(field, lang), True)
+            for field in MULTILINGUAL_FIELDS for lang in ADDITIONAL_LANGUAGES
+        ]
+    )
+}
+
+
+def project(data, projection):
+    """
+    Return copy of data which contains only fields described by projection.
+    Fields which are missing in data are skipped.
+
+    :param data: auction data from datasource
+    :param projection: description of fields to keep, see AUCTION_DATA_PROJECTION
+    :return: projected data
+    """
+    if projection is True:
+        return data
+    if isinstance(projection, list):
+        return [project(item, projection[0]) for item in data]
+    return dict(
+        (key, project(data[key], field_projection))
+        for key, field_projection in projection.items() if key in data
+    )
+
+
 class IDataSource(Interface):
     """
     Interface for objects that responsible for with external source of data
@@ -66,9 +121,10 @@ class IDataSource(Interface):
     def upload_auction_history_document(self, external_data, db_document, history_data):
         raise NotImplementedError
 
-    def set_participation_urls(self, external_data):
+    def set_participation_urls(self, external_data, registry=None):
         """
         :param external_data:
+        :param registry: BidderRegistry of auction, which caches participation hashes
         :return:
         This method is responsible for posting participationUrl to external source of data
         if it needed
@@ -101,7 +157,7 @@ class SimpleTestingFileDataSource(object):
     def update_source_object(self, external_data, db_document, history_data):
         return True
 
-    def set_participation_urls(self, external_data):
+    def set_participation_urls(self, external_data, registry=None):
         pass
 
     def upload_auction_history_document(self, data):
@@ -132,7 +188,7 @@ class FileDataSource(object):
     def update_source_object(self, external_data, db_document, history_data):
         return True
 
-    def set_participation_urls(self, external_data):
+    def set_participation_urls(self, external_data, registry=None):
         pass
 
     def upload_auction_history_document(self, data):
@@ -340,15 +396,18 @@ class OpenProcurementAPIDataSource(object):
                 extra={"JOURNAL_REQUEST_ID": request_id,
                        "MESSAGE_ID": AUCTION_WORKER_API_AUDIT_LOG_NOT_APPROVED})
 
-    def set_participation_urls(self, external_data):
+    def set_participation_urls(self, external_data, registry=None):
         request_id = generate_request_id()
+        if registry is None:
+            registry = BidderRegistry()
+            registry.update(external_data["data"]["bids"])
         patch_data = {"data": {"auctionUrl": self.auction_url, "bids": []}}
         for bid in external_data["data"]["bids"]:
-            if bid.get('status', 'active') == 'active':
+            if registry.is_active(bid["id"]):
                 participation_url = self.auction_url
                 participation_url += '/login?bidder_id={}&hash={}'.format(
                     bid["id"],
-                    calculate_hash(bid["id"], self.hash_secret)
+                    registry.participation_hash(bid["id"], self.hash_secret, calculate_hash)
                 )
                 patch_data['data']['bids'].append(
                     {"participationUrl": participation_url,
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+Event sourced storage of auction document in CouchDB.
+
+Instead of rewriting the whole auction document on every save, only changes
+since the previous save are written as a small immutable event document:
+
+    {
+        "_id": "<auction id>_event_0000000042",
+        "doc_type": "auction_event",
+        "auction_id": "<auction id>",
+        "seq": 42,
+        "fields": {"current_stage": 5, "results": [...]},
+        "removed": [],
+        "stages": [[5, {...}], [6, {...}]]
+    }
+
+Events are written with _bulk_docs. The aggregate auction document, which
+is read by frontend, keeps its usual format and is materialized
+periodically with 'events_seq' field pointing to the last applied event.
+Getting document applies events which are not materialized yet.
+
+Events which are materialized are not needed anymore, they are deleted
+after materialization, so database doesn't grow with every bid. Saves
+return None until events of document are written.
+"""
+import logging
+
+import gevent
+from couchdb.http import HTTPError, RETRYABLE_ERRORS
+
+from openprocurement.auction.texas.database import (
+    CouchDB,
+    apply_transition_by_saving,
+    apply_transitions_one_by_one,
+)
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_SAVE_EVENTS,
+    AUCTION_WORKER_DB_SAVE_EVENTS_ERROR,
+)
+from openprocurement.auction.texas.serialization import encoded_size
+from openprocurement.auction.texas.state import to_document
+from openprocurement.auction.texas.structures import freeze, thaw
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+EVENT_ID = '{}_event_{:010d}'
+SERVICE_FIELDS = ('_id', '_rev', 'events_seq')
+
+
+def diff_documents(previous, current):
+    """
+    Return changes of frozen auction document as event data: changed
+    top level fields, removed fields and changed or appended stages.
+    Unchanged parts of frozen documents are shared, so they are compared by
+    identity first.
+    """
+    fields = {}
+    for key, value in dict.iteritems(current):
+        if key in SERVICE_FIELDS or key == 'stages':
+            continue
+        if key not in previous:
+            fields[key] = value
+            continue
+        old_value = dict.__getitem__(previous, key)
+        if old_value is not value and old_value != value:
+            fields[key] = value
+    removed = [
+        key for key in previous
+        if key not in current and key not in SERVICE_FIELDS
+    ]
+
+    stages = []
+    old_stages = previous.get('stages', ())
+    for index, stage in enumerate(current.get('stages', ())):
+        if index < len(old_stages):
+            old_stage = list.__getitem__(old_stages, index)
+            if old_stage is stage or old_stage == stage:
+                continue
+        stages.append([index, stage])
+    if len(old_stages) > len(current.get('stages', ())):
+        # stages were removed, whole list has to be replaced
+        fields['stages'] = current.get('stages', [])
+        stages = []
+    return {'fields': fields, 'removed': removed, 'stages': stages}
+
+
+def apply_event(auction_document, event):
+    """
+    Apply event to plain auction document
+    """
+    for key, value in event.get('fields', {}).items():
+        auction_document[key] = value
+    for key in event.get('removed', []):
+        auction_document.pop(key, None)
+    stages = auction_document.setdefault('stages', [])
+    for index, stage in event.get('stages', []):
+        if index < len(stages):
+            stages[index] = stage
+        else:
+            stages.append(stage)
+    auction_document['events_seq'] = event['seq']
+    return auction_document
+
+
+class EventSourcedCouchDB(CouchDB):
+    """
+    CouchDB database which writes changes of auction document as events and
+    periodically materializes auction document
+
+    Attributes:
+        materialize_interval: interval in seconds between writes of
+                              aggregate auction document
+        :type materialize_interval: float
+    """
+    materialize_interval = 1
+    sole_writer = True
+
+    def __init__(self, config):
+        super(EventSourcedCouchDB, self).__init__(config)
+        self.materialize_interval = config.get('materialize_interval', self.materialize_interval)
+        self._states = {}
+        self._seqs = {}
+        self._materialized_seqs = {}
+        self._unsaved_events = {}
+        # ids, revisions and seqs of saved events, which are deleted once
+        # they are materialized
+        self._saved_events = {}
+        self._materializer = None
+
+    def get_auction_document(self, auction_doc_id):
+        public_document = super(EventSourcedCouchDB, self).get_auction_document(auction_doc_id)
+        if not public_document:
+            return public_document
+        self._materialized_seqs[auction_doc_id] = public_document.get('events_seq', 0)
+        # events which were materialized, but not deleted before restart,
+        # are got too, so they are deleted with the next materialization
+        events = self._get_events(auction_doc_id, 1)
+        self._saved_events[auction_doc_id] = [
+            {'_id': event['_id'], '_rev': event['_rev'], 'seq': event['seq']} for event in events
+        ]
+        for event in events:
+            if event['seq'] > self._materialized_seqs[auction_doc_id]:
+                apply_event(public_document, event)
+        self._seqs[auction_doc_id] = public_document.get('events_seq', 0)
+        self._states[auction_doc_id] = freeze(public_document)
+        return public_document
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        with self.metrics.measure('save', auction_doc_id):
+            return self._save_changes(auction_document, auction_doc_id)
+
+    def _save_auction_document(self, auction_document, auction_doc_id):
+        # aggregate document is measured apart from saves of worker
+        with self.metrics.measure('materialize', auction_doc_id):
+            return self._write_auction_document(auction_document, auction_doc_id)
+
+    def _save_changes(self, auction_document, auction_doc_id):
+        previous = self._states.get(auction_doc_id)
+        current = freeze(auction_document)
+        if previous is None:
+            # nothing to compare with, document is written as is
+            self._states[auction_doc_id] = current
+            response = self._materialize(current, auction_doc_id)
+            if response:
+                auction_document['_rev'] = response[1]
+            return response
+
+        changes = diff_documents(previous, current)
+        self._states[auction_doc_id] = current
+        if changes['fields'] or changes['removed'] or changes['stages']:
+            seq = self._seqs[auction_doc_id] = self._seqs.get(auction_doc_id, 0) + 1
+            event = to_document(changes)
+            event.update({
+                '_id': EVENT_ID.format(auction_doc_id, seq),
+                'doc_type': 'auction_event',
+                'auction_id': auction_doc_id,
+                'seq': seq,
+            })
+            self._unsaved_events.setdefault(auction_doc_id, []).append(event)
+            self._save_events(auction_doc_id)
+        self._start_materializer()
+        if self._unsaved_events.get(auction_doc_id):
+            # events are saved later, document isn't saved yet
+            return None
+        if auction_doc_id in self._revisions:
+            auction_document['_rev'] = self._revisions[auction_doc_id]
+        return auction_doc_id, auction_document.get('_rev')
+
+    def apply_transition(self, auction_doc_id, transition, **params):
+        # update functions would change aggregate document behind events
+        return apply_transition_by_saving(self, auction_doc_id, transition, **params)
+
+    def apply_transitions(self, auction_doc_ids, transition, **params):
+        # every document gets its event, bulk save would bypass them
+        return apply_transitions_one_by_one(self, auction_doc_ids, transition, **params)
+
+    def flush(self):
+        super(EventSourcedCouchDB, self).flush()
+        for auction_doc_id in list(self._unsaved_events):
+            self._save_events(auction_doc_id)
+        for auction_doc_id in self._outdated():
+            self._materialize(self._states[auction_doc_id], auction_doc_id)
+
+    def _outdated(self):
+        """
+        Return ids of documents which have events that are not materialized
+        """
+        return [
+            auction_doc_id for auction_doc_id, seq in self._seqs.items()
+            if seq > self._materialized_seqs.get(auction_doc_id, 0)
+        ]
+
+    def _save_events(self, auction_doc_id):
+        events = self._unsaved_events.get(auction_doc_id)
+        if not events:
+            return
+        for _ in self._attempts(auction_doc_id):
+            try:
+                results = self._db.update(events)
+                self.retry_policy.breaker.success()
+                self.metrics.record('bytes_written', auction_doc_id, encoded_size())
+                break
+            except HTTPError, e:
+                self.retry_policy.breaker.failure()
+                LOGGER.error("Error while save events: {}".format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS_ERROR})
+            except Exception, e:
+                self.retry_policy.breaker.failure()
+                errcode = e.args[0]
+                if errcode in RETRYABLE_ERRORS:
+                    LOGGER.error("Error while save events: {}".format(e),
+                                 extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS_ERROR})
+                else:
+                    LOGGER.critical("Unhandled error: {}".format(e),
+                                    extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS_ERROR})
+        else:
+            # events stay in queue for the next save or materialization
+            return
+        self._unsaved_events[auction_doc_id] = []
+        self._saved_events.setdefault(auction_doc_id, []).extend(
+            {'_id': event['_id'], '_rev': rev, 'seq': event['seq']}
+            for event, (success, _, rev) in zip(events, results) if success
+        )
+        # events rejected by database, e.g. with conflict, would be rejected
+        # again, they are dropped and the whole state is materialized instead
+        rejected = [(event, error) for event, (success, _, error) in zip(events, results) if not success]
+        for event, error in rejected:
+            LOGGER.error("Event {} is rejected: {}".format(event['_id'], error),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS_ERROR})
+        LOGGER.info("Saved {} events of auction document {}".format(
+            len(events) - len(rejected), auction_doc_id
+        ), extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS})
+        if rejected:
+            self._materialize(self._states[auction_doc_id], auction_doc_id)
+
+    def _get_events(self, auction_doc_id, start_seq):
+        rows = self._db.view(
+            '_all_docs',
+            startkey=EVENT_ID.format(auction_doc_id, start_seq),
+            endkey=EVENT_ID.format(auction_doc_id, 10 ** 10 - 1),
+            include_docs=True
+        )
+        return [row.doc for row in rows]
+
+    def _materialize(self, state, auction_doc_id):
+        seq = self._seqs.get(auction_doc_id, 0)
+        auction_document = thaw(state)
+        auction_document['events_seq'] = seq
+        response = self._save_auction_document(auction_document, auction_doc_id)
+        if response:
+            self._materialized_seqs[auction_doc_id] = seq
+            self._delete_events(auction_doc_id, seq)
+        return response
+
+    def _delete_events(self, auction_doc_id, seq):
+        """
+        Delete saved events which are materialized up to provided seq,
+        events which failed to be deleted are deleted with the next
+        materialization
+        """
+        saved_events = self._saved_events.get(auction_doc_id, [])
+        materialized = [event for event in saved_events if event['seq'] <= seq]
+        if not materialized:
+            return
+        try:
+            results = self._db.update([
+                {'_id': event['_id'], '_rev': event['_rev'], '_deleted': True}
+                for event in materialized
+            ])
+        except Exception, e:
+            LOGGER.error("Error while delete events: {}".format(e),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS_ERROR})
+            return
+        for (success, event_id, error) in results:
+            if not success:
+                # event was changed or deleted by someone else
+                LOGGER.error("Event {} is not deleted: {}".format(event_id, error),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS_ERROR})
+        self._saved_events[auction_doc_id] = [event for event in saved_events if event['seq'] > seq]
+        LOGGER.info("Deleted {} materialized events of auction document {}".format(
+            len(materialized), auction_doc_id
+        ), extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_EVENTS})
+
+    def _start_materializer(self):
+        if self._materializer is None:
+            self._materializer = gevent.spawn(self._materialize_periodically)
+
+    def _materialize_periodically(self):
+        while True:
+            gevent.sleep(self.materialize_interval)
+            for auction_doc_id in self._outdated():
+                # events which failed to be saved with document are saved first
+                self._save_events(auction_doc_id)
+                if not self._unsaved_events.get(auction_doc_id):
+                    self._materialize(self._states[auction_doc_id], auction_doc_id)
+
+
+def couchdb_events_database():
+    return EventSourcedCouchDB
@@ -53,7 +53,7 @@ class BidsForm(Form):
 
 def form_handler():
     form = app.bids_form.from_json(request.json)
-    form.document = app.context['auction_document']
+    form.document = app.context.view('auction_document')
     current_time = datetime.now(TIMEZONE)
     if form.validate():
         with lock_server(app.context['server_actions']):
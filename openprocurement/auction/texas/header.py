@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Split of auction document into static header document and live document.
+
+Browsers watching auction get auction document from changes feed on every
+change, while procuring entity, items and multilingual titles and
+descriptions are written once at planning and never change during bidding.
+Database keeps such fields in separate header document, which is written
+only when its content changes, and only fields changed by bidding in live
+document:
+
+    {"_id": "<auction id>_header", "items": [...], "title": "...", ...}
+    {"_id": "<auction id>", "header_id": "<auction id>_header",
+     "current_stage": 3, "stages": [...], "results": [...]}
+
+Worker always gets document with fields of header.
+"""
+import hashlib
+import json
+
+from openprocurement.auction.texas.constants import (
+    ADDITIONAL_LANGUAGES,
+    MULTILINGUAL_FIELDS,
+)
+from openprocurement.auction.texas.serialization import encode_default
+
+HEADER_ID = '{}_header'
+
+HEADER_FIELDS = [
+    'auctionID',
+    'procurementMethodType',
+    'TENDERS_API_VERSION',
+    'auction_type',
+    'procuringEntity',
+    'items',
+    'value',
+    'minimalStep',
+    'initial_value',
+    'mode',
+    'test_auction_data',
+] + MULTILINGUAL_FIELDS + [
+    '{}_{}'.format(field, lang) for field in MULTILINGUAL_FIELDS for lang in ADDITIONAL_LANGUAGES
+]
+
+
+def header_digest(header):
+    """
+    Return digest of header content, which shows if header has to be
+    written again
+    """
+    body = json.dumps(header, sort_keys=True, default=encode_default)
+    return hashlib.md5(body).hexdigest()
+
+
+def split_header(public_document, auction_doc_id):
+    """
+    Move static fields of document which is going to be saved to header
+
+    :param public_document: top level copy of auction document
+    :param auction_doc_id: identifier of document in database
+    :return: header without '_id' and '_rev', empty if document has no
+             static fields and is saved as is
+    """
+    header = {}
+    for field in HEADER_FIELDS:
+        if field in public_document:
+            header[field] = public_document.pop(field)
+    if header:
+        public_document['header_id'] = HEADER_ID.format(auction_doc_id)
+    return header
+
+
+def join_header(public_document, header):
+    """
+    Restore static fields of document got from database, fields of live
+    document win
+    """
+    public_document.pop('header_id')
+    for field in HEADER_FIELDS:
+        if field in header:
+            public_document.setdefault(field, header[field])
@@ -5,8 +5,19 @@ AUCTION_WORKER_DB_GET_DOC = uuid.UUID('e992106cf844460ab85419a5aa53dd76')
 AUCTION_WORKER_DB_GET_DOC_ERROR = uuid.UUID('5ba19e99963149f9bcdbb89f978f8c31')
 AUCTION_WORKER_DB_SAVE_DOC = uuid.UUID('48b5f9fef4124cf39be6d2e4722a71c3')
 AUCTION_WORKER_DB_SAVE_DOC_ERROR = uuid.UUID('b219ee898b834628be23424d0c27a8b8')
+AUCTION_WORKER_DB_SAVE_DOC_CONFLICT = uuid.UUID('72d9d6fc955049ab92fb02ac22acc892')
 AUCTION_WORKER_DB_GET_DOC_UNHANDLED_ERROR = uuid.UUID('2188fca7e99a4d409817567f894421cd')
 AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR = uuid.UUID('4b650dea8eb84412a4d630265587dbcb')
+AUCTION_WORKER_DB_SAVE_EVENTS = uuid.UUID('539ed1e6a1804c90883b8106110f4beb')
+AUCTION_WORKER_DB_SAVE_EVENTS_ERROR = uuid.UUID('7f5db7f1c0e34c1e9b939eeae533bd6b')
+AUCTION_WORKER_DB_TRANSITION = uuid.UUID('57f8903e7b46442f9632e723eeded6dc')
+AUCTION_WORKER_DB_TRANSITION_ERROR = uuid.UUID('9599e9feacf94c859c2899d0cbf11d8b')
+AUCTION_WORKER_DB_REPLICATION = uuid.UUID('a175667231de4ac8bc253677f8a1c46a')
+AUCTION_WORKER_DB_REPLICATION_ERROR = uuid.UUID('75448b62c71e42589281843ebab59f26')
+AUCTION_WORKER_DB_CIRCUIT_OPEN = uuid.UUID('7b3523614c3f4124887912aa576620de')
+AUCTION_WORKER_DB_JOURNAL_REPLAY = uuid.UUID('63368182aab240c9b55db88624a2cdfb')
+AUCTION_WORKER_DB_JOURNAL_ERROR = uuid.UUID('5573318095214aff8fe4961d29769e61')
+AUCTION_WORKER_DB_METRICS = uuid.UUID('04df4f6373934ab98b8f893bbf8aaf38')
 
 AUCTION_WORKER_SERVICE_PREPARE_SERVER = uuid.UUID('7ddc92a966f7492e8dbf59f7916831c4')
 AUCTION_WORKER_SERVICE_STOP_AUCTION_WORKER = uuid.UUID('e7c0a6eb8ec441e2a7cf32bad5ffa57a')
@@ -21,6 +32,9 @@ AUCTION_WORKER_SERVICE_AUCTION_CANCELED = uuid.UUID('77568c4543e24b70a7633d87153
 AUCTION_WORKER_SERVICE_AUCTION_STATUS_CANCELED = uuid.UUID('38b2145fa25d41198493526085168bd2')
 AUCTION_WORKER_SERVICE_AUCTION_RESCHEDULE = uuid.UUID('f11bba4b55d547f1aa2e8cb2e13e4485')
 AUCTION_WORKER_SERVICE_AUCTION_NOT_FOUND = uuid.UUID('ff4a1d5cf0134bf48a458b65805c9a6e')
+AUCTION_WORKER_SERVICE_CONTEXT_STATS = uuid.UUID('ab5affa594de419f98e3fbff9c2b8997')
+AUCTION_WORKER_SERVICE_SNAPSHOT_ERROR = uuid.UUID('f26931ea2c3c4f54a73e4ed1813b9fac')
+AUCTION_WORKER_SERVICE_RESTORE_FROM_SNAPSHOT = uuid.UUID('27197f905e414a709188b368336ce9a1')
 
 AUCTION_WORKER_BIDS_LATEST_BID_CANCELLATION = uuid.UUID('c558309b45004ce2bd52ec4845e43b48')
 
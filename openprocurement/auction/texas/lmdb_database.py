@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+LMDB storage of auction documents for workers which need commits of bids to
+be local, with asynchronous replication of documents to CouchDB.
+
+Documents are written to memory mapped LMDB environment, which takes
+microseconds instead of HTTP request. Changed documents are pushed to
+CouchDB by background greenlet, only the latest version of document is
+pushed. Time since the oldest change which is not in CouchDB yet is exposed
+as replication lag.
+
+Documents which are not replicated yet are marked in 'replication_pending'
+sub-database in the same transaction as their write, so they are pushed to
+CouchDB after restart of crashed worker too.
+
+Needs 'lmdb' package, which is installed with 'lmdb' extra.
+"""
+import json
+import logging
+from time import time
+
+import gevent
+
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+from zope.interface import implementer
+
+from openprocurement.auction.utils import generate_request_id
+
+from openprocurement.auction.texas.database import (
+    CouchDB,
+    IDatabase,
+    apply_transitions_one_by_one,
+)
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_GET_DOC,
+    AUCTION_WORKER_DB_SAVE_DOC,
+    AUCTION_WORKER_DB_REPLICATION,
+    AUCTION_WORKER_DB_REPLICATION_ERROR,
+    AUCTION_WORKER_DB_TRANSITION,
+)
+from openprocurement.auction.texas.metrics import DatabaseMetrics
+from openprocurement.auction.texas.queries import INDEXES, check_index, query_rows
+from openprocurement.auction.texas.sqlite_database import next_revision
+from openprocurement.auction.texas.state import to_document
+from openprocurement.auction.texas.transitions import TRANSITIONS
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+PENDING_DB = 'replication_pending'
+
+
+@implementer(IDatabase)
+class LMDB(object):
+    """
+    This class is responsible for work with LMDB environment and its
+    replication to CouchDB
+
+    Attributes:
+        _env: LMDB environment
+        :type _env: lmdb.Environment
+        _replica: CouchDB database documents are replicated to, None if
+                  replication is not configured
+        :type _replica: openprocurement.auction.texas.database.CouchDB
+        map_size: Maximum size of environment in bytes
+        :type map_size: int
+        sync: If commits are flushed to disk. Without it the last commits
+              could be lost on crash of OS, but not of worker, and commit
+              takes microseconds
+        :type sync: bool
+        replication_interval: Interval in seconds between pushes of changed
+                              documents to CouchDB
+        :type replication_interval: float
+        metrics: Latency histograms of operations, bytes written, of
+                 replication of documents and of replication lag
+        :type metrics: openprocurement.auction.texas.metrics.DatabaseMetrics
+    """
+    _env = None
+    _pending_db = None
+    _replica = None
+    map_size = 1024 ** 3
+    sync = False
+    replication_interval = 1
+
+    def __init__(self, config):
+        if lmdb is None:
+            raise ImportError(
+                "LMDB database needs 'lmdb' package, install "
+                "openprocurement.auction.texas[lmdb]"
+            )
+        self.map_size = config.get('map_size', self.map_size)
+        self.sync = config.get('sync', self.sync)
+        self.replication_interval = config.get('replication_interval', self.replication_interval)
+        self.metrics = DatabaseMetrics()
+        self._env = lmdb.open(
+            config['LMDB_PATH'], map_size=self.map_size, sync=self.sync,
+            metasync=self.sync, subdir=True, max_dbs=1
+        )
+        self._pending_db = self._env.open_db(PENDING_DB)
+        if config.get('COUCH_DATABASE'):
+            self._replica = CouchDB(config)
+        # ids of documents which are not replicated yet mapped to time of
+        # the oldest change which is not replicated and the last revision
+        self._pending = {}
+        self._replicator = None
+        self._load_pending()
+
+    def _read(self, txn, auction_doc_id):
+        body = txn.get(str(auction_doc_id))
+        if body is None:
+            return {}
+        return json.loads(body)
+
+    def _write(self, txn, auction_document, auction_doc_id):
+        public_document = to_document(auction_document)
+        previous = self._read(txn, auction_doc_id)
+        public_document['_id'] = auction_doc_id
+        public_document.pop('_rev', None)
+        body = json.dumps(public_document, sort_keys=True)
+        public_document['_rev'] = next_revision(previous.get('_rev'), body)
+        body = json.dumps(public_document)
+        txn.put(str(auction_doc_id), body)
+        self.metrics.record('bytes_written', auction_doc_id, len(body))
+        return public_document['_rev']
+
+    def _load_pending(self):
+        """
+        Load documents which were not replicated before restart
+        """
+        if self._replica is None:
+            return
+        with self._env.begin() as txn:
+            for auction_doc_id, body in txn.cursor(db=self._pending_db):
+                self._pending[auction_doc_id] = tuple(json.loads(body))
+        if self._pending:
+            self._start_replicator()
+
+    def _start_replicator(self):
+        if self._replicator is None:
+            self._replicator = gevent.spawn(self._replicate_periodically)
+
+    def _changed(self, txn, auction_doc_id, rev):
+        """
+        Mark document as changed for replication inside of transaction
+        which writes it
+        """
+        if self._replica is None:
+            return
+        since = self._pending.get(auction_doc_id, (time(), None))[0]
+        txn.put(str(auction_doc_id), json.dumps([since, rev]), db=self._pending_db)
+        self._pending[auction_doc_id] = (since, rev)
+
+    def _replicated(self, auction_doc_id, rev, started):
+        """
+        Unmark document which is replicated with provided revision, document
+        which was changed during push stays pending since its start
+        """
+        pending_rev = self._pending[auction_doc_id][1]
+        with self._env.begin(write=True) as txn:
+            if pending_rev == rev:
+                txn.delete(str(auction_doc_id), db=self._pending_db)
+                del self._pending[auction_doc_id]
+            else:
+                txn.put(str(auction_doc_id), json.dumps([started, pending_rev]), db=self._pending_db)
+                self._pending[auction_doc_id] = (started, pending_rev)
+
+    def get_auction_document(self, auction_doc_id):
+        """
+        Retrieve auction document from LMDB environment using provided
+        identifier. Document which is missing locally is got from CouchDB
+        replica and stored.
+
+        :param auction_doc_id: identifier of document in database
+        :return: auction document object from database
+        """
+        request_id = generate_request_id()
+        with self.metrics.measure('get', auction_doc_id), self._env.begin() as txn:
+            public_document = self._read(txn, auction_doc_id)
+        if not public_document and self._replica is not None:
+            public_document = self._replica.get_auction_document(auction_doc_id)
+            if public_document:
+                with self._env.begin(write=True) as txn:
+                    txn.put(str(auction_doc_id), json.dumps(public_document))
+        if public_document:
+            LOGGER.info("Get auction document {0[_id]} with rev {0[_rev]}".format(public_document),
+                        extra={"JOURNAL_REQUEST_ID": request_id,
+                               "MESSAGE_ID": AUCTION_WORKER_DB_GET_DOC})
+        return public_document
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        """
+        Save provided auction document to LMDB environment, it is
+        replicated to CouchDB later
+
+        :param auction_document: auction document object
+        :param auction_doc_id: identifier of document in database
+        :return: id and revision of saved document
+        """
+        request_id = generate_request_id()
+        with self.metrics.measure('save', auction_doc_id), self._env.begin(write=True) as txn:
+            rev = self._write(txn, auction_document, auction_doc_id)
+            self._changed(txn, auction_doc_id, rev)
+        LOGGER.info("Saved auction document {0} with rev {1}".format(auction_doc_id, rev),
+                    extra={"JOURNAL_REQUEST_ID": request_id,
+                           "MESSAGE_ID": AUCTION_WORKER_DB_SAVE_DOC})
+        auction_document['_rev'] = rev
+        if self._pending:
+            self._start_replicator()
+        return auction_doc_id, rev
+
+    def apply_transition(self, auction_doc_id, transition, **params):
+        request_id = generate_request_id()
+        auction_document = self.get_auction_document(auction_doc_id)
+        if not auction_document:
+            return None
+        with self.metrics.measure('transition', auction_doc_id), self._env.begin(write=True) as txn:
+            # document is read again inside of write transaction, so
+            # transition is atomic
+            auction_document = self._read(txn, auction_doc_id)
+            TRANSITIONS[transition](auction_document, **params)
+            rev = self._write(txn, auction_document, auction_doc_id)
+            self._changed(txn, auction_doc_id, rev)
+        LOGGER.info("Applied transition {} to auction document {} with new rev {}".format(
+            transition, auction_doc_id, rev
+        ), extra={"JOURNAL_REQUEST_ID": request_id, "MESSAGE_ID": AUCTION_WORKER_DB_TRANSITION})
+        if self._pending:
+            self._start_replicator()
+        return rev
+
+    def apply_transitions(self, auction_doc_ids, transition, **params):
+        # local transactions take microseconds, replica gets documents in
+        # bulk anyway
+        return apply_transitions_one_by_one(self, auction_doc_ids, transition, **params)
+
+    def query_auctions(self, index, start_key=None, end_key=None, limit=100, bookmark=None):
+        """
+        Query local documents by scanning environment, it keeps documents
+        of one node only, so scan takes milliseconds
+        """
+        check_index(index)
+        rows = []
+        with self._env.begin() as txn:
+            for auction_doc_id, body in txn.cursor():
+                if auction_doc_id == PENDING_DB:
+                    # named sub-databases are keys of main database
+                    continue
+                key = INDEXES[index](json.loads(body))
+                if key is not None:
+                    rows.append((key, auction_doc_id))
+        return query_rows(rows, start_key, end_key, limit, bookmark)
+
+    def replication_lag(self):
+        """
+        Return time in seconds since the oldest change which is not
+        replicated to CouchDB yet, 0 if all changes are replicated
+        """
+        if not self._pending:
+            return 0
+        return time() - min(since for since, _ in self._pending.values())
+
+    def flush(self):
+        """
+        Push all changed documents to CouchDB
+        """
+        self.replicate()
+
+    def replicate(self):
+        """
+        Push the latest versions of changed documents to CouchDB
+        """
+        for auction_doc_id in list(self._pending):
+            started = time()
+            # lag of document is recorded on every push, so failing pushes
+            # show growing lag in statistics
+            self.metrics.record('replication_lag', auction_doc_id, started - self._pending[auction_doc_id][0])
+            with self._env.begin() as txn:
+                auction_document = self._read(txn, auction_doc_id)
+            local_rev = auction_document.pop('_rev', None)
+            # CouchDB has its own revisions, they are set by replica
+            with self.metrics.measure('replicate', auction_doc_id):
+                response = self._replica._save_auction_document(auction_document, auction_doc_id)
+            if response is None:
+                LOGGER.error("Auction document {} was not replicated, replication lag {:.3f}s".format(
+                    auction_doc_id, self.replication_lag()
+                ), extra={'MESSAGE_ID': AUCTION_WORKER_DB_REPLICATION_ERROR})
+                continue
+            self._replicated(auction_doc_id, local_rev, started)
+            LOGGER.info("Replicated auction document {} with rev {}, replication lag {:.3f}s".format(
+                auction_doc_id, local_rev, self.replication_lag()
+            ), extra={'MESSAGE_ID': AUCTION_WORKER_DB_REPLICATION})
+
+    def _replicate_periodically(self):
+        while True:
+            gevent.sleep(self.replication_interval)
+            if self._pending:
+                self.replicate()
+
+
+def lmdb_database():
+    return LMDB
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics of database operations.
+
+Every database keeps DatabaseMetrics with histograms of latency of
+operations and of bytes written and counters of retries and conflicts per
+auction document. Metrics are reported at the end of auction and could be
+got from running worker with 'database_stats' view, which is enabled with
+'DATABASE_STATS: true' in worker config.
+"""
+import math
+from contextlib import contextmanager
+from time import time
+
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_GET_DOC,
+    AUCTION_WORKER_DB_REPLICATION,
+    AUCTION_WORKER_DB_SAVE_DOC,
+    AUCTION_WORKER_DB_SAVE_DOC_CONFLICT,
+    AUCTION_WORKER_DB_SAVE_DOC_ERROR,
+    AUCTION_WORKER_DB_TRANSITION,
+)
+
+# operations mapped to MESSAGE_ID of their log records
+MESSAGE_IDS = {
+    'get': AUCTION_WORKER_DB_GET_DOC,
+    'save': AUCTION_WORKER_DB_SAVE_DOC,
+    'materialize': AUCTION_WORKER_DB_SAVE_DOC,
+    'transition': AUCTION_WORKER_DB_TRANSITION,
+    'bytes_written': AUCTION_WORKER_DB_SAVE_DOC,
+    'retries': AUCTION_WORKER_DB_SAVE_DOC_ERROR,
+    'conflicts': AUCTION_WORKER_DB_SAVE_DOC_CONFLICT,
+    'journal_append': AUCTION_WORKER_DB_SAVE_DOC,
+    'replicate': AUCTION_WORKER_DB_REPLICATION,
+    'replication_lag': AUCTION_WORKER_DB_REPLICATION,
+}
+
+
+class Histogram(object):
+    """
+    Histogram with log-linear buckets: every power of two is split into
+    SUB_BUCKETS buckets, so percentiles have relative error below
+    1 / SUB_BUCKETS whatever the scale of values is
+    """
+    SUB_BUCKETS = 16
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.zeros = 0
+        self._buckets = {}
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        mantissa, exponent = math.frexp(value)
+        index = exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def _upper_bound(self, index):
+        exponent, sub_bucket = divmod(index, self.SUB_BUCKETS)
+        return math.ldexp(0.5 + (sub_bucket + 1) / (2.0 * self.SUB_BUCKETS), exponent)
+
+    def percentile(self, percent):
+        """
+        Return value which given percent of recorded values don't exceed
+        """
+        if not self.count:
+            return 0
+        rank = percent / 100.0 * self.count
+        seen = self.zeros
+        if seen >= rank:
+            return 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / float(self.count) if self.count else 0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class DatabaseMetrics(object):
+    """
+    Collects histograms of latency in seconds of operations with database
+    and of bytes written by them and counters of retries and conflicts,
+    tagged with identifier of auction document
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+
+    def record(self, name, auction_doc_id, value):
+        key = (auction_doc_id, name)
+        if key not in self._histograms:
+            self._histograms[key] = Histogram()
+        self._histograms[key].record(value)
+
+    def increment(self, name, auction_doc_id, value=1):
+        key = (auction_doc_id, name)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def measure(self, name, auction_doc_id):
+        """
+        Record latency of operation done inside of block
+        """
+        started = time()
+        try:
+            yield
+        finally:
+            self.record(name, auction_doc_id, time() - started)
+
+    def stats(self):
+        """
+        Return dict of auction documents identifiers mapped to statistics
+        of their operations
+        """
+        stats = {}
+        for (auction_doc_id, name), histogram in self._histograms.items():
+            stats.setdefault(auction_doc_id, {})[name] = dict(
+                histogram.summary(), message_id=str(MESSAGE_IDS.get(name, ''))
+            )
+        for (auction_doc_id, name), count in self._counters.items():
+            stats.setdefault(auction_doc_id, {})[name] = {
+                'count': count, 'message_id': str(MESSAGE_IDS.get(name, ''))
+            }
+        return stats
+
+    def report(self):
+        """
+        Return statistics formatted as table, latencies are in milliseconds
+        """
+        lines = ['{:<32} {:<16} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+            'auction', 'operation', 'count', 'mean', 'p50', 'p90', 'p99', 'max'
+        )]
+        for (auction_doc_id, name), histogram in sorted(self._histograms.items()):
+            # bytes are reported as is
+            scale = 1 if name == 'bytes_written' else 1000
+            summary = histogram.summary()
+            lines.append('{:<32} {:<16} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}'.format(
+                auction_doc_id, name, summary['count'], *[
+                    summary[field] * scale for field in ('mean', 'p50', 'p90', 'p99', 'max')
+                ]
+            ))
+        for (auction_doc_id, name), count in sorted(self._counters.items()):
+            lines.append('{:<32} {:<16} {:>8}'.format(auction_doc_id, name, count))
+        return '\n'.join(lines)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Indexes of auction documents for operational queries, e.g. auctions which
+are stuck at stage -101 or start within the next hour.
+
+Every index maps auction document to key, documents without key are not
+indexed. CouchDB backend keeps indexes as map views of design document,
+other backends compute the same keys with functions from INDEXES.
+
+Query returns page of rows (key, auction_doc_id) sorted by key and
+bookmark of the next page, which is None on the last page.
+"""
+
+# stages of archived auctions don't start with the first stage, such
+# auctions have started already and are not indexed by start
+VIEWS = {
+    'current_stage': {'map': """function(doc) {
+    if (doc.current_stage !== undefined) {
+        emit(doc.current_stage, doc._id);
+    }
+}"""},
+    'start': {'map': """function(doc) {
+    if (doc.stages && doc.stages.length && doc.stages[0].start && !doc.stages_offset) {
+        emit(doc.stages[0].start, doc._id);
+    }
+}"""},
+    'end_date': {'map': """function(doc) {
+    if (doc.endDate) {
+        emit(doc.endDate, doc._id);
+    }
+}"""},
+    # procurement method type is kept in header document if it is split
+    'procurement_method_type': {'map': """function(doc) {
+    if (doc.procurementMethodType) {
+        emit(doc.procurementMethodType, doc._id.replace(/_header$/, ''));
+    }
+}"""},
+}
+
+
+def _start(auction_document):
+    stages = auction_document.get('stages')
+    if stages and not auction_document.get('stages_offset'):
+        return stages[0].get('start')
+
+
+INDEXES = {
+    'current_stage': lambda auction_document: auction_document.get('current_stage'),
+    'start': _start,
+    'end_date': lambda auction_document: auction_document.get('endDate') or None,
+    'procurement_method_type': lambda auction_document: auction_document.get('procurementMethodType') or None,
+}
+
+
+def check_index(index):
+    if index not in INDEXES:
+        raise AttributeError(
+            'There is no index {}. Available indexes {}'.format(index, INDEXES.keys())
+        )
+
+
+def index_keys(auction_document):
+    """
+    Return dict of indexes which document is in mapped to its keys
+    """
+    keys = {}
+    for index, key in INDEXES.items():
+        value = key(auction_document)
+        if value is not None:
+            keys[index] = value
+    return keys
+
+
+def query_rows(rows, start_key=None, end_key=None, limit=100, bookmark=None):
+    """
+    Return page of rows and bookmark of the next page, for databases which
+    scan documents
+
+    :param rows: iterable of rows (key, auction_doc_id)
+    :param start_key: the least key of rows, ignored with bookmark
+    :param end_key: the greatest key of rows
+    :param limit: maximum number of rows in page
+    :param bookmark: bookmark of page returned by previous query
+    """
+    if bookmark:
+        lower = tuple(bookmark)
+    elif start_key is not None:
+        lower = (start_key, '')
+    else:
+        lower = None
+    selected = [
+        row for row in sorted(rows)
+        if (lower is None or row >= lower) and (end_key is None or row[0] <= end_key)
+    ]
+    if len(selected) > limit:
+        return selected[:limit], list(selected[limit])
+    return selected, None
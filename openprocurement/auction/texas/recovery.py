@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Crash-safe snapshots of AuctionWorker context.
+
+Snapshotter periodically writes state of auction kept in context to a local
+file, so worker restarted in the middle of auction could restore it without
+requesting auction data from API. Snapshot is written to temporary file,
+synced to disk and renamed over previous one, so the file always contains
+either previous or new complete snapshot.
+
+Snapshot keeps revision of the last successful save of auction document
+('saved_rev'), restarted worker uses snapshot only if auction document in
+database still has this revision.
+"""
+import json
+import logging
+import os
+
+import gevent
+
+from openprocurement.auction.texas.bidders import BidderRegistry
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_SERVICE_SNAPSHOT_ERROR
+)
+from openprocurement.auction.texas.state import to_document
+
+LOGGER = logging.getLogger('Auction Worker Texas')
+
+SNAPSHOT_FIELDS = (
+    'auction_document',
+    'auction_data',
+    'auction_protocol',
+    'bidders_data',
+    'bids_mapping',
+    'bidder_registry',
+    'saved_rev',
+)
+
+
+def snapshot_document(value):
+    # registry of bidders is not a record, it dumps itself
+    if isinstance(value, BidderRegistry):
+        return value.to_document()
+    return to_document(value)
+
+
+class ContextSnapshotter(object):
+    """
+    Writes snapshots of context fields to the file
+
+    Attributes:
+        path: path to snapshot file
+        :type path: str
+        interval: interval in seconds between checks of context changes
+        :type interval: float
+        fields: names of context fields which are written to snapshot
+        :type fields: tuple
+    """
+    interval = 1
+    fields = SNAPSHOT_FIELDS
+
+    def __init__(self, context, path, interval=None, fields=None):
+        self.context = context
+        self.path = path
+        if interval is not None:
+            self.interval = interval
+        if fields is not None:
+            self.fields = tuple(fields)
+        self._versions = {}
+        self._greenlet = None
+
+    def dump(self):
+        """
+        Write snapshot if any of fields was stored to context since the last
+        snapshot
+
+        :return: True if snapshot was written
+        """
+        versions = dict((field, self.context.version(field)) for field in self.fields)
+        if versions == self._versions:
+            return False
+        snapshot = dict(
+            (field, snapshot_document(self.context.get(field)))
+            for field in self.fields
+        )
+        write_atomic(self.path, json.dumps(snapshot, separators=(',', ':')))
+        self._versions = versions
+        return True
+
+    def load(self):
+        """
+        Read the last written snapshot
+
+        :return: dictionary with snapshotted fields or None if there is no
+                 complete snapshot
+        """
+        try:
+            with open(self.path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (IOError, ValueError):
+            return None
+        if not all(snapshot.get(field) is not None for field in self.fields):
+            return None
+        return snapshot
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def start(self):
+        if self._greenlet is None:
+            self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill()
+            self._greenlet = None
+
+    def _run(self):
+        while True:
+            try:
+                self.dump()
+            except (IOError, OSError, TypeError, ValueError) as e:
+                LOGGER.error('Unable to write context snapshot: {}'.format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_SERVICE_SNAPSHOT_ERROR})
+            gevent.sleep(self.interval)
+
+
+def write_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, '.{}.tmp'.format(os.path.basename(path)))
+    with open(tmp_path, 'wb') as tmp_file:
+        tmp_file.write(data)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.rename(tmp_path, path)
+    # make rename itself durable
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+def prepare_snapshotter(context, config, auction_doc_id):
+    """
+    Create snapshotter from 'recovery' section of worker config or return
+    None if snapshots are not configured
+    """
+    if not config or not config.get('directory'):
+        return None
+    return ContextSnapshotter(
+        context,
+        os.path.join(config['directory'], '{}.json'.format(auction_doc_id)),
+        interval=config.get('interval'),
+    )
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policy for requests to database.
+
+Delay between attempts grows exponentially and is randomized, so workers
+which failed at the same moment don't retry at the same moment. Attempts
+stop after given number of retries or when deadline of the whole operation
+would be exceeded. Circuit breaker, which is shared by all requests of
+database object, stops requests at all for a while after many consecutive
+failures, so recovering database isn't flooded with retries.
+"""
+import logging
+from random import random
+from time import time
+
+import gevent
+
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_CIRCUIT_OPEN
+)
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+
+class CircuitBreaker(object):
+    """
+    Opens after failure_threshold consecutive failures. Requests are not
+    allowed while it is open, after reset_timeout requests are allowed again
+    and the first success closes it, the next failure opens it again.
+
+    Attributes:
+        failure_threshold: number of consecutive failures which opens breaker
+        :type failure_threshold: int
+        reset_timeout: time in seconds breaker stays open
+        :type reset_timeout: float
+    """
+
+    def __init__(self, failure_threshold=20, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None and time() - self.opened_at < self.reset_timeout
+
+    def allow(self):
+        return not self.is_open
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time()
+
+
+class RetryPolicy(object):
+    """
+    Policy of retrying requests with exponential backoff and jitter
+
+    Usage:
+        for attempt in policy.attempts():
+            try:
+                response = request()
+            except Error:
+                policy.breaker.failure()
+            else:
+                policy.breaker.success()
+                return response
+
+    Attributes:
+        retries: maximum number of attempts
+        :type retries: int
+        base_delay: delay in seconds before the first retry
+        :type base_delay: float
+        multiplier: factor delay grows with on every retry
+        :type multiplier: float
+        max_delay: maximum delay in seconds between attempts
+        :type max_delay: float
+        jitter: part of delay which is randomized, from 0 to 1
+        :type jitter: float
+        deadline: time in seconds after which no more attempts are made
+        :type deadline: float
+        breaker: circuit breaker shared by all requests
+        :type breaker: CircuitBreaker
+    """
+
+    def __init__(self, retries=10, base_delay=0.1, multiplier=2, max_delay=5,
+                 jitter=0.5, deadline=60, breaker=None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+
+    @classmethod
+    def from_config(cls, config, retries=10):
+        """
+        Build policy from 'retry' section of database config
+
+        :param config: dict with attributes of policy and of circuit breaker
+        :param retries: number of attempts if it is not configured
+        """
+        config = dict(config)
+        breaker = CircuitBreaker(
+            failure_threshold=config.pop('failure_threshold', 20),
+            reset_timeout=config.pop('reset_timeout', 30)
+        )
+        config.setdefault('retries', retries)
+        return cls(breaker=breaker, **config)
+
+    def delay(self, attempt):
+        """
+        Return delay in seconds before given attempt, attempts are counted
+        from 0
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random())
+
+    def attempts(self):
+        """
+        Yield numbers of attempts, sleeping between them. Stops when
+        attempts are over, deadline would be exceeded or circuit breaker is
+        open.
+        """
+        started = time()
+        for attempt in range(self.retries):
+            if attempt:
+                delay = self.delay(attempt)
+                if time() - started + delay > self.deadline:
+                    return
+                gevent.sleep(delay)
+            if not self.breaker.allow():
+                LOGGER.warning("Circuit breaker is open after {} failures, request to database is skipped".format(
+                    self.breaker.failures
+                ), extra={'MESSAGE_ID': AUCTION_WORKER_DB_CIRCUIT_OPEN})
+                return
+            yield attempt
@@ -20,8 +20,10 @@ from openprocurement.auction.texas.constants import (
     END
 )
 from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_METRICS,
     AUCTION_WORKER_SERVICE_START_NEXT_STAGE,
-    AUCTION_WORKER_SERVICE_END_AUCTION
+    AUCTION_WORKER_SERVICE_END_AUCTION,
+    AUCTION_WORKER_SERVICE_CONTEXT_STATS
 )
 from openprocurement.auction.texas.context import IContext
 from openprocurement.auction.texas.database import IDatabase
@@ -29,6 +31,7 @@ from openprocurement.auction.texas.datasource import IDataSource
 from openprocurement.auction.texas.utils import (
     lock_server,
     update_auction_document,
+    apply_transition,
     prepare_end_stage,
     approve_auction_protocol_info_on_announcement,
     approve_auction_protocol_info)
@@ -77,11 +80,10 @@ class JobService(object):
         request_id = generate_request_id()
 
         with lock_server(self.context['server_actions']):
-            with update_auction_document(self.context, self.database) as auction_document:
-                auction_document["current_stage"] += 1
+            apply_transition(self.context, self.database, 'increment_stage')
 
         LOGGER.info('---------------- Start stage {0} ----------------'.format(
-            self.context['auction_document']["current_stage"]),
+            self.context.view('auction_document')["current_stage"]),
             extra={"JOURNAL_REQUEST_ID": request_id,
                    "MESSAGE_ID": AUCTION_WORKER_SERVICE_START_NEXT_STAGE}
         )
@@ -114,17 +116,17 @@ class JobService(object):
             auction_document['endDate'] = auction_end.isoformat()
 
         auction_protocol = approve_auction_protocol_info(
-            self.context['auction_document'], self.context['auction_protocol']
+            self.context.view('auction_document'), self.context['auction_protocol']
         )
         auction_protocol = approve_auction_protocol_info_on_announcement(
-            self.context['auction_document'], auction_protocol
+            self.context.view('auction_document'), auction_protocol
         )
         self.context['auction_protocol'] = auction_protocol
         LOGGER.info(
-            'Audit data: \n {}'.format(yaml_dump(self.context['auction_protocol'])),
+            'Audit data: \n {}'.format(yaml_dump(auction_protocol)),
             extra={"JOURNAL_REQUEST_ID": request_id}
         )
-        LOGGER.info(self.context['auction_protocol'])
+        LOGGER.info(auction_protocol)
 
         result = self.datasource.update_source_object(
             self.context['auction_data'], self.context['auction_document'], self.context['auction_protocol']
@@ -133,6 +135,24 @@ class JobService(object):
             if isinstance(result, dict):
                 self.context['auction_document'] = result
             self.database.save_auction_document(self.context['auction_document'], self.context['auction_doc_id'])
+        # make sure that final state of auction is written before worker stops
+        self.database.flush()
+
+        profiler = getattr(self.context, 'profiler', None)
+        if profiler is not None:
+            LOGGER.info(
+                'Context access statistics: \n{}'.format(profiler.report()),
+                extra={"JOURNAL_REQUEST_ID": request_id,
+                       "MESSAGE_ID": AUCTION_WORKER_SERVICE_CONTEXT_STATS}
+            )
+
+        metrics = getattr(self.database, 'metrics', None)
+        if metrics is not None:
+            LOGGER.info(
+                'Database operations statistics: \n{}'.format(metrics.report()),
+                extra={"JOURNAL_REQUEST_ID": request_id,
+                       "MESSAGE_ID": AUCTION_WORKER_DB_METRICS}
+            )
 
         self.context['end_auction_event'].set()
 
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+JSON codecs used by couchdb-python for requests to CouchDB.
+
+Encoders understand records, frozen and copy-on-write containers, so
+auction document is encoded straight from the structure worker keeps in
+context, without turning it into plain document first.
+"""
+import json
+
+from couchdb import json as couchdb_json
+from gevent.local import local
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+from openprocurement.auction.texas.structures import Record
+
+# size of the last body encoded in greenlet, requests encode body in
+# greenlet which makes them, so size is read after request by its greenlet
+_encoded = local()
+
+
+def encode_default(value):
+    """
+    Return JSON serializable version of value which encoder doesn't know
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def encoded_size():
+    """
+    Return size in bytes of the last body encoded by codec in current
+    greenlet
+    """
+    return getattr(_encoded, 'size', 0)
+
+
+def _measured(encode):
+    def measured_encode(value):
+        body = encode(value)
+        _encoded.size = len(body)
+        return body
+    return measured_encode
+
+
+def _json_codec():
+    # standard library can't join unicode with non-ASCII byte strings, like
+    # bidder labels, when ensure_ascii is off
+    encoder = json.JSONEncoder(default=encode_default, allow_nan=False, ensure_ascii=True)
+    return encoder.encode, json.loads
+
+
+def _simplejson_codec():
+    if simplejson is None:
+        raise ImportError("'simplejson' codec needs 'simplejson' package")
+    encoder = simplejson.JSONEncoder(default=encode_default, allow_nan=False, ensure_ascii=False)
+    return encoder.encode, simplejson.loads
+
+
+CODECS = {
+    'json': _json_codec,
+    'simplejson': _simplejson_codec,
+}
+
+
+def use_codec(name):
+    """
+    Make couchdb-python use codec with given name for all requests of the
+    process. Codec is global, the last installed one is used by every
+    database, so it is installed once on start of worker
+
+    :param name: name of codec from CODECS
+    """
+    if name not in CODECS:
+        raise AttributeError(
+            'There is no JSON codec {}. Available codecs {}'.format(name, CODECS.keys())
+        )
+    encode, decode = CODECS[name]()
+    couchdb_json.use(decode=decode, encode=_measured(encode))
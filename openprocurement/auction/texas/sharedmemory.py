@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Context which publishes serialized auction state into memory mapped file,
+so other processes (e.g. additional WSGI processes serving spectators) could
+read live state of auction without IPC round trips or database requests.
+
+File starts with a header followed by JSON payload:
+
+    magic (8 bytes) | sequence (uint64) | payload length (uint64) | payload
+
+Writer uses sequence as a seqlock: it is odd while payload is being written
+and even when payload is consistent. Readers retry reading until they get
+the same even sequence before and after copying the payload.
+
+Every auction is published to its own file '<directory>/<auction id>.shm',
+so workers started with the same context config don't share files.
+"""
+import json
+import mmap
+import os
+import struct
+
+import gevent
+
+from zope.interface import implementer
+
+from openprocurement.auction.texas.context import (
+    ContextException,
+    IContext,
+    SnapshotContext,
+)
+from openprocurement.auction.texas.state import to_document
+from openprocurement.auction.texas.structures import draft, freeze, read_only
+
+
+HEADER = struct.Struct('<8sQQ')
+MAGIC = 'OPTXSHM1'
+DEFAULT_SIZE = 1024 * 1024
+
+
+class SharedMemoryException(Exception):
+    pass
+
+
+def shared_memory_path(config):
+    """
+    Return path to memory mapped file of auction from context config
+    """
+    return os.path.join(config['directory'], '{}.shm'.format(config['auction_id']))
+
+
+class SharedMemoryPublisher(object):
+    """
+    Writer side of memory mapped file
+    """
+
+    def __init__(self, path, size=DEFAULT_SIZE):
+        self.path = path
+        # file of previous publisher is never truncated, readers could still
+        # have it mapped and would get SIGBUS reading beyond its end
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        existing_size = os.fstat(self._fd).st_size
+        size = max(existing_size, HEADER.size + size)
+        if size > existing_size:
+            os.ftruncate(self._fd, size)
+        self._mmap = mmap.mmap(self._fd, size)
+        magic, sequence, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._sequence = 0
+            HEADER.pack_into(self._mmap, 0, MAGIC, self._sequence, 0)
+        else:
+            # sequence continues, so versions only grow for readers waiting
+            # for change. Odd sequence of interrupted write stays until the
+            # next publish completes it
+            self._sequence = sequence - sequence % 2
+
+    @property
+    def version(self):
+        return self._sequence // 2
+
+    def publish(self, payload):
+        # odd sequence tells readers that payload is being changed
+        self._sequence += 1
+        HEADER.pack_into(self._mmap, 0, MAGIC, self._sequence, 0)
+        if HEADER.size + len(payload) > len(self._mmap):
+            self._resize(2 * (HEADER.size + len(payload)))
+        self._mmap[HEADER.size:HEADER.size + len(payload)] = payload
+        self._sequence += 1
+        HEADER.pack_into(self._mmap, 0, MAGIC, self._sequence, len(payload))
+        return self.version
+
+    def _resize(self, size):
+        os.ftruncate(self._fd, size)
+        self._mmap.resize(size)
+
+    def close(self):
+        self._mmap.close()
+        os.close(self._fd)
+
+
+class SharedMemoryReader(object):
+    """
+    Reader side of memory mapped file
+
+    Attributes:
+        retries: number of attempts to read consistent state
+        :type retries: int
+        open_retries: number of checks if file created by publisher has
+                      header already
+        :type open_retries: int
+        open_interval: interval in seconds between these checks
+        :type open_interval: float
+    """
+    retries = 1000
+    open_retries = 100
+    open_interval = 0.01
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        self._mmap = None
+        try:
+            self._wait_for_header()
+        except SharedMemoryException:
+            os.close(self._fd)
+            raise
+
+    def _wait_for_header(self):
+        # publisher could be creating the file right now, so it could be
+        # empty or have header which is not written yet
+        for _ in xrange(self.open_retries):
+            if os.fstat(self._fd).st_size >= HEADER.size:
+                self._map()
+                magic = HEADER.unpack_from(self._mmap, 0)[0]
+                if magic == MAGIC:
+                    return
+                if magic.strip('\0'):
+                    raise SharedMemoryException('{} is not auction shared memory file'.format(self.path))
+            gevent.sleep(self.open_interval)
+        raise SharedMemoryException('{} is not initialized by publisher'.format(self.path))
+
+    def _map(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._fd, os.fstat(self._fd).st_size, access=mmap.ACCESS_READ)
+
+    @property
+    def version(self):
+        return HEADER.unpack_from(self._mmap, 0)[1] // 2
+
+    def read(self):
+        """
+        Return version and payload of consistent state of memory mapped file
+        """
+        for _ in xrange(self.retries):
+            _, sequence, length = HEADER.unpack_from(self._mmap, 0)
+            if sequence % 2:
+                gevent.sleep(0)
+                continue
+            if HEADER.size + length > len(self._mmap):
+                # writer has grown the file
+                self._map()
+                continue
+            payload = self._mmap[HEADER.size:HEADER.size + length]
+            if HEADER.unpack_from(self._mmap, 0)[1] == sequence:
+                return sequence // 2, payload
+        raise SharedMemoryException('Unable to read consistent state of {}'.format(self.path))
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        os.close(self._fd)
+
+
+@implementer(IContext)
+class SharedMemoryContext(SnapshotContext):
+    """
+    Implementation of AuctionWorker context which additionally publishes
+    serialized snapshots of published fields into memory mapped file every
+    time any of them is stored
+
+    Config:
+    directory: directory of memory mapped files of auctions
+    auction_id: id of auction, which names the file
+    size: initial size of payload area in bytes, the file grows if needed
+    published_fields: fields of context which are published
+    """
+    published_fields = ('auction_document', 'bids_mapping')
+
+    def __init__(self, config):
+        super(SharedMemoryContext, self).__init__(config)
+        self.published_fields = tuple(config.get('published_fields', self.published_fields))
+        self.publisher = SharedMemoryPublisher(shared_memory_path(config), config.get('size', DEFAULT_SIZE))
+
+    def __setitem__(self, key, value):
+        super(SharedMemoryContext, self).__setitem__(key, value)
+        if key in self.published_fields:
+            self.publish()
+
+    def publish(self):
+        state = dict(
+            (field, to_document(self._mapping[field]))
+            for field in self.published_fields if field in self._mapping
+        )
+        return self.publisher.publish(json.dumps(state, separators=(',', ':')))
+
+
+@implementer(IContext)
+class SharedMemoryReaderContext(object):
+    """
+    Read-only implementation of AuctionWorker context for processes which
+    read state published by SharedMemoryContext of auction worker
+
+    Config:
+    directory: directory of memory mapped files of auctions
+    auction_id: id of auction which is read
+    poll_interval: interval in seconds between checks of file while waiting
+    for changes
+    """
+    profiler = None
+    poll_interval = 0.1
+
+    def __init__(self, config):
+        self.reader = SharedMemoryReader(shared_memory_path(config))
+        self.poll_interval = config.get('poll_interval', self.poll_interval)
+        self._version = -1
+        self._mapping = {}
+
+    def _refresh(self):
+        if self.reader.version != self._version:
+            self._version, payload = self.reader.read()
+            self._mapping = freeze(json.loads(payload))
+        return self._mapping
+
+    def __getitem__(self, key):
+        return draft(self._refresh()[key])
+
+    def __setitem__(self, key, value):
+        raise ContextException('Context {} is read-only'.format(type(self).__name__))
+
+    def get(self, key, default=None):
+        return draft(self._refresh().get(key, default))
+
+    def view(self, key, default=None):
+        return read_only(self._refresh().get(key, default))
+
+    def version(self, key):
+        # all fields are published together, so they share version
+        return self.reader.version
+
+    def wait_for_change(self, key, version, timeout=None):
+        waited = 0
+        while self.version(key) <= version:
+            if timeout is not None and waited >= timeout:
+                break
+            gevent.sleep(self.poll_interval)
+            waited += self.poll_interval
+        return self.version(key)
+
+
+def shared_memory_context():
+    return SharedMemoryContext
+
+
+def shared_memory_reader_context():
+    return SharedMemoryReaderContext
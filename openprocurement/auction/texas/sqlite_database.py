@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite storage of auction documents for local runs, benchmarks and single
+node deployments, which don't have CouchDB server.
+
+Documents are kept as JSON in one table with revisions in CouchDB format
+'<generation>-<md5 of document>'. Database works in WAL journal mode, so
+readers, e.g. frontend or another worker, don't block writer. Keys of
+documents in indexes from openprocurement.auction.texas.queries are kept in
+another table, which is updated in the same transaction as document.
+"""
+import json
+import logging
+import sqlite3
+from hashlib import md5
+
+import gevent
+from zope.interface import implementer
+
+from openprocurement.auction.utils import generate_request_id
+
+from openprocurement.auction.texas.database import IDatabase
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_GET_DOC,
+    AUCTION_WORKER_DB_GET_DOC_ERROR,
+    AUCTION_WORKER_DB_SAVE_DOC,
+    AUCTION_WORKER_DB_SAVE_DOC_ERROR,
+    AUCTION_WORKER_DB_TRANSITION,
+    AUCTION_WORKER_DB_TRANSITION_ERROR,
+)
+from openprocurement.auction.texas.metrics import DatabaseMetrics
+from openprocurement.auction.texas.queries import check_index, index_keys
+from openprocurement.auction.texas.state import to_document
+from openprocurement.auction.texas.transitions import TRANSITIONS
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS auction_documents (
+    id TEXT PRIMARY KEY,
+    rev TEXT NOT NULL,
+    body TEXT NOT NULL
+)
+"""
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS auction_index (
+    name TEXT NOT NULL,
+    key NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (name, key, id)
+)
+"""
+
+
+def next_revision(rev, body):
+    generation = int(rev.split('-', 1)[0]) if rev else 0
+    return '{}-{}'.format(generation + 1, md5(body).hexdigest())
+
+
+@implementer(IDatabase)
+class SQLite(object):
+    """
+    This class is responsible for work with SQLite database
+
+    Requests are blocking, but they take microseconds for local file, so
+    they are made right from greenlets. Database locked by another process
+    is waited for with short busy timeout, which blocks the whole process,
+    and requests are retried after gevent.sleep, so other greenlets run
+    while lock is held.
+
+    Attributes:
+        _connection: connection to SQLite database
+        :type _connection: sqlite3.Connection
+        db_request_retries: Number of retries of database requesting in case
+                            database is locked by another process
+        :type db_request_retries: int
+        retry_delay: Time in seconds to sleep between retries
+        :type retry_delay: float
+        timeout: Time in seconds SQLite waits for lock of database blocking
+                 the whole process
+        :type timeout: float
+        synchronous: Value of 'synchronous' pragma. NORMAL doesn't lose
+                     consistency in WAL mode, but could lose the last
+                     transactions on power loss
+        :type synchronous: str
+        metrics: Latency histograms of operations and bytes written
+        :type metrics: openprocurement.auction.texas.metrics.DatabaseMetrics
+    """
+    _connection = None
+    db_request_retries = 10
+    retry_delay = 0.1
+    timeout = 0.05
+    synchronous = 'NORMAL'
+
+    def __init__(self, config):
+        self.timeout = config.get('timeout', self.timeout)
+        self.retry_delay = config.get('retry_delay', self.retry_delay)
+        self.synchronous = config.get('synchronous', self.synchronous)
+        self.metrics = DatabaseMetrics()
+        # transactions are started explicitly, see _transaction
+        self._connection = sqlite3.connect(
+            config['SQLITE_DATABASE'], timeout=self.timeout,
+            isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous={}'.format(self.synchronous))
+        self._connection.execute(SCHEMA)
+        self._connection.execute(INDEX_SCHEMA)
+        self._transaction(self._build_index)
+
+    def _index(self, public_document, auction_doc_id):
+        self._connection.execute('DELETE FROM auction_index WHERE id = ?', (auction_doc_id,))
+        self._connection.executemany(
+            'INSERT INTO auction_index (name, key, id) VALUES (?, ?, ?)',
+            [(index, key, auction_doc_id) for index, key in index_keys(public_document).items()]
+        )
+
+    def _build_index(self):
+        """
+        Index documents written before index table existed
+        """
+        if self._connection.execute('SELECT 1 FROM auction_index LIMIT 1').fetchone():
+            return
+        for auction_doc_id, body in self._connection.execute('SELECT id, body FROM auction_documents').fetchall():
+            self._index(json.loads(body), auction_doc_id)
+
+    def _read(self, auction_doc_id):
+        row = self._connection.execute(
+            'SELECT rev, body FROM auction_documents WHERE id = ?', (auction_doc_id,)
+        ).fetchone()
+        if row is None:
+            return {}
+        auction_document = json.loads(row[1])
+        auction_document['_id'] = auction_doc_id
+        auction_document['_rev'] = str(row[0])
+        return auction_document
+
+    def _write(self, auction_document, auction_doc_id):
+        """
+        Write document over the stored one and return its new revision.
+        Has to be called inside of transaction.
+        """
+        public_document = to_document(auction_document)
+        public_document.pop('_id', None)
+        public_document.pop('_rev', None)
+        body = json.dumps(public_document, sort_keys=True)
+        row = self._connection.execute(
+            'SELECT rev FROM auction_documents WHERE id = ?', (auction_doc_id,)
+        ).fetchone()
+        rev = next_revision(row and row[0], body)
+        self._connection.execute(
+            'INSERT OR REPLACE INTO auction_documents (id, rev, body) VALUES (?, ?, ?)',
+            (auction_doc_id, rev, body)
+        )
+        self.metrics.record('bytes_written', auction_doc_id, len(body))
+        self._index(public_document, auction_doc_id)
+        return rev
+
+    def _transaction(self, function, *args):
+        """
+        Call function in write transaction, which is retried if database is
+        locked
+        """
+        retries = self.db_request_retries
+        while retries:
+            try:
+                # IMMEDIATE takes write lock at once, so read and write
+                # of document can't interleave with other writer
+                self._connection.execute('BEGIN IMMEDIATE')
+                try:
+                    result = function(*args)
+                    self._connection.execute('COMMIT')
+                    return result
+                except Exception:
+                    # failed COMMIT leaves transaction open too
+                    self._rollback()
+                    raise
+            except sqlite3.OperationalError, e:
+                LOGGER.error("Error while write document: {}".format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_ERROR})
+            retries -= 1
+            if retries:
+                gevent.sleep(self.retry_delay)
+
+    def _rollback(self):
+        try:
+            self._connection.execute('ROLLBACK')
+        except sqlite3.OperationalError, e:
+            # transaction could be rolled back by SQLite already
+            LOGGER.warning("Error while rollback transaction: {}".format(e),
+                           extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_ERROR})
+
+    def get_auction_document(self, auction_doc_id):
+        """
+        Retrieve auction document from SQLite database using provided identifier
+
+        :param auction_doc_id: identifier of document in database
+        :return: auction document object from database
+        """
+        request_id = generate_request_id()
+        retries = self.db_request_retries
+        while retries:
+            try:
+                with self.metrics.measure('get', auction_doc_id):
+                    public_document = self._read(auction_doc_id)
+                if public_document:
+                    LOGGER.info("Get auction document {0[_id]} with rev {0[_rev]}".format(public_document),
+                                extra={"JOURNAL_REQUEST_ID": request_id,
+                                       "MESSAGE_ID": AUCTION_WORKER_DB_GET_DOC})
+                return public_document
+            except sqlite3.OperationalError, e:
+                LOGGER.error("Error while get document: {}".format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_GET_DOC_ERROR})
+            retries -= 1
+            if retries:
+                gevent.sleep(self.retry_delay)
+        return {}
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        """
+        Save provided auction document to SQLite database. Like CouchDB
+        backend, stored document is overwritten whatever its revision is.
+
+        :param auction_document: auction document object
+        :param auction_doc_id: identifier of document in database
+        :return: id and revision of saved document
+        """
+        request_id = generate_request_id()
+        with self.metrics.measure('save', auction_doc_id):
+            rev = self._transaction(self._write, auction_document, auction_doc_id)
+        if rev is None:
+            return None
+        LOGGER.info("Saved auction document {0} with rev {1}".format(auction_doc_id, rev),
+                    extra={"JOURNAL_REQUEST_ID": request_id,
+                           "MESSAGE_ID": AUCTION_WORKER_DB_SAVE_DOC})
+        auction_document['_rev'] = rev
+        return auction_doc_id, rev
+
+    def flush(self):
+        # every save is committed before it returns
+        pass
+
+    def query_auctions(self, index, start_key=None, end_key=None, limit=100, bookmark=None):
+        check_index(index)
+        query = 'SELECT key, id FROM auction_index WHERE name = ?'
+        params = [index]
+        if bookmark:
+            query += ' AND (key > ? OR key = ? AND id >= ?)'
+            params += [bookmark[0], bookmark[0], bookmark[1]]
+        elif start_key is not None:
+            query += ' AND key >= ?'
+            params.append(start_key)
+        if end_key is not None:
+            query += ' AND key <= ?'
+            params.append(end_key)
+        # one more row is selected, it starts the next page
+        query += ' ORDER BY key, id LIMIT ?'
+        params.append(limit + 1)
+        rows = [tuple(row) for row in self._connection.execute(query, params).fetchall()]
+        if len(rows) > limit:
+            return rows[:limit], list(rows[limit])
+        return rows, None
+
+    def _apply_transition(self, auction_doc_id, transition, params):
+        auction_document = self._read(auction_doc_id)
+        if not auction_document:
+            return None
+        TRANSITIONS[transition](auction_document, **params)
+        return self._write(auction_document, auction_doc_id)
+
+    def _apply_transitions(self, auction_doc_ids, transition, params):
+        return dict(
+            (auction_doc_id, self._apply_transition(auction_doc_id, transition, params))
+            for auction_doc_id in auction_doc_ids
+        )
+
+    def apply_transitions(self, auction_doc_ids, transition, **params):
+        """
+        Apply transition to all documents in one transaction
+        """
+        request_id = generate_request_id()
+        revisions = self._transaction(self._apply_transitions, auction_doc_ids, transition, params)
+        if revisions is None:
+            LOGGER.error("Transition {} was not applied to auction documents".format(transition),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+            return dict.fromkeys(auction_doc_ids)
+        LOGGER.info("Applied transition {} to {} of {} auction documents".format(
+            transition, len([rev for rev in revisions.values() if rev]), len(revisions)
+        ), extra={"JOURNAL_REQUEST_ID": request_id, "MESSAGE_ID": AUCTION_WORKER_DB_TRANSITION})
+        return revisions
+
+    def apply_transition(self, auction_doc_id, transition, **params):
+        request_id = generate_request_id()
+        with self.metrics.measure('transition', auction_doc_id):
+            rev = self._transaction(self._apply_transition, auction_doc_id, transition, params)
+        if rev is None:
+            LOGGER.error("Transition {} was not applied to auction document {}".format(transition, auction_doc_id),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_TRANSITION_ERROR})
+            return None
+        LOGGER.info("Applied transition {} to auction document {} with new rev {}".format(
+            transition, auction_doc_id, rev
+        ), extra={"JOURNAL_REQUEST_ID": request_id, "MESSAGE_ID": AUCTION_WORKER_DB_TRANSITION})
+        return rev
+
+
+def sqlite_database():
+    return SQLite
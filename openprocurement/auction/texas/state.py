@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Compact in-memory representation of auction document.
+
+Stages, results and initial bids of long auctions are the biggest and the
+most numerous parts of auction document, so they are kept as slotted
+records with labels shared through interned table instead of separate
+dictionaries. Records behave like dictionaries for the rest of the worker
+and are turned back into plain JSON structure only when the document is
+persisted.
+"""
+from openprocurement.auction.texas.structures import FrozenDict, Record
+
+
+class StageRecord(Record):
+    """
+    Stage of auction: pause, main round (with bid if it was made) or
+    announcement
+    """
+    __slots__ = fields = ('start', 'type', 'amount', 'time', 'bidder_id', 'label')
+
+
+class ResultRecord(Record):
+    """
+    Bid of bidder in results and initial bids of auction
+    """
+    __slots__ = fields = ('bidder_id', 'time', 'amount', 'label')
+
+
+class BidderLabels(object):
+    """
+    Interned table of read-only multilingual bidder labels. Every bidder has
+    only one label object shared between all stages and results.
+    """
+    templates = {
+        'en': "Bidder #{}",
+        'uk': "Учасник №{}",
+        'ru': "Участник №{}",
+    }
+
+    def __init__(self):
+        self._labels = {}
+
+    def __getitem__(self, bidder_name):
+        label = self._labels.get(bidder_name)
+        if label is None:
+            label = self._labels[bidder_name] = FrozenDict(
+                (lang, template.format(bidder_name))
+                for lang, template in self.templates.items()
+            )
+        return label
+
+    def __len__(self):
+        return len(self._labels)
+
+
+LABELS = BidderLabels()
+
+
+class AuctionState(dict):
+    """
+    Auction document which keeps stages, results and initial bids as
+    records. Use to_document to get plain structure of auction document
+    which is stored in database.
+    """
+    __slots__ = ()
+
+    record_fields = {
+        'stages': StageRecord,
+        'results': ResultRecord,
+        'initial_bids': ResultRecord,
+    }
+
+    @classmethod
+    def from_document(cls, auction_document):
+        state = cls(auction_document)
+        for field, record_class in cls.record_fields.items():
+            if field in state:
+                state[field] = [
+                    record_class.from_mapping(item) for item in state[field]
+                ]
+        return state
+
+    def to_document(self):
+        return to_document(self)
+
+
+def to_document(value):
+    """
+    Return copy of value with records turned into dictionaries and all
+    containers turned into builtin ones, ready to be serialized to JSON
+    """
+    if isinstance(value, dict):
+        return dict(
+            (key, to_document(item)) for key, item in dict.iteritems(value)
+        )
+    if isinstance(value, Record):
+        return dict((key, to_document(item)) for key, item in value.iteritems())
+    if isinstance(value, (list, tuple)):
+        return [to_document(item) for item in _iter_raw(value)]
+    return value
+
+
+def _iter_raw(sequence):
+    if isinstance(sequence, list):
+        return list.__iter__(sequence)
+    return iter(sequence)
@@ -0,0 +1,560 @@
+# -*- coding: utf-8 -*-
+"""
+Immutable and copy-on-write containers used for sharing auction data
+between AuctionWorker components without deep copying it on every access.
+
+Frozen containers are shared snapshots: they are never changed after
+creation, so any number of readers can hold them at once. Writers get a
+draft of a snapshot: a shallow copy which thaws nested containers only when
+they are actually accessed, so unchanged parts of the tree are shared
+between the old and the new version of the data.
+"""
+import sys
+from copy import deepcopy
+
+from yaml import SafeDumper
+
+
+class ReadOnlyError(TypeError):
+    pass
+
+
+def _read_only(self, *args, **kwargs):
+    raise ReadOnlyError('{} object is read-only'.format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """
+    Dictionary which can't be changed after creation
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return CowDict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    copy = __copy__
+
+
+class FrozenList(list):
+    """
+    List which can't be changed after creation
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = _read_only
+    __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return CowList(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+class CowDict(dict):
+    """
+    Draft of FrozenDict. Nested frozen containers are replaced with their own
+    drafts on first access, so only the accessed path is ever copied.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if _is_frozen(value):
+            value = draft(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def pop(self, key, *default):
+        value = dict.pop(self, key, *default)
+        return draft(value) if _is_frozen(value) else value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        return key, draft(value) if _is_frozen(value) else value
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def itervalues(self):
+        for key in self.keys():
+            yield self[key]
+
+    def iteritems(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def copy(self):
+        return CowDict(self)
+
+    def __copy__(self):
+        return CowDict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class CowList(list):
+    """
+    Draft of FrozenList. Nested frozen containers are replaced with their own
+    drafts on first access, so only the accessed path is ever copied.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        value = list.__getitem__(self, index)
+        if isinstance(index, slice):
+            return CowList(value)
+        if _is_frozen(value):
+            value = draft(value)
+            list.__setitem__(self, index, value)
+        return value
+
+    def __getslice__(self, i, j):
+        return self[max(0, i):max(0, j):]
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def __reversed__(self):
+        for index in xrange(len(self) - 1, -1, -1):
+            yield self[index]
+
+    def pop(self, *index):
+        value = list.pop(self, *index)
+        return draft(value) if _is_frozen(value) else value
+
+    def __copy__(self):
+        return CowList(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+class Record(object):
+    """
+    Dictionary-like object with fixed set of keys, which stores values in
+    slots instead of hash table. Keys which were not set are absent.
+
+    Subclasses should define both __slots__ and fields with the same names.
+    Frozen records are created by freeze and can't be changed.
+    """
+    __slots__ = ('_frozen',)
+    fields = ()
+
+    def __init__(self, *args, **kwargs):
+        self._frozen = False
+        self.update(*args, **kwargs)
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """
+        Return record with data of provided mapping or mapping itself if it
+        contains keys which the record can't hold
+        """
+        if isinstance(mapping, Record) or any(key not in cls.fields for key in mapping):
+            return mapping
+        return cls(mapping)
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if self._frozen:
+            _read_only(self)
+        if key not in self.fields:
+            raise KeyError('{} can hold only {} keys, got {}'.format(
+                type(self).__name__, self.fields, key))
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if self._frozen:
+            _read_only(self)
+        if key not in self:
+            raise KeyError(key)
+        delattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.fields and hasattr(self, key)
+
+    def __iter__(self):
+        for field in self.fields:
+            if hasattr(self, field):
+                yield field
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if not hasattr(other, 'keys'):
+            return False
+        return dict(self.iteritems()) == dict((key, other[key]) for key in other.keys())
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, dict(self.iteritems()))
+
+    def __copy__(self):
+        return type(self)(self.iteritems())
+
+    def __deepcopy__(self, memo):
+        # frozen values (like interned labels) can't change, so they are shared
+        return type(self)(
+            (key, value if _is_frozen(value) else deepcopy(value, memo))
+            for key, value in self.iteritems()
+        )
+
+    def __reduce__(self):
+        return type(self), (dict(self.iteritems()),)
+
+    copy = __copy__
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def iterkeys(self):
+        return iter(self)
+
+    def itervalues(self):
+        for key in self:
+            yield self[key]
+
+    def iteritems(self):
+        for key in self:
+            yield key, self[key]
+
+    def update(self, *args, **kwargs):
+        for mapping in args + (kwargs,):
+            if hasattr(mapping, 'keys'):
+                pairs = [(key, mapping[key]) for key in mapping.keys()]
+            else:
+                pairs = mapping
+            for key, value in pairs:
+                self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def to_dict(self):
+        return dict(self.iteritems())
+
+    def frozen(self):
+        """
+        Return read-only version of record
+        """
+        if self._frozen:
+            return self
+        record = type(self)((key, freeze(value)) for key, value in self.iteritems())
+        record._frozen = True
+        return record
+
+
+_FROZEN_TYPES = (FrozenDict, FrozenList, frozenset)
+
+
+def _is_frozen(value):
+    if isinstance(value, Record):
+        return value._frozen
+    return isinstance(value, _FROZEN_TYPES)
+
+
+def freeze(value):
+    """
+    Return immutable version of value. Frozen subtrees are reused as is, so
+    freezing a draft costs only as much as the parts of it that were thawed.
+    """
+    if isinstance(value, _FROZEN_TYPES):
+        return value
+    if isinstance(value, Record):
+        return value.frozen()
+    if isinstance(value, dict):
+        return FrozenDict(
+            (key, freeze(item)) for key, item in dict.iteritems(value)
+        )
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in list.__iter__(value))
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def draft(value):
+    """
+    Return mutable copy-on-write version of frozen value.
+    """
+    if isinstance(value, FrozenDict):
+        return CowDict(value)
+    if isinstance(value, FrozenList):
+        return CowList(value)
+    if isinstance(value, frozenset):
+        return set(value)
+    if isinstance(value, Record):
+        return value.copy()
+    return value
+
+
+def thaw(value):
+    """
+    Return plain mutable deep copy of value made of builtin containers.
+    """
+    if isinstance(value, dict):
+        return dict(
+            (key, thaw(item)) for key, item in dict.iteritems(value)
+        )
+    if isinstance(value, Record):
+        return dict((key, thaw(item)) for key, item in value.iteritems())
+    if isinstance(value, list):
+        return [thaw(item) for item in list.__iter__(value)]
+    if isinstance(value, tuple):
+        return tuple(thaw(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return set(value)
+    return deepcopy(value)
+
+
+class ReadOnlyDict(object):
+    """
+    Read-only proxy of dictionary. Proxy doesn't copy anything: it reflects
+    current state of underlying dictionary and wraps nested containers with
+    read-only proxies on access.
+    """
+    __slots__ = ('_data',)
+    __hash__ = None
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return read_only(self._data[key])
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyDict):
+            other = other._data
+        return self._data == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._data)
+
+    def __deepcopy__(self, memo):
+        return thaw(self._data)
+
+    def get(self, key, default=None):
+        if key in self._data:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(self._data)
+
+    def values(self):
+        return [self[key] for key in self._data]
+
+    def items(self):
+        return [(key, self[key]) for key in self._data]
+
+    def iterkeys(self):
+        return iter(self._data)
+
+    def itervalues(self):
+        for key in self._data:
+            yield self[key]
+
+    def iteritems(self):
+        for key in self._data:
+            yield key, self[key]
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class ReadOnlyList(object):
+    """
+    Read-only proxy of list. Proxy doesn't copy anything: it reflects
+    current state of underlying list and wraps nested containers with
+    read-only proxies on access.
+    """
+    __slots__ = ('_data',)
+    __hash__ = None
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyList(list.__getitem__(self._data, index))
+        return read_only(self._data[index])
+
+    def __getslice__(self, i, j):
+        return self[max(0, i):max(0, j):]
+
+    def __contains__(self, value):
+        return value in self._data
+
+    def __iter__(self):
+        for index in xrange(len(self._data)):
+            yield self[index]
+
+    def __reversed__(self):
+        for index in xrange(len(self._data) - 1, -1, -1):
+            yield self[index]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyList):
+            other = other._data
+        return self._data == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._data)
+
+    def __deepcopy__(self, memo):
+        return thaw(self._data)
+
+    def index(self, value, *args):
+        return self._data.index(value, *args)
+
+    def count(self, value):
+        return self._data.count(value)
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = _read_only
+    __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = _read_only
+
+
+def read_only(value):
+    """
+    Return read-only version of value without copying it
+    """
+    if _is_frozen(value):
+        return value
+    if isinstance(value, (dict, Record)):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    if isinstance(value, tuple):
+        return tuple(read_only(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def approximate_size(value, skip_frozen=False):
+    """
+    Return approximate number of bytes taken by value and all objects it
+    contains. Frozen parts of value are not counted if skip_frozen is set.
+    """
+    size = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or (skip_frozen and _is_frozen(item)):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(dict.iterkeys(item))
+            stack.extend(dict.itervalues(item))
+        elif isinstance(item, Record):
+            stack.extend(item.itervalues())
+        elif isinstance(item, list):
+            stack.extend(list.__iter__(item))
+        elif isinstance(item, (tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+def _represent_record(dumper, record):
+    return dumper.represent_dict(record.to_dict())
+
+
+# Let yaml safe dumper (used for auction protocol) handle snapshots and drafts
+# the same way as builtin containers
+for _type in (FrozenDict, CowDict):
+    SafeDumper.add_representer(_type, SafeDumper.represent_dict)
+for _type in (FrozenList, CowList):
+    SafeDumper.add_representer(_type, SafeDumper.represent_list)
+SafeDumper.add_multi_representer(Record, _represent_record)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the cost of applying one bid to the auction document stored
+in the AuctionWorker context, depending on the number of passed rounds.
+
+Usage:
+    python -m openprocurement.auction.texas.tests.benchmarks.context_copy
+"""
+import argparse
+import timeit
+
+from openprocurement.auction.texas.context import CONTEXT_MAPPING
+from openprocurement.auction.texas.tests.benchmarks.synthetic import (
+    make_auction_document, make_bid, START
+)
+
+
+def apply_bid(context):
+    # Mirrors access pattern of form_handler, BidsHandler.add_bid and
+    # BidsHandler.end_bid_stage for a single bid
+    document = context['auction_document']
+    current_stage = document['current_stage']
+    amount = document['stages'][current_stage].get('amount', 0) + 100
+    bid = make_bid('bidder', 1, amount, START)
+
+    document = context['auction_document']
+    document['stages'][current_stage].update(bid)
+    document['results'][0] = bid
+    context['auction_document'] = document
+
+    document = context['auction_document']
+    document['stages'].append({'start': bid['time'], 'type': 'pause'})
+    document['stages'].append({'start': bid['time'], 'type': 'english', 'amount': amount + 100})
+    document['current_stage'] += 1
+    context['auction_document'] = document
+
+    return context['auction_document']['current_stage']
+
+
+def run(context_type, rounds, number):
+    context = CONTEXT_MAPPING[context_type]({})
+    context['auction_document'] = make_auction_document(rounds)
+    return min(timeit.repeat(lambda: apply_bid(context), repeat=3, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 100, 250, 500, 1000])
+    parser.add_argument('--number', type=int, default=50)
+    parser.add_argument('--types', nargs='+', default=['dict', 'snapshot'])
+    args = parser.parse_args()
+
+    print '{:>8} {}'.format('rounds', ' '.join('{:>14}'.format(t) for t in args.types))
+    for rounds in args.rounds:
+        timings = [run(context_type, rounds, args.number) for context_type in args.types]
+        print '{:>8} {}'.format(
+            rounds, ' '.join('{:>11.1f} us'.format(t * 10 ** 6) for t in timings)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of CPU cost of preparing request body of auction document save
+against number of stages.
+
+'copy' is the former way: deep copy of document into plain structure
+encoded by couchdb-python default codec. Codecs from
+openprocurement.auction.texas.serialization encode the state worker keeps
+without copying it. CouchDB server is not needed.
+
+Usage:
+    python -m openprocurement.auction.texas.tests.benchmarks.couchdb_encoding
+"""
+import argparse
+import json
+from copy import deepcopy
+from timeit import default_timer
+
+from openprocurement.auction.texas.serialization import CODECS
+from openprocurement.auction.texas.state import AuctionState, to_document
+from openprocurement.auction.texas.tests.benchmarks.synthetic import (
+    make_auction_document
+)
+
+
+def encode_copy(state):
+    # ensure_ascii is left on, since bidder labels are non-ASCII byte strings
+    return json.dumps(deepcopy(to_document(state)), allow_nan=False).encode('utf-8')
+
+
+def available_encoders():
+    encoders = [('copy', encode_copy)]
+    for name in sorted(CODECS):
+        try:
+            encode, _ = CODECS[name]()
+        except ImportError:
+            continue
+        encoders.append((name, lambda state, encode=encode: encode(state).encode('utf-8')))
+    return encoders
+
+
+def measure(encode, state, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        encode(state)
+        timings.append(default_timer() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stages', type=int, nargs='+', default=[10, 100, 500, 1000, 2000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    encoders = available_encoders()
+    print 'min time of encoding, ms'
+    print '{:>8} {}'.format('stages', ' '.join('{:>12}'.format(name) for name, _ in encoders))
+    for stages in args.stages:
+        state = AuctionState.from_document(make_auction_document(stages // 2))
+        print '{:>8} {}'.format(stages, ' '.join(
+            '{:>12.2f}'.format(measure(encode, state, args.repeat)) for _, encode in encoders
+        ))
+
+
+if __name__ == '__main__':
+    main()
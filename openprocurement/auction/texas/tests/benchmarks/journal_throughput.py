@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of throughput of local write-ahead journal with group commit.
+
+Given number of greenlets, like concurrent bidders, append auction documents
+to journal and wait until they are synced to disk. Journal file is created
+in temporary directory, pass --directory to measure another disk.
+
+Usage:
+    python -m openprocurement.auction.texas.tests.benchmarks.journal_throughput
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from timeit import default_timer
+
+import gevent
+
+from openprocurement.auction.texas.state import to_document
+from openprocurement.auction.texas.tests.benchmarks.synthetic import (
+    make_auction_document
+)
+from openprocurement.auction.texas.wal import WriteAheadJournal
+
+
+def run(directory, concurrency, records, commit_delay, document):
+    path = os.path.join(directory, 'journal')
+    journal = WriteAheadJournal(path, commit_delay)
+    latencies = []
+
+    def writer():
+        for _ in range(records // concurrency):
+            start = default_timer()
+            journal.append(document['_id'], document).get()
+            latencies.append(default_timer() - start)
+
+    start = default_timer()
+    gevent.joinall([gevent.spawn(writer) for _ in range(concurrency)])
+    elapsed = default_timer() - start
+    journal.close()
+    os.remove(path)
+
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        float(len(latencies)) / journal.syncs,
+        latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--directory')
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--commit-delay', type=float, nargs='+', default=[0, 0.002])
+    args = parser.parse_args()
+
+    directory = args.directory or tempfile.mkdtemp()
+    document = to_document(make_auction_document(args.rounds))
+    try:
+        print '{:>12} {:>13} {:>12} {:>14} {:>10} {:>10}'.format(
+            'concurrency', 'commit delay', 'records/s', 'records/fsync', 'p50, ms', 'p99, ms'
+        )
+        for commit_delay in args.commit_delay:
+            for concurrency in args.concurrency:
+                print '{:>12} {:>13} {:>12.0f} {:>14.1f} {:>10.2f} {:>10.2f}'.format(
+                    concurrency, commit_delay,
+                    *run(directory, concurrency, args.records, commit_delay, document)
+                )
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
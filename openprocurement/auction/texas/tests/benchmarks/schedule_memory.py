@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of peak memory used by preparing auction data in the context.
+
+Every measurement runs in a separate process, which builds synthetic API
+data, passes it through the data flow of Auction.schedule_auction and
+Auction.start_auction and reports its peak RSS. 'copy' mode mirrors the data
+flow with copying data into the context, 'owned' mode hands data over to the
+context without copying.
+
+Usage:
+    python -m openprocurement.auction.texas.tests.benchmarks.schedule_memory
+"""
+import argparse
+import resource
+import subprocess
+import sys
+from copy import deepcopy
+
+from openprocurement.auction.texas.context import CONTEXT_MAPPING
+from openprocurement.auction.texas.tests.benchmarks.synthetic import (
+    make_auction_data
+)
+
+MODULE = 'openprocurement.auction.texas.tests.benchmarks.schedule_memory'
+
+
+def peak_rss():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def prepare_bidders(auction_data):
+    bidders_data = [
+        {'id': bid['id'], 'date': bid['date'], 'value': bid['value'], 'owner': bid.get('owner', '')}
+        for bid in auction_data['data']['bids']
+    ]
+    bids_mapping = dict((bid['id'], index + 1) for index, bid in enumerate(bidders_data))
+    return bidders_data, bids_mapping
+
+
+def copy_flow(context, auction_data):
+    bidders_data, bids_mapping = prepare_bidders(auction_data)
+    context['auction_data'] = deepcopy(auction_data)
+    context['bidders_data'] = deepcopy(bidders_data)
+    context['bids_mapping'] = deepcopy(bids_mapping)
+    auction_protocol = {
+        'items': context['auction_data']['data'].get('items', []),
+        'timeline': {'auction_start': {'initial_bids': []}},
+    }
+    context['auction_protocol'] = deepcopy(auction_protocol)
+
+    bids = deepcopy(bidders_data)
+    for bid in sorted(bids, key=lambda bid: bid['value']['amount']):
+        auction_protocol['timeline']['auction_start']['initial_bids'].append({
+            'bidder': bid['id'], 'date': bid['date'],
+            'amount': bid['value']['amount'], 'bid_number': bids_mapping[bid['id']]
+        })
+    context['auction_protocol'] = deepcopy(auction_protocol)
+    return auction_data, bidders_data, bids_mapping, auction_protocol
+
+
+def owned_flow(context, auction_data):
+    bidders_data, bids_mapping = prepare_bidders(auction_data)
+    context['auction_data'] = auction_data
+    context['bidders_data'] = bidders_data
+    context['bids_mapping'] = bids_mapping
+    context['auction_protocol'] = {
+        'items': deepcopy(context.view('auction_data')['data'].get('items', [])),
+        'timeline': {'auction_start': {'initial_bids': []}},
+    }
+
+    auction_protocol = context['auction_protocol']
+    for bid in sorted(bidders_data, key=lambda bid: bid['value']['amount']):
+        auction_protocol['timeline']['auction_start']['initial_bids'].append({
+            'bidder': bid['id'], 'date': bid['date'],
+            'amount': bid['value']['amount'], 'bid_number': bids_mapping[bid['id']]
+        })
+    context['auction_protocol'] = auction_protocol
+    return auction_data, bidders_data, bids_mapping
+
+
+FLOWS = {
+    'copy': copy_flow,
+    'owned': owned_flow,
+}
+
+
+def measure(context_type, mode, bids, items):
+    """
+    Run data flow in current process and return RSS growth in kilobytes
+    """
+    auction_data = make_auction_data(bids, items)
+    baseline = peak_rss()
+    context = CONTEXT_MAPPING[context_type]({})
+    kept = FLOWS[mode](context, auction_data)
+    del auction_data
+    result = peak_rss() - baseline
+    del kept
+    return result
+
+
+def run(context_type, mode, bids, items):
+    output = subprocess.check_output([
+        sys.executable, '-m', MODULE, '--measure', context_type, mode,
+        '--bids', str(bids), '--items', str(items)
+    ])
+    return int(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bids', type=int, default=1000)
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--types', nargs='+', default=['dict', 'snapshot'])
+    parser.add_argument('--measure', nargs=2, metavar=('TYPE', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print measure(args.measure[0], args.measure[1], args.bids, args.items)
+        return
+
+    print '{} bids, {} items, peak RSS growth'.format(args.bids, args.items)
+    print '{:>10} {}'.format('context', ' '.join('{:>12}'.format(mode) for mode in sorted(FLOWS)))
+    for context_type in args.types:
+        print '{:>10} {}'.format(context_type, ' '.join(
+            '{:>9} KB'.format(run(context_type, mode, args.bids, args.items))
+            for mode in sorted(FLOWS)
+        ))
+
+
+if __name__ == '__main__':
+    main()
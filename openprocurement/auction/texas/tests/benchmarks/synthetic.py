@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Generators of synthetic auction data used by benchmarks
+"""
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+
+START = datetime(2018, 1, 1, 10)
+
+
+def make_bid(bidder_id, bidder_name, amount, time):
+    return {
+        'bidder_id': bidder_id,
+        'time': time.isoformat(),
+        'amount': amount,
+        'label': {
+            'en': 'Bidder #{}'.format(bidder_name),
+            'uk': 'Bidder #{}'.format(bidder_name),
+            'ru': 'Bidder #{}'.format(bidder_name),
+        }
+    }
+
+
+def make_auction_document(rounds, bidders=10, items=1):
+    """
+    Build auction document of texas auction which already passed given
+    number of rounds. Every round is a pause and a main round with a bid,
+    just like BidsHandler.end_bid_stage produces them.
+    """
+    bidder_ids = [uuid4().hex for _ in range(bidders)]
+    stages = []
+    results = {}
+    amount = 10000.0
+    for index in range(rounds):
+        time = START + timedelta(seconds=index * 20)
+        bidder_number = index % bidders
+        stages.append({'start': time.isoformat(), 'type': 'pause'})
+        stage = {
+            'start': (time + timedelta(seconds=10)).isoformat(),
+            'type': 'english',
+        }
+        stage.update(make_bid(bidder_ids[bidder_number], bidder_number + 1, amount, time))
+        stages.append(stage)
+        results[bidder_ids[bidder_number]] = make_bid(
+            bidder_ids[bidder_number], bidder_number + 1, amount, time
+        )
+        amount += 100.0
+    return {
+        '_id': uuid4().hex,
+        '_rev': '1-{}'.format(uuid4().hex),
+        'auctionID': 'UA-EA-2018-01-01-000001',
+        'procurementMethodType': 'texas',
+        'TENDERS_API_VERSION': '2.4',
+        'current_stage': len(stages) - 1,
+        'stages': stages,
+        'results': sorted(results.values(), key=lambda bid: bid['amount'], reverse=True),
+        'initial_bids': [
+            make_bid(bidder_id, index + 1, 10000.0, START)
+            for index, bidder_id in enumerate(bidder_ids)
+        ],
+        'items': [make_item(index) for index in range(items)],
+        'value': {'amount': 10000.0, 'currency': 'UAH'},
+        'minimalStep': {'amount': 100.0, 'currency': 'UAH'},
+        'initial_value': 10000.0,
+        'auction_type': 'kadastral',
+        'title': 'Synthetic auction',
+        'description': 'Synthetic auction for benchmarks',
+    }
+
+
+def make_item(index):
+    return {
+        'id': uuid4().hex,
+        'description': 'Synthetic item #{}'.format(index),
+        'classification': {
+            'scheme': 'CAV',
+            'id': '06000000-2',
+            'description': 'Land plots',
+        },
+        'address': {
+            'countryName': 'Ukraine',
+            'locality': 'Kyiv',
+            'postalCode': '01001',
+            'region': 'Kyiv',
+            'streetAddress': 'Khreshchatyk, {}'.format(index),
+        },
+        'quantity': 1,
+        'unit': {'code': 'E48', 'name': 'item'},
+    }
+
+
+def make_auction_data(bids, items):
+    """
+    Build API representation of auction with given number of bids and items
+    """
+    return {
+        'data': {
+            'id': uuid4().hex,
+            'auctionID': 'UA-EA-2018-01-01-000001',
+            'procurementMethodType': 'texas',
+            'auctionPeriod': {'startDate': START.isoformat() + '+02:00'},
+            'value': {'amount': 10000.0, 'currency': 'UAH'},
+            'minimalStep': {'amount': 100.0, 'currency': 'UAH'},
+            'title': 'Synthetic auction',
+            'description': 'Synthetic auction for benchmarks',
+            'items': [make_item(index) for index in range(items)],
+            'bids': [
+                {
+                    'id': uuid4().hex,
+                    'date': (START - timedelta(days=1, seconds=index)).isoformat(),
+                    'status': 'active',
+                    'owner': 'broker',
+                    'value': {'amount': 10000.0, 'currency': 'UAH'},
+                    'tenderers': [{
+                        'name': 'Participant #{}'.format(index),
+                        'identifier': {'scheme': 'UA-EDR', 'id': str(index)},
+                    }],
+                }
+                for index in range(bids)
+            ],
+        }
+    }
@@ -0,0 +1,157 @@
+import unittest
+from copy import deepcopy
+
+import gevent
+
+from openprocurement.auction.texas.context import DictContext, ContextException
+from openprocurement.auction.texas.structures import (
+    ReadOnlyDict, ReadOnlyList, ReadOnlyError
+)
+
+
+class TestDictContext(unittest.TestCase):
+    context_class = DictContext
+
+    def setUp(self):
+        self.context = self.context_class({})
+        self.bidders_data = [
+            {'id': '1' * 32, 'value': {'amount': 100}},
+            {'id': '2' * 32, 'value': {'amount': 200}},
+        ]
+        self.context['bidders_data'] = deepcopy(self.bidders_data)
+
+
+class TestStoring(TestDictContext):
+
+    def test_not_acceptable_field(self):
+        with self.assertRaises(ContextException):
+            self.context['some_field'] = {}
+
+    def test_wrong_type(self):
+        with self.assertRaises(ContextException):
+            self.context['bidders_data'] = {}
+
+    def test_getting_returns_copy(self):
+        bidders_data = self.context['bidders_data']
+        bidders_data[0]['id'] = '3' * 32
+
+        self.assertEqual(self.context['bidders_data'], self.bidders_data)
+
+
+class TestView(TestDictContext):
+
+    def test_view_is_read_only(self):
+        view = self.context.view('bidders_data')
+
+        self.assertIsInstance(view, ReadOnlyList)
+        self.assertIsInstance(view[0], ReadOnlyDict)
+        self.assertIsInstance(view[0]['value'], ReadOnlyDict)
+
+        with self.assertRaises(ReadOnlyError):
+            view.append({})
+        with self.assertRaises(ReadOnlyError):
+            view[0]['id'] = '3' * 32
+        with self.assertRaises(ReadOnlyError):
+            view[0]['value'].update({'amount': 300})
+
+    def test_view_reads_without_copying(self):
+        view = self.context.view('bidders_data')
+
+        self.assertEqual(view, self.bidders_data)
+        self.assertEqual(len(view), 2)
+        self.assertEqual([bidder['id'] for bidder in view], ['1' * 32, '2' * 32])
+        self.assertEqual(view[0].get('value'), {'amount': 100})
+        self.assertEqual(view[0].get('date', 'default'), 'default')
+        self.assertIn('id', view[1])
+        self.assertEqual(view[-1]['value']['amount'], 200)
+        self.assertEqual(view[:1], self.bidders_data[:1])
+
+    def test_view_reflects_stored_object(self):
+        view = self.context.view('bidders_data')
+        self.context['bidders_data'] = self.context['bidders_data'][:1]
+
+        self.assertEqual(len(view), 2)
+        self.assertEqual(len(self.context.view('bidders_data')), 1)
+
+    def test_deepcopy_of_view(self):
+        bidders_data = deepcopy(self.context.view('bidders_data'))
+        bidders_data[0]['id'] = '3' * 32
+
+        self.assertIs(type(bidders_data), list)
+        self.assertEqual(self.context.view('bidders_data'), self.bidders_data)
+
+    def test_view_default(self):
+        self.assertIsNone(self.context.view('bids_mapping'))
+        self.assertEqual(self.context.view('bids_mapping', {}), {})
+
+
+class TestVersions(TestDictContext):
+
+    def test_version_increases_on_store(self):
+        self.assertEqual(self.context.version('bids_mapping'), 0)
+        self.assertEqual(self.context.version('bidders_data'), 1)
+
+        self.context['bidders_data'] = []
+
+        self.assertEqual(self.context.version('bidders_data'), 2)
+        self.assertEqual(self.context.version('bids_mapping'), 0)
+
+    def test_wait_for_change_returns_at_once_if_already_changed(self):
+        self.assertEqual(self.context.wait_for_change('bidders_data', 0), 1)
+
+    def test_wait_for_change(self):
+        waiters = [
+            gevent.spawn(self.context.wait_for_change, 'bidders_data', 1)
+            for _ in range(3)
+        ]
+        gevent.sleep(0)
+        self.assertFalse(any(waiter.ready() for waiter in waiters))
+
+        self.context['bids_mapping'] = {}
+        gevent.sleep(0)
+        self.assertFalse(any(waiter.ready() for waiter in waiters))
+
+        self.context['bidders_data'] = []
+        gevent.joinall(waiters, timeout=1)
+        self.assertEqual([waiter.value for waiter in waiters], [2, 2, 2])
+
+    def test_wait_for_change_timeout(self):
+        self.assertEqual(self.context.wait_for_change('bidders_data', 1, timeout=0.01), 1)
+
+
+class TestProfiling(TestDictContext):
+
+    def test_profiling_is_disabled_by_default(self):
+        self.assertIsNone(self.context.profiler)
+
+    def test_profiling(self):
+        context = self.context_class({'profile': True})
+        context['bidders_data'] = self.bidders_data
+        context['auction_doc_id'] = '1' * 32
+        context['bidders_data']
+        context.get('bidders_data')
+        context.view('bidders_data')
+        context['auction_doc_id']
+
+        stats = context.profiler.stats()
+
+        self.assertEqual(stats['bidders_data']['sets'], 1)
+        self.assertEqual(stats['bidders_data']['gets'], 2)
+        self.assertEqual(stats['bidders_data']['views'], 1)
+        self.assertGreater(stats['bidders_data']['copied_bytes'], 0)
+        self.assertGreater(stats['bidders_data']['copy_time'], 0)
+        self.assertEqual(stats['auction_doc_id']['gets'], 1)
+        self.assertEqual(stats['auction_doc_id']['copied_bytes'], 0)
+
+        report = context.profiler.report().splitlines()
+        self.assertEqual(len(report), 3)
+        self.assertTrue(report[1].startswith('bidders_data'))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestStoring))
+    suite.addTest(unittest.makeSuite(TestView))
+    suite.addTest(unittest.makeSuite(TestVersions))
+    suite.addTest(unittest.makeSuite(TestProfiling))
+    return suite
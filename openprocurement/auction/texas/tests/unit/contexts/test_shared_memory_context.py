@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import unittest
+import gevent
+import mock
+from copy import deepcopy
+
+from openprocurement.auction.texas.context import ContextException
+from openprocurement.auction.texas.sharedmemory import (
+    HEADER,
+    MAGIC,
+    SharedMemoryContext,
+    SharedMemoryException,
+    SharedMemoryPublisher,
+    SharedMemoryReader,
+    SharedMemoryReaderContext,
+)
+from openprocurement.auction.texas.state import StageRecord
+from openprocurement.auction.texas.structures import ReadOnlyError
+
+
+class TestSharedMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'auction.shm')
+        self.auction_document = {
+            'current_stage': 0,
+            'stages': [{'type': 'pause', 'start': '2018-01-01T10:00:00'}],
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class TestPublisher(TestSharedMemory):
+
+    def test_publish_and_read(self):
+        publisher = SharedMemoryPublisher(self.path, size=16)
+        reader = SharedMemoryReader(self.path)
+
+        self.assertEqual(reader.read(), (0, ''))
+
+        publisher.publish('{"a": 1}')
+        self.assertEqual(reader.read(), (1, '{"a": 1}'))
+
+    def test_file_grows(self):
+        publisher = SharedMemoryPublisher(self.path, size=16)
+        reader = SharedMemoryReader(self.path)
+
+        payload = 'x' * 1000
+        version = publisher.publish(payload)
+
+        self.assertEqual(reader.read(), (version, payload))
+
+    def test_restarted_publisher_continues_sequence(self):
+        publisher = SharedMemoryPublisher(self.path, size=16)
+        publisher.publish('x' * 1000)
+        publisher.publish('{"a": 1}')
+        publisher.close()
+        reader = SharedMemoryReader(self.path)
+        size = os.path.getsize(self.path)
+
+        publisher = SharedMemoryPublisher(self.path, size=16)
+
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual(reader.read(), (2, '{"a": 1}'))
+        self.assertEqual(publisher.publish('{"a": 2}'), 3)
+        self.assertEqual(reader.read(), (3, '{"a": 2}'))
+
+    def test_interrupted_write_is_completed(self):
+        publisher = SharedMemoryPublisher(self.path, size=16)
+        publisher.publish('{"a": 1}')
+        publisher._sequence += 1
+        HEADER.pack_into(publisher._mmap, 0, MAGIC, publisher._sequence, 0)
+        publisher.close()
+
+        publisher = SharedMemoryPublisher(self.path, size=16)
+        reader = SharedMemoryReader(self.path)
+
+        self.assertEqual(reader.version, 1)
+        self.assertEqual(publisher.publish('{"a": 2}'), 2)
+        self.assertEqual(reader.read(), (2, '{"a": 2}'))
+
+    def test_wrong_file(self):
+        with open(self.path, 'w') as f:
+            f.write('x' * 100)
+
+        with self.assertRaises(SharedMemoryException):
+            SharedMemoryReader(self.path)
+
+    def test_file_which_is_being_created(self):
+        open(self.path, 'w').close()
+        publishers = []
+        gevent.spawn_later(0.02, lambda: publishers.append(SharedMemoryPublisher(self.path, size=16)))
+
+        reader = SharedMemoryReader(self.path)
+
+        self.assertEqual(reader.read(), (0, ''))
+        reader.close()
+        publishers[0].close()
+
+    def test_file_which_is_never_created(self):
+        open(self.path, 'w').close()
+
+        with mock.patch.object(SharedMemoryReader, 'open_retries', 2):
+            with self.assertRaises(SharedMemoryException):
+                SharedMemoryReader(self.path)
+
+
+class TestSharedMemoryContext(TestSharedMemory):
+
+    def setUp(self):
+        super(TestSharedMemoryContext, self).setUp()
+        self.config = {'directory': self.directory, 'auction_id': '1' * 32}
+        self.context = SharedMemoryContext(dict(self.config, size=64))
+        self.reader_context = SharedMemoryReaderContext(dict(self.config, poll_interval=0.01))
+
+    def test_auctions_are_published_to_own_files(self):
+        other = SharedMemoryContext({'directory': self.directory, 'auction_id': '2' * 32})
+        self.context['auction_document'] = deepcopy(self.auction_document)
+        other['auction_document'] = dict(self.auction_document, current_stage=5)
+
+        self.assertEqual(self.reader_context['auction_document'], self.auction_document)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ['1' * 32 + '.shm', '2' * 32 + '.shm']
+        )
+
+    def test_published_fields(self):
+        self.context['auction_document'] = deepcopy(self.auction_document)
+        self.context['auction_doc_id'] = '1' * 32
+
+        self.assertEqual(self.reader_context['auction_document'], self.auction_document)
+        self.assertIsNone(self.reader_context.get('auction_doc_id'))
+
+    def test_records_are_published(self):
+        auction_document = deepcopy(self.auction_document)
+        auction_document['stages'].append(StageRecord(type='english', amount=100))
+        self.context['auction_document'] = auction_document
+
+        stages = self.reader_context['auction_document']['stages']
+        self.assertEqual(stages[1], {'type': 'english', 'amount': 100})
+
+    def test_reader_follows_changes(self):
+        self.context['auction_document'] = deepcopy(self.auction_document)
+        version = self.reader_context.version('auction_document')
+
+        auction_document = self.context['auction_document']
+        auction_document['current_stage'] = 1
+        self.context['auction_document'] = auction_document
+
+        self.assertGreater(
+            self.reader_context.wait_for_change('auction_document', version, timeout=1),
+            version
+        )
+        self.assertEqual(self.reader_context['auction_document']['current_stage'], 1)
+
+    def test_reader_is_read_only(self):
+        self.context['auction_document'] = deepcopy(self.auction_document)
+
+        with self.assertRaises(ContextException):
+            self.reader_context['auction_document'] = {}
+        with self.assertRaises(ReadOnlyError):
+            self.reader_context.view('auction_document')['current_stage'] = 1
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestPublisher))
+    suite.addTest(unittest.makeSuite(TestSharedMemoryContext))
+    return suite
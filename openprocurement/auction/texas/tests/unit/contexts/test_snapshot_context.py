@@ -0,0 +1,140 @@
+import unittest
+from copy import deepcopy
+
+from openprocurement.auction.texas.context import SnapshotContext
+from openprocurement.auction.texas.structures import (
+    CowDict, CowList, FrozenDict, FrozenList, ReadOnlyError
+)
+
+
+class TestSnapshotContext(unittest.TestCase):
+    context_class = SnapshotContext
+
+    def setUp(self):
+        self.context = self.context_class({})
+        self.auction_document = {
+            'current_stage': 0,
+            'stages': [
+                {'type': 'pause', 'start': '2018-01-01T10:00:00'},
+                {'type': 'english', 'start': '2018-01-01T10:00:10', 'amount': 100}
+            ],
+            'results': []
+        }
+        self.context['auction_document'] = deepcopy(self.auction_document)
+
+
+class TestStoring(TestSnapshotContext):
+
+    def test_stored_value_is_frozen(self):
+        snapshot = self.context.snapshot('auction_document')
+
+        self.assertIsInstance(snapshot, FrozenDict)
+        self.assertIsInstance(snapshot['stages'], FrozenList)
+        self.assertIsInstance(snapshot['stages'][0], FrozenDict)
+        self.assertEqual(snapshot, self.auction_document)
+
+    def test_stored_value_is_not_shared_with_caller(self):
+        auction_document = deepcopy(self.auction_document)
+        self.context['auction_document'] = auction_document
+
+        auction_document['stages'][0]['type'] = 'english'
+
+        self.assertEqual(self.context.snapshot('auction_document'), self.auction_document)
+
+    def test_snapshot_is_read_only(self):
+        snapshot = self.context.snapshot('auction_document')
+
+        with self.assertRaises(ReadOnlyError):
+            snapshot['current_stage'] = 1
+        with self.assertRaises(ReadOnlyError):
+            snapshot['stages'].append({})
+        with self.assertRaises(ReadOnlyError):
+            snapshot['stages'][0].update({'type': 'english'})
+
+    def test_not_copied_types(self):
+        self.context['auction_doc_id'] = '1' * 32
+
+        self.assertEqual(self.context['auction_doc_id'], '1' * 32)
+
+
+class TestGetting(TestSnapshotContext):
+
+    def test_getting_returns_draft(self):
+        auction_document = self.context['auction_document']
+
+        self.assertIsInstance(auction_document, CowDict)
+        self.assertIsInstance(auction_document['stages'], CowList)
+        self.assertEqual(auction_document, self.auction_document)
+        self.assertEqual(self.context.get('auction_document'), self.auction_document)
+
+    def test_draft_changes_do_not_affect_snapshot(self):
+        snapshot = self.context.snapshot('auction_document')
+        auction_document = self.context['auction_document']
+
+        auction_document['current_stage'] += 1
+        auction_document['stages'][1].update({'amount': 200, 'bidder_id': '1' * 32})
+        auction_document['stages'].append({'type': 'pause'})
+        for stage in auction_document['stages']:
+            stage['checked'] = True
+
+        self.assertEqual(snapshot, self.auction_document)
+        self.assertEqual(self.context['auction_document'], self.auction_document)
+
+    def test_storing_draft_reuses_untouched_parts(self):
+        snapshot = self.context.snapshot('auction_document')
+        auction_document = self.context['auction_document']
+
+        auction_document['stages'][1]['amount'] = 200
+        self.context['auction_document'] = auction_document
+        new_snapshot = self.context.snapshot('auction_document')
+
+        self.assertIsNot(new_snapshot, snapshot)
+        self.assertIs(new_snapshot['results'], snapshot['results'])
+        self.assertIs(new_snapshot['stages'][0], snapshot['stages'][0])
+        self.assertEqual(new_snapshot['stages'][1]['amount'], 200)
+        self.assertEqual(snapshot['stages'][1]['amount'], 100)
+
+    def test_deepcopy_returns_plain_containers(self):
+        auction_document = deepcopy(self.context.snapshot('auction_document'))
+
+        self.assertIs(type(auction_document), dict)
+        self.assertIs(type(auction_document['stages']), list)
+        self.assertIs(type(auction_document['stages'][0]), dict)
+        self.assertEqual(auction_document, self.auction_document)
+
+    def test_view_returns_snapshot(self):
+        self.assertIs(
+            self.context.view('auction_document'),
+            self.context.snapshot('auction_document')
+        )
+
+    def test_getting_default(self):
+        self.assertEqual(self.context.get('bids_mapping', {}), {})
+        self.assertIsNone(self.context.snapshot('bids_mapping'))
+
+
+class TestProfiling(TestSnapshotContext):
+
+    def test_copied_bytes(self):
+        context = self.context_class({'profile': True})
+        context['auction_document'] = deepcopy(self.auction_document)
+        stored_bytes = context.profiler.stats()['auction_document']['copied_bytes']
+
+        auction_document = context['auction_document']
+        got_bytes = context.profiler.stats()['auction_document']['copied_bytes'] - stored_bytes
+        auction_document['current_stage'] = 1
+        context['auction_document'] = auction_document
+        restored_bytes = context.profiler.stats()['auction_document']['copied_bytes'] - stored_bytes - got_bytes
+
+        self.assertGreater(got_bytes, 0)
+        self.assertLess(got_bytes, stored_bytes)
+        # nested stages and results are not copied again
+        self.assertLess(restored_bytes, stored_bytes)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestStoring))
+    suite.addTest(unittest.makeSuite(TestGetting))
+    suite.addTest(unittest.makeSuite(TestProfiling))
+    return suite
@@ -0,0 +1,208 @@
+import errno
+import socket
+import unittest
+import mock
+from copy import deepcopy
+
+from couchdb.http import ResourceConflict
+
+from openprocurement.auction.texas.eventsourcing import (
+    EventSourcedCouchDB, apply_event, diff_documents
+)
+from openprocurement.auction.texas.state import AuctionState, StageRecord
+from openprocurement.auction.texas.structures import draft, freeze
+
+
+class TestEventSourcing(unittest.TestCase):
+
+    def setUp(self):
+        self.doc_id = '1' * 32
+        self.auction_document = {
+            '_id': self.doc_id,
+            '_rev': '1-a',
+            'current_stage': 0,
+            'stages': [
+                {'start': '2018-01-01T10:00:00', 'type': 'pause'},
+                {'start': '2018-01-01T10:00:10', 'type': 'english', 'amount': 100},
+            ],
+            'results': [],
+        }
+
+    def make_bid(self, auction_document):
+        auction_document['stages'][1].update({'bidder_id': '2' * 32, 'time': '2018-01-01T10:00:15'})
+        auction_document['stages'].append(StageRecord(start='2018-01-01T10:00:15', type='pause'))
+        auction_document['current_stage'] = 2
+        return auction_document
+
+
+class TestDiff(TestEventSourcing):
+
+    def test_diff_and_apply(self):
+        previous = freeze(AuctionState.from_document(deepcopy(self.auction_document)))
+        current = freeze(self.make_bid(draft(previous)))
+
+        changes = diff_documents(previous, current)
+
+        self.assertEqual(changes['fields'], {'current_stage': 2})
+        self.assertEqual([index for index, stage in changes['stages']], [1, 2])
+        self.assertEqual(changes['removed'], [])
+
+        changes['seq'] = 1
+        auction_document = apply_event(deepcopy(self.auction_document), changes)
+        self.assertEqual(auction_document['stages'], current['stages'])
+        self.assertEqual(auction_document['current_stage'], 2)
+        self.assertEqual(auction_document['events_seq'], 1)
+
+    def test_removed_fields(self):
+        previous = freeze(self.auction_document)
+        current = draft(previous)
+        del current['results']
+
+        self.assertEqual(diff_documents(previous, freeze(current))['removed'], ['results'])
+
+
+class TestEventSourcedCouchDB(TestEventSourcing):
+
+    def setUp(self):
+        super(TestEventSourcedCouchDB, self).setUp()
+        self.patch_couchdb_database = mock.patch('openprocurement.auction.texas.database.Database')
+        self.patch_couchdb_database.start()
+        self.database = EventSourcedCouchDB({
+            'COUCH_DATABASE': 'http://0.0.0.0:9000/database',
+            'retry': {'retries': 2, 'base_delay': 0},
+        })
+        self.database._start_materializer = mock.MagicMock()
+        self.database._db.get.return_value = deepcopy(self.auction_document)
+        self.database._db.view.return_value = []
+        self.database._db.update.side_effect = lambda docs: [(True, doc['_id'], '1-x') for doc in docs]
+        self.database._db.save.return_value = (self.doc_id, '2-b')
+
+    def tearDown(self):
+        self.patch_couchdb_database.stop()
+
+    def test_save_writes_event(self):
+        auction_document = AuctionState.from_document(self.database.get_auction_document(self.doc_id))
+
+        self.database.save_auction_document(self.make_bid(auction_document), self.doc_id)
+
+        self.assertEqual(self.database._db.save.call_count, 0)
+        self.assertEqual(self.database._db.update.call_count, 1)
+        event = self.database._db.update.call_args[0][0][0]
+        self.assertEqual(event['_id'], self.doc_id + '_event_0000000001')
+        self.assertEqual(event['seq'], 1)
+        self.assertEqual(event['fields'], {'current_stage': 2})
+
+    def test_unchanged_document_writes_nothing(self):
+        auction_document = self.database.get_auction_document(self.doc_id)
+
+        self.database.save_auction_document(auction_document, self.doc_id)
+
+        self.assertEqual(self.database._db.update.call_count, 0)
+
+    def test_flush_materializes_document(self):
+        auction_document = self.database.get_auction_document(self.doc_id)
+        self.database.save_auction_document(self.make_bid(auction_document), self.doc_id)
+
+        self.database.flush()
+
+        self.assertEqual(self.database._db.save.call_count, 1)
+        saved = self.database._db.save.call_args[0][0]
+        self.assertEqual(saved['events_seq'], 1)
+        self.assertEqual(saved['current_stage'], 2)
+        self.assertEqual(len(saved['stages']), 3)
+
+        self.database.flush()
+        self.assertEqual(self.database._db.save.call_count, 1)
+
+    def test_get_applies_events(self):
+        event = {
+            '_id': self.doc_id + '_event_0000000001', '_rev': '1-x',
+            'seq': 1, 'fields': {'current_stage': 1}, 'removed': [], 'stages': []
+        }
+        self.database._db.view.return_value = [mock.MagicMock(doc=event)]
+
+        auction_document = self.database.get_auction_document(self.doc_id)
+
+        self.assertEqual(auction_document['current_stage'], 1)
+        self.assertEqual(auction_document['events_seq'], 1)
+        self.assertEqual(self.database._outdated(), [self.doc_id])
+
+    def test_failed_events_are_retried(self):
+        auction_document = self.database.get_auction_document(self.doc_id)
+        self.database._db.update.side_effect = socket.error(errno.ECONNRESET, 'Connection reset')
+        response = self.database.save_auction_document(self.make_bid(auction_document), self.doc_id)
+
+        self.assertIsNone(response)
+        self.assertEqual(self.database._db.update.call_count, 2)
+        self.assertEqual(len(self.database._unsaved_events[self.doc_id]), 1)
+
+        self.database._db.update.side_effect = lambda docs: [(True, doc['_id'], '1-x') for doc in docs]
+        self.database.flush()
+
+        # events are saved, then deleted after materialization
+        self.assertEqual(self.database._db.update.call_count, 4)
+        self.assertEqual(len(self.database._db.update.call_args_list[2][0][0]), 1)
+        self.assertEqual(self.database._unsaved_events[self.doc_id], [])
+
+    def test_transition_with_unsaved_events_fails(self):
+        self.database._db.update.side_effect = socket.error(errno.ECONNRESET, 'Connection reset')
+
+        self.assertIsNone(self.database.apply_transition(self.doc_id, 'increment_stage'))
+
+    def test_materialized_events_are_deleted(self):
+        auction_document = self.database.get_auction_document(self.doc_id)
+        self.database.save_auction_document(self.make_bid(auction_document), self.doc_id)
+
+        self.database.flush()
+
+        self.assertEqual(self.database._db.update.call_count, 2)
+        deleted = self.database._db.update.call_args[0][0]
+        self.assertEqual(deleted, [{'_id': self.doc_id + '_event_0000000001', '_rev': '1-x', '_deleted': True}])
+        self.assertEqual(self.database._saved_events[self.doc_id], [])
+
+    def test_events_left_before_restart_are_deleted(self):
+        self.auction_document['events_seq'] = 1
+        self.database._db.get.return_value = deepcopy(self.auction_document)
+        events = [{
+            '_id': self.doc_id + '_event_000000000{}'.format(seq), '_rev': '1-x',
+            'seq': seq, 'fields': {'current_stage': seq}, 'removed': [], 'stages': []
+        } for seq in (1, 2)]
+        self.database._db.view.return_value = [mock.MagicMock(doc=event) for event in events]
+
+        auction_document = self.database.get_auction_document(self.doc_id)
+        self.assertEqual(auction_document['current_stage'], 2)
+        self.database.flush()
+
+        deleted = self.database._db.update.call_args[0][0]
+        self.assertEqual([event['_id'] for event in deleted], [event['_id'] for event in events])
+
+    def test_rejected_events_are_dropped(self):
+        auction_document = self.database.get_auction_document(self.doc_id)
+        self.database._db.update.side_effect = lambda docs: [
+            (False, doc['_id'], ResourceConflict('conflict')) for doc in docs
+        ]
+        self.database.save_auction_document(self.make_bid(auction_document), self.doc_id)
+
+        self.assertEqual(self.database._db.update.call_count, 1)
+        self.assertEqual(self.database._unsaved_events[self.doc_id], [])
+        self.assertEqual(self.database._db.save.call_count, 1)
+        saved = self.database._db.save.call_args[0][0]
+        self.assertEqual(saved['events_seq'], 1)
+        self.assertEqual(saved['current_stage'], 2)
+        self.assertEqual(self.database._outdated(), [])
+
+    def test_save_is_measured(self):
+        auction_document = self.database.get_auction_document(self.doc_id)
+        self.database.save_auction_document(self.make_bid(auction_document), self.doc_id)
+        self.database.flush()
+
+        stats = self.database.metrics.stats()[self.doc_id]
+        self.assertEqual(stats['save']['count'], 1)
+        self.assertEqual(stats['materialize']['count'], 1)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestDiff))
+    suite.addTest(unittest.makeSuite(TestEventSourcedCouchDB))
+    return suite
@@ -0,0 +1,207 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import gevent
+import mock
+from gevent.event import AsyncResult
+
+from openprocurement.auction.texas.database import CouchDB
+from openprocurement.auction.texas.wal import (
+    JournaledDatabase, WriteAheadJournal, prepare_journal
+)
+
+
+class TestWriteAheadJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_group_commit(self):
+        journal = WriteAheadJournal(self.path)
+        results = [journal.append('1' * 32, {'current_stage': index}) for index in range(10)]
+        for result in results:
+            self.assertTrue(result.get(timeout=1))
+        journal.close()
+
+        self.assertEqual(journal.syncs, 1)
+        self.assertEqual(journal.read(), {'1' * 32: {'current_stage': 9}})
+
+    def test_torn_record_is_ignored(self):
+        with open(self.path, 'wb') as journal_file:
+            journal_file.write(json.dumps({'id': '1' * 32, 'document': {'current_stage': 1}}) + '\n')
+            journal_file.write('{"id": "11111111111111111111111111111111", "docu')
+        journal = WriteAheadJournal(self.path)
+        self.assertEqual(journal.read(), {'1' * 32: {'current_stage': 1}})
+        journal.close()
+
+    def test_truncate(self):
+        journal = WriteAheadJournal(self.path)
+        journal.append('1' * 32, {'current_stage': 1}).get(timeout=1)
+        journal.truncate()
+        self.assertEqual(journal.read(), {})
+        journal.close()
+
+
+class TestJournaledDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = {'directory': self.directory}
+        self.path = os.path.join(self.directory, '1' * 32 + '.wal')
+        self.doc_id = '1' * 32
+        self.backend = mock.MagicMock()
+        self.backend.save_auction_document.return_value = (self.doc_id, '2-b')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_is_acknowledged_before_database_write(self):
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+        auction_document = {'_id': self.doc_id, '_rev': '1-a', 'current_stage': 1}
+
+        result = database.save_auction_document(auction_document, self.doc_id)
+        # revision is unknown until document is written to database
+        self.assertFalse(result.ready())
+        self.assertEqual(database.journal.read(), {self.doc_id: auction_document})
+        self.assertEqual(database.get_auction_document(self.doc_id), auction_document)
+        self.assertEqual(self.backend.get_auction_document.call_count, 0)
+
+        self.assertEqual(result.get(timeout=1), (self.doc_id, '2-b'))
+        self.backend.save_auction_document.assert_called_with(auction_document, self.doc_id)
+        self.assertEqual(database.journal.read(), {})
+
+    def test_only_latest_document_is_written(self):
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+        database.save_auction_document({'current_stage': 1}, self.doc_id)
+        database.save_auction_document({'current_stage': 2}, self.doc_id)
+        database.flush()
+
+        self.assertEqual(self.backend.save_auction_document.call_count, 1)
+        self.backend.save_auction_document.assert_called_with({'current_stage': 2}, self.doc_id)
+        self.assertEqual(self.backend.flush.call_count, 1)
+
+    def test_replay_on_start(self):
+        with open(self.path, 'wb') as journal_file:
+            for stage in range(3):
+                record = {'id': self.doc_id, 'document': {'_rev': '1-a', 'current_stage': stage}}
+                journal_file.write(json.dumps(record) + '\n')
+
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+
+        self.backend.save_auction_document.assert_called_once_with({'_rev': '1-a', 'current_stage': 2}, self.doc_id)
+        self.assertEqual(database.journal.read(), {})
+
+    def test_replay_to_couchdb_which_is_not_sole_writer(self):
+        with open(self.path, 'wb') as journal_file:
+            record = {'id': self.doc_id, 'document': {'_id': self.doc_id, '_rev': '1-a', 'current_stage': 2}}
+            journal_file.write(json.dumps(record) + '\n')
+
+        with mock.patch('openprocurement.auction.texas.database.Database'):
+            couchdb = CouchDB({'COUCH_DATABASE': 'http://0.0.0.0:9000/database', 'retry': {'base_delay': 0}})
+            couchdb._db.get.return_value = {'_id': self.doc_id, '_rev': '2-b', 'current_stage': 1}
+            couchdb._db.save.return_value = (self.doc_id, '3-c')
+
+            database = JournaledDatabase(couchdb, self.config, self.doc_id)
+
+        couchdb._db.save.assert_called_once_with({'_id': self.doc_id, '_rev': '2-b', 'current_stage': 2})
+        self.assertEqual(database._pending, {})
+        self.assertEqual(database.journal.read(), {})
+
+        # document journaled without revision is written too
+        database.save_auction_document({'_id': self.doc_id, 'current_stage': 3}, self.doc_id)
+        database.flush()
+        couchdb._db.save.assert_called_with({'_id': self.doc_id, '_rev': '2-b', 'current_stage': 3})
+        self.assertEqual(database._pending, {})
+
+    def test_journal_is_kept_while_database_is_unavailable(self):
+        self.backend.save_auction_document.return_value = None
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+        result = database.save_auction_document({'current_stage': 1}, self.doc_id)
+        database.flush()
+
+        self.assertEqual(database.journal.read(), {self.doc_id: {'current_stage': 1}})
+        self.assertFalse(result.ready())
+
+    def test_coalesced_write_is_waited_for(self):
+        responses = [None]
+
+        def save(public_document, auction_doc_id):
+            result = AsyncResult()
+            gevent.spawn_later(0.01, result.set, responses[0])
+            return result
+
+        self.backend.save_auction_document.side_effect = save
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+        database.save_auction_document({'current_stage': 1}, self.doc_id)
+
+        # failed write keeps record in journal
+        database.flush()
+        self.assertIn(self.doc_id, database._pending)
+        self.assertEqual(database.journal.read(), {self.doc_id: {'current_stage': 1}})
+
+        responses[0] = (self.doc_id, '2-b')
+        database.flush()
+        self.assertEqual(database._pending, {})
+        self.assertEqual(database.journal.read(), {})
+
+    def test_transition_is_applied_after_journaled_saves(self):
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+        database.save_auction_document({'current_stage': 1}, self.doc_id)
+        database.apply_transition(self.doc_id, 'increment_stage')
+
+        self.backend.save_auction_document.assert_called_with({'current_stage': 1}, self.doc_id)
+        self.backend.apply_transition.assert_called_with(self.doc_id, 'increment_stage')
+
+        database.save_auction_document({'current_stage': 2}, self.doc_id)
+        database.apply_transitions([self.doc_id], 'cancel', end_date='2018-01-01')
+
+        self.backend.save_auction_document.assert_called_with({'current_stage': 2}, self.doc_id)
+        self.backend.apply_transitions.assert_called_with([self.doc_id], 'cancel', end_date='2018-01-01')
+
+    def test_prepare_journal(self):
+        self.assertIs(prepare_journal(self.backend, {}, self.doc_id), self.backend)
+        database = prepare_journal(self.backend, {'journal': self.config}, self.doc_id)
+        self.assertIsInstance(database, JournaledDatabase)
+        self.assertEqual(database.journal.path, self.path)
+
+    def test_journals_of_auctions_sharing_directory(self):
+        other_id = '2' * 32
+        # database is unavailable for the first auction only
+        self.backend.save_auction_document.side_effect = lambda document, auction_doc_id: (
+            None if auction_doc_id == self.doc_id else (auction_doc_id, '2-b')
+        )
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+        other = JournaledDatabase(self.backend, self.config, other_id)
+        database.save_auction_document({'current_stage': 1}, self.doc_id)
+
+        # the other worker has nothing pending and truncates only its journal
+        other.save_auction_document({'current_stage': 2}, other_id)
+        other.flush()
+        self.assertEqual(other.journal.read(), {})
+        self.assertEqual(database.journal.read(), {self.doc_id: {'current_stage': 1}})
+        database.journal.close()
+
+        # restarted worker replays only its own auction
+        self.backend.save_auction_document.reset_mock()
+        JournaledDatabase(self.backend, self.config, self.doc_id)
+        self.backend.save_auction_document.assert_called_once_with({'current_stage': 1}, self.doc_id)
+
+    def test_other_documents_are_not_journaled(self):
+        database = JournaledDatabase(self.backend, self.config, self.doc_id)
+
+        self.assertEqual(database.save_auction_document({'current_stage': 1}, '2' * 32), (self.doc_id, '2-b'))
+        self.assertEqual(database.journal.read(), {})
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestWriteAheadJournal))
+    suite.addTest(unittest.makeSuite(TestJournaledDatabase))
+    return suite
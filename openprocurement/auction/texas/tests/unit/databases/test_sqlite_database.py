@@ -0,0 +1,154 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import gevent
+import mock
+
+from openprocurement.auction.texas.sqlite_database import SQLite
+from openprocurement.auction.texas.state import AuctionState, StageRecord
+
+
+class TestSQLiteDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = {'SQLITE_DATABASE': os.path.join(self.directory, 'auctions.sqlite')}
+        self.database = SQLite(self.config)
+        self.doc_id = '1' * 32
+        self.auction_document = {
+            '_id': self.doc_id,
+            'current_stage': 0,
+            'stages': [{'start': '2018-01-01T10:00:00', 'type': 'pause'}],
+        }
+
+    def tearDown(self):
+        self.database._connection.close()
+        shutil.rmtree(self.directory)
+
+    def test_wal_mode(self):
+        mode = self.database._connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_missing_document(self):
+        self.assertEqual(self.database.get_auction_document(self.doc_id), {})
+
+    def test_save_and_get(self):
+        response = self.database.save_auction_document(self.auction_document, self.doc_id)
+
+        self.assertEqual(response[0], self.doc_id)
+        self.assertTrue(response[1].startswith('1-'))
+        self.assertEqual(self.auction_document['_rev'], response[1])
+        self.assertEqual(self.database.get_auction_document(self.doc_id), self.auction_document)
+
+    def test_revision_is_incremented(self):
+        _, first_rev = self.database.save_auction_document(self.auction_document, self.doc_id)
+        self.auction_document['current_stage'] = 1
+        _, second_rev = self.database.save_auction_document(self.auction_document, self.doc_id)
+
+        self.assertTrue(second_rev.startswith('2-'))
+        self.assertNotEqual(first_rev, second_rev)
+
+    def test_save_state(self):
+        state = AuctionState.from_document(self.auction_document)
+        state['stages'].append(StageRecord(start='2018-01-01T10:00:10', type='english'))
+        self.database.save_auction_document(state, self.doc_id)
+
+        document = self.database.get_auction_document(self.doc_id)
+        self.assertEqual(document['stages'][1], {'start': '2018-01-01T10:00:10', 'type': 'english'})
+
+    def test_document_is_shared_between_connections(self):
+        self.database.save_auction_document(self.auction_document, self.doc_id)
+        other = SQLite(self.config)
+        self.assertEqual(other.get_auction_document(self.doc_id), self.auction_document)
+        other._connection.close()
+
+    def test_apply_transition(self):
+        self.database.save_auction_document(self.auction_document, self.doc_id)
+
+        rev = self.database.apply_transition(self.doc_id, 'increment_stage')
+
+        document = self.database.get_auction_document(self.doc_id)
+        self.assertEqual(document['current_stage'], 1)
+        self.assertEqual(document['_rev'], rev)
+        self.assertIsNone(self.database.apply_transition('2' * 32, 'increment_stage'))
+
+    def test_apply_transitions(self):
+        self.database.save_auction_document(self.auction_document, self.doc_id)
+        other_doc_id = '2' * 32
+        self.database.save_auction_document(dict(self.auction_document, _id=other_doc_id), other_doc_id)
+
+        revisions = self.database.apply_transitions(
+            [self.doc_id, other_doc_id, '3' * 32], 'cancel', end_date='2018-01-01T12:00:00'
+        )
+
+        self.assertIsNone(revisions['3' * 32])
+        for auction_doc_id in (self.doc_id, other_doc_id):
+            document = self.database.get_auction_document(auction_doc_id)
+            self.assertEqual(document['current_stage'], -100)
+            self.assertEqual(document['endDate'], '2018-01-01T12:00:00')
+            self.assertEqual(document['_rev'], revisions[auction_doc_id])
+
+    def test_query_auctions(self):
+        for index in range(5):
+            auction_document = dict(self.auction_document, _id=str(index) * 32, current_stage=-101 if index % 2 else 0)
+            self.database.save_auction_document(auction_document, auction_document['_id'])
+
+        rows, bookmark = self.database.query_auctions('current_stage', start_key=-101, end_key=-101, limit=1)
+        self.assertEqual(rows, [(-101, '1' * 32)])
+        self.assertEqual(bookmark, [-101, '3' * 32])
+        rows, bookmark = self.database.query_auctions('current_stage', end_key=-101, limit=1, bookmark=bookmark)
+        self.assertEqual(rows, [(-101, '3' * 32)])
+        self.assertIsNone(bookmark)
+
+        self.database.apply_transition('1' * 32, 'increment_stage')
+        rows, _ = self.database.query_auctions('start', start_key='2018-01-01T09:00:00', end_key='2018-01-01T10:00:00')
+        self.assertEqual(len(rows), 5)
+        rows, _ = self.database.query_auctions('current_stage', start_key=-101, end_key=-101)
+        self.assertEqual(rows, [(-101, '3' * 32)])
+        self.assertRaises(AttributeError, self.database.query_auctions, 'title')
+
+    def test_existing_documents_are_indexed(self):
+        self.database.save_auction_document(self.auction_document, self.doc_id)
+        self.database._connection.execute('DELETE FROM auction_index')
+
+        other = SQLite(self.config)
+        self.assertEqual(other.query_auctions('current_stage'), ([(0, self.doc_id)], None))
+        other._connection.close()
+
+    def test_failed_commit_is_rolled_back(self):
+        connection = self.database._connection
+        failures = ['COMMIT']
+
+        def execute(sql, *args):
+            if sql in failures:
+                failures.remove(sql)
+                raise sqlite3.OperationalError('disk I/O error')
+            return connection.execute(sql, *args)
+        self.database._connection = mock.MagicMock(wraps=connection)
+        self.database._connection.execute.side_effect = execute
+        self.database.retry_delay = 0
+
+        response = self.database.save_auction_document(self.auction_document, self.doc_id)
+
+        self.database._connection = connection
+        self.assertTrue(response[1].startswith('1-'))
+        self.assertEqual(self.database.get_auction_document(self.doc_id), self.auction_document)
+
+    def test_locked_database_is_waited_for_in_loop(self):
+        locker = sqlite3.connect(self.config['SQLITE_DATABASE'], isolation_level=None)
+        locker.execute('BEGIN IMMEDIATE')
+        released = gevent.spawn_later(0.15, locker.execute, 'ROLLBACK')
+
+        response = self.database.save_auction_document(self.auction_document, self.doc_id)
+
+        self.assertTrue(released.successful())
+        self.assertTrue(response[1].startswith('1-'))
+        locker.close()
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestSQLiteDatabase))
+    return suite
@@ -3,6 +3,7 @@ import mock
 
 from uuid import uuid4
 
+from openprocurement.auction.texas.bidders import BidderRegistry
 from openprocurement.auction.texas.datasource import OpenProcurementAPIDataSource
 
 
@@ -926,6 +927,21 @@ class TestSetParticipationUrls(TestOpenProcurementAPIDataSource):
             session=self.session
         )
 
+    def test_hashes_are_cached_in_registry(self):
+        external_data = {
+            'data': {
+                'bids': [{'id': '1' * 32, 'status': 'active'}]
+            }
+        }
+        registry = BidderRegistry()
+        registry.update(external_data['data']['bids'])
+
+        self.datasource.set_participation_urls(external_data, registry)
+        self.datasource.set_participation_urls(external_data, registry)
+
+        self.assertEqual(self.mock_calculate_hash.call_count, 1)
+        self.assertEqual(self.mock_make_request.call_count, 2)
+
 
 def suite():
     suite = unittest.TestSuite()
@@ -0,0 +1,69 @@
+import unittest
+
+from openprocurement.auction.texas.datasource import (
+    AUCTION_DATA_PROJECTION, project
+)
+
+
+class TestProject(unittest.TestCase):
+
+    def setUp(self):
+        self.auction_data = {
+            'data': {
+                'id': '1' * 32,
+                'auctionID': 'UA-EA-2018-01-01-000001',
+                'title': 'Auction',
+                'title_en': 'Auction',
+                'description': 'Description',
+                'auctionPeriod': {'startDate': '2018-01-01T10:00:00+02:00', 'shouldStartAfter': '2017-12-31'},
+                'value': {'amount': 1000, 'currency': 'UAH'},
+                'minimalStep': {'amount': 10, 'currency': 'UAH'},
+                'items': [{'id': '2' * 32, 'description': 'Item'}],
+                'documents': [{'id': '3' * 32, 'url': 'http://example.com/document'}],
+                'questions': [{'id': '4' * 32}],
+                'bids': [
+                    {
+                        'id': '5' * 32,
+                        'date': '2017-12-31T10:00:00+02:00',
+                        'status': 'active',
+                        'owner': 'broker',
+                        'value': {'amount': 1000, 'currency': 'UAH'},
+                        'tenderers': [{'name': 'Participant'}],
+                        'documents': [{'id': '6' * 32}],
+                    },
+                    {'id': '7' * 32, 'status': 'invalid'},
+                ],
+            }
+        }
+
+    def test_unused_fields_are_dropped(self):
+        data = project(self.auction_data, AUCTION_DATA_PROJECTION)['data']
+
+        self.assertNotIn('documents', data)
+        self.assertNotIn('questions', data)
+        self.assertEqual(data['auctionPeriod'], {'startDate': '2018-01-01T10:00:00+02:00'})
+        self.assertEqual(data['items'], self.auction_data['data']['items'])
+        self.assertEqual(data['title_en'], 'Auction')
+
+    def test_every_bid_is_projected(self):
+        bids = project(self.auction_data, AUCTION_DATA_PROJECTION)['data']['bids']
+
+        self.assertEqual(bids, [
+            {
+                'id': '5' * 32,
+                'date': '2017-12-31T10:00:00+02:00',
+                'status': 'active',
+                'owner': 'broker',
+                'value': {'amount': 1000, 'currency': 'UAH'},
+            },
+            {'id': '7' * 32, 'status': 'invalid'},
+        ])
+
+    def test_missing_fields_are_skipped(self):
+        self.assertEqual(project({'data': {}}, AUCTION_DATA_PROJECTION), {'data': {}})
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestProject))
+    return suite
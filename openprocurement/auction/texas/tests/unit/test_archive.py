@@ -0,0 +1,68 @@
+import unittest
+from base64 import b64decode
+
+from openprocurement.auction.texas.archive import (
+    ARCHIVE_ATTACHMENT,
+    archive_offset,
+    join_stages,
+    pack_stages,
+    split_stages,
+    unpack_stages,
+)
+from openprocurement.auction.texas.state import StageRecord
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.stages = [
+            {'start': '2018-01-01T10:00:{:02d}'.format(index), 'type': 'pause'}
+            for index in range(30)
+        ]
+        self.auction_document = {'current_stage': 25, 'stages': self.stages}
+
+    def test_pack_and_unpack(self):
+        stages = self.stages[:2] + [StageRecord(start='2018-01-01T10:01:00', type='english')]
+        self.assertEqual(unpack_stages(pack_stages(stages)), self.stages[:2] + [
+            {'start': '2018-01-01T10:01:00', 'type': 'english'}
+        ])
+
+    def test_archive_offset_by_count(self):
+        self.assertEqual(archive_offset(self.auction_document, 0, max_stages=40), 0)
+        self.assertEqual(archive_offset(self.auction_document, 0, max_stages=20, keep=5), 20)
+        # inline part is short after archival
+        self.assertEqual(archive_offset(self.auction_document, 20, max_stages=20, keep=5), 20)
+
+    def test_archive_offset_by_size(self):
+        self.assertEqual(archive_offset(self.auction_document, 0, max_size=10 ** 6), 0)
+        self.assertEqual(archive_offset(self.auction_document, 0, max_size=100, keep=5), 20)
+
+    def test_not_started_auction_is_not_archived(self):
+        self.auction_document['current_stage'] = -1
+        self.assertEqual(archive_offset(self.auction_document, 0, max_stages=1), 0)
+
+    def test_split_and_join(self):
+        public_document = dict(self.auction_document)
+        split_stages(public_document, 0, 20)
+
+        self.assertEqual(public_document['stages'], self.stages[20:])
+        self.assertEqual(public_document['stages_offset'], 20)
+        attachment = public_document['_attachments'][ARCHIVE_ATTACHMENT]
+        archived_stages = unpack_stages(b64decode(attachment['data']))
+        self.assertEqual(archived_stages, self.stages[:20])
+        self.assertEqual(self.auction_document['stages'], self.stages)
+
+        join_stages(public_document, archived_stages)
+        self.assertEqual(public_document['stages'], self.stages)
+        self.assertNotIn('stages_offset', public_document)
+
+    def test_unchanged_archive_is_not_uploaded(self):
+        public_document = dict(self.auction_document)
+        split_stages(public_document, 20, 20)
+        self.assertEqual(public_document['_attachments'], {ARCHIVE_ATTACHMENT: {'stub': True}})
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestArchive))
+    return suite
@@ -0,0 +1,68 @@
+import unittest
+
+from openprocurement.auction.texas.bidders import BidderRegistry
+
+
+class TestBidderRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = BidderRegistry()
+        self.bids = [
+            {'id': '1' * 32, 'status': 'active'},
+            {'id': '2' * 32, 'status': 'invalid'},
+            {'id': '3' * 32},
+        ]
+        self.registry.update(self.bids)
+
+    def test_numbers(self):
+        self.assertEqual(len(self.registry), 3)
+        self.assertEqual(self.registry.number('1' * 32), 1)
+        self.assertIsNone(self.registry.number('2' * 32))
+        self.assertEqual(self.registry.number('3' * 32), 2)
+        self.assertEqual(self.registry.numbers(), {'1' * 32: 1, '3' * 32: 2})
+
+    def test_numbers_are_kept_between_updates(self):
+        self.bids[0]['status'] = 'invalid'
+        self.bids[1]['status'] = 'active'
+        self.registry.update(self.bids + [{'id': '4' * 32, 'status': 'active'}])
+
+        self.assertEqual(self.registry.numbers(), {'1' * 32: 1, '2' * 32: 3, '3' * 32: 2, '4' * 32: 4})
+        self.assertFalse(self.registry.is_active('1' * 32))
+        self.assertTrue(self.registry.is_active('2' * 32))
+
+    def test_add_with_number(self):
+        registry = BidderRegistry()
+        registry.add('3' * 32, number=2)
+        registry.add('1' * 32)
+
+        self.assertEqual(registry.numbers(), {'3' * 32: 2, '1' * 32: 3})
+
+    def test_unknown_bidder(self):
+        self.assertNotIn('5' * 32, self.registry)
+        self.assertFalse(self.registry.is_active('5' * 32))
+        self.assertEqual(self.registry.number('5' * 32, False), False)
+
+    def test_participation_hash_is_computed_once(self):
+        calls = []
+
+        def hash_function(bidder_id, hash_secret):
+            calls.append(bidder_id)
+            return bidder_id + hash_secret
+
+        self.assertEqual(self.registry.participation_hash('1' * 32, 'secret', hash_function), '1' * 32 + 'secret')
+        self.assertEqual(self.registry.participation_hash('1' * 32, 'secret', hash_function), '1' * 32 + 'secret')
+        self.assertEqual(calls, ['1' * 32])
+
+    def test_participation_hash_depends_on_secret(self):
+        def hash_function(bidder_id, hash_secret):
+            return bidder_id + hash_secret
+
+        self.assertEqual(self.registry.participation_hash('1' * 32, 'secret', hash_function), '1' * 32 + 'secret')
+        self.assertEqual(self.registry.participation_hash('1' * 32, 'other', hash_function), '1' * 32 + 'other')
+        self.assertRaises(KeyError, self.registry.participation_hash, '5' * 32, 'secret', hash_function)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestBidderRegistry))
+    return suite
@@ -0,0 +1,59 @@
+import unittest
+
+from openprocurement.auction.texas.header import (
+    HEADER_ID,
+    header_digest,
+    join_header,
+    split_header,
+)
+
+
+class TestHeader(unittest.TestCase):
+
+    def setUp(self):
+        self.doc_id = '1' * 32
+        self.auction_document = {
+            '_id': self.doc_id,
+            'current_stage': 0,
+            'procuringEntity': {'name': 'Entity'},
+            'description': 'Auction',
+            'description_ru': 'Auction',
+        }
+
+    def test_split_and_join(self):
+        public_document = dict(self.auction_document)
+
+        header = split_header(public_document, self.doc_id)
+
+        self.assertEqual(header, {
+            'procuringEntity': {'name': 'Entity'},
+            'description': 'Auction',
+            'description_ru': 'Auction',
+        })
+        self.assertEqual(public_document, {
+            '_id': self.doc_id,
+            'current_stage': 0,
+            'header_id': HEADER_ID.format(self.doc_id),
+        })
+
+        join_header(public_document, header)
+        self.assertEqual(public_document, self.auction_document)
+
+    def test_document_without_static_fields(self):
+        public_document = {'_id': self.doc_id, 'current_stage': 0}
+
+        self.assertEqual(split_header(public_document, self.doc_id), {})
+        self.assertNotIn('header_id', public_document)
+
+    def test_digest(self):
+        header = split_header(dict(self.auction_document), self.doc_id)
+        digest = header_digest(header)
+        self.assertEqual(header_digest(dict(header)), digest)
+        header['description_ru'] = 'Other'
+        self.assertNotEqual(header_digest(header), digest)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestHeader))
+    return suite
@@ -0,0 +1,82 @@
+import unittest
+
+from openprocurement.auction.texas.journal import AUCTION_WORKER_DB_GET_DOC
+from openprocurement.auction.texas.metrics import DatabaseMetrics, Histogram
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(Histogram().summary(), {
+            'count': 0, 'mean': 0, 'p50': 0, 'p90': 0, 'p99': 0, 'max': 0
+        })
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.record(value / 1000.0)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.max, 1)
+        self.assertAlmostEqual(histogram.summary()['mean'], 0.5005)
+        for percent in (50, 90, 99):
+            value = histogram.percentile(percent)
+            self.assertGreaterEqual(value, percent / 100.0)
+            self.assertLessEqual(value, percent / 100.0 * (1 + 1.0 / Histogram.SUB_BUCKETS))
+        self.assertEqual(histogram.percentile(100), 1)
+
+    def test_zeros(self):
+        histogram = Histogram()
+        histogram.record(0)
+        histogram.record(0)
+        histogram.record(10)
+
+        self.assertEqual(histogram.percentile(50), 0)
+        self.assertEqual(histogram.percentile(99), 10)
+
+
+class TestDatabaseMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = DatabaseMetrics()
+        self.doc_id = '1' * 32
+
+    def test_stats(self):
+        with self.metrics.measure('get', self.doc_id):
+            pass
+        self.metrics.record('bytes_written', self.doc_id, 1024)
+        self.metrics.increment('retries', self.doc_id)
+        self.metrics.increment('retries', self.doc_id)
+
+        stats = self.metrics.stats()[self.doc_id]
+        self.assertEqual(stats['get']['count'], 1)
+        self.assertEqual(stats['get']['message_id'], str(AUCTION_WORKER_DB_GET_DOC))
+        self.assertEqual(stats['bytes_written']['max'], 1024)
+        self.assertEqual(stats['retries'], {'count': 2, 'message_id': stats['retries']['message_id']})
+
+    def test_failed_operation_is_measured(self):
+        with self.assertRaises(ValueError):
+            with self.metrics.measure('save', self.doc_id):
+                raise ValueError
+
+        self.assertEqual(self.metrics.stats()[self.doc_id]['save']['count'], 1)
+
+    def test_report(self):
+        self.metrics.record('save', self.doc_id, 0.02)
+        self.metrics.record('bytes_written', self.doc_id, 2048)
+        self.metrics.increment('conflicts', self.doc_id)
+
+        lines = self.metrics.report().split('\n')
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0].split(), ['auction', 'operation', 'count', 'mean', 'p50', 'p90', 'p99', 'max'])
+        self.assertEqual(lines[1].split()[:4], [self.doc_id, 'bytes_written', '1', '2048.000'])
+        self.assertEqual(lines[2].split()[:4], [self.doc_id, 'save', '1', '20.000'])
+        self.assertEqual(lines[3].split(), [self.doc_id, 'conflicts', '1'])
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestHistogram))
+    suite.addTest(unittest.makeSuite(TestDatabaseMetrics))
+    return suite
@@ -0,0 +1,39 @@
+import unittest
+
+from openprocurement.auction.texas.queries import INDEXES, VIEWS, index_keys, query_rows
+
+
+class TestQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.auction_document = {
+            'current_stage': -101,
+            'stages': [{'start': '2018-01-01T10:00:00', 'type': 'pause'}],
+            'procurementMethodType': 'dgfInsider',
+        }
+
+    def test_every_index_has_view(self):
+        self.assertEqual(sorted(INDEXES), sorted(VIEWS))
+
+    def test_index_keys(self):
+        self.assertEqual(index_keys(self.auction_document), {
+            'current_stage': -101,
+            'start': '2018-01-01T10:00:00',
+            'procurement_method_type': 'dgfInsider',
+        })
+        self.auction_document['stages_offset'] = 20
+        self.assertNotIn('start', index_keys(self.auction_document))
+
+    def test_query_rows(self):
+        rows = [(0, '3'), (-101, '2'), (-101, '1'), (-100, '4')]
+
+        self.assertEqual(query_rows(rows, -101, -101), ([(-101, '1'), (-101, '2')], None))
+        self.assertEqual(query_rows(rows, limit=1), ([(-101, '1')], [-101, '2']))
+        self.assertEqual(query_rows(rows, start_key=-100, limit=1, bookmark=[-101, '2']), ([(-101, '2')], [-100, '4']))
+        self.assertEqual(query_rows(rows, start_key=1), ([], None))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestQueries))
+    return suite
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+from copy import deepcopy
+
+import gevent
+from gevent.event import AsyncResult
+
+from openprocurement.auction.texas.bidders import BidderRegistry
+from openprocurement.auction.texas.context import DictContext, SnapshotContext
+from openprocurement.auction.texas.recovery import (
+    ContextSnapshotter, prepare_snapshotter
+)
+from openprocurement.auction.texas.state import AuctionState, StageRecord
+from openprocurement.auction.texas.utils import keep_saved_rev
+
+
+class TestContextSnapshotter(unittest.TestCase):
+    context_class = DictContext
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'auction.json')
+        self.context = self.context_class({})
+        self.auction_document = {
+            '_id': '1' * 32,
+            '_rev': '1-a',
+            'current_stage': 0,
+            'stages': [{'type': 'pause', 'start': '2018-01-01T10:00:00'}],
+        }
+        self.context['auction_document'] = AuctionState.from_document(deepcopy(self.auction_document))
+        self.context['auction_data'] = {'data': {'id': '1' * 32}}
+        self.context['auction_protocol'] = {'timeline': {}}
+        self.context['bidders_data'] = [{'id': '2' * 32}]
+        self.context['bids_mapping'] = {'2' * 32: 1}
+        self.registry = BidderRegistry()
+        self.registry.add('2' * 32)
+        self.registry.add('3' * 32, active=False)
+        self.context['bidder_registry'] = self.registry
+        self.context['saved_rev'] = '1-a'
+        self.snapshotter = ContextSnapshotter(self.context, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dump_and_load(self):
+        self.assertTrue(self.snapshotter.dump())
+
+        snapshot = ContextSnapshotter(self.context, self.path).load()
+        self.assertEqual(snapshot['auction_document'], self.auction_document)
+        self.assertEqual(snapshot['bids_mapping'], {'2' * 32: 1})
+        self.assertEqual(snapshot['bidders_data'], [{'id': '2' * 32}])
+        self.assertEqual(snapshot['saved_rev'], '1-a')
+        self.assertEqual(snapshot['bidder_registry'], {
+            '2' * 32: {'number': 1, 'active': True},
+            '3' * 32: {'active': False},
+        })
+        self.assertEqual(os.listdir(self.directory), ['auction.json'])
+
+    def test_unchanged_context_is_not_dumped(self):
+        self.snapshotter.dump()
+        self.assertFalse(self.snapshotter.dump())
+
+        auction_document = self.context['auction_document']
+        auction_document['stages'].append(StageRecord(type='english', amount=100))
+        self.context['auction_document'] = auction_document
+
+        self.assertTrue(self.snapshotter.dump())
+        snapshot = self.snapshotter.load()
+        self.assertEqual(snapshot['auction_document']['stages'][1], {'type': 'english', 'amount': 100})
+
+    def test_load_missing_or_incomplete_snapshot(self):
+        self.assertIsNone(self.snapshotter.load())
+
+        with open(self.path, 'w') as snapshot_file:
+            snapshot_file.write('{"auction_document": {')
+        self.assertIsNone(self.snapshotter.load())
+
+        with open(self.path, 'w') as snapshot_file:
+            snapshot_file.write('{"auction_document": {}}')
+        self.assertIsNone(self.snapshotter.load())
+
+    def test_bidder_registry_is_restored(self):
+        self.snapshotter.dump()
+
+        registry = BidderRegistry()
+        registry.load(self.snapshotter.load()['bidder_registry'])
+
+        self.assertEqual(registry.numbers(), {'2' * 32: 1})
+        self.assertFalse(registry.is_active('3' * 32))
+        registry.add('4' * 32)
+        self.assertEqual(registry.number('4' * 32), 2)
+
+    def test_saved_rev(self):
+        keep_saved_rev(self.context, ('1' * 32, '2-b'))
+        self.assertEqual(self.context['saved_rev'], '2-b')
+
+        keep_saved_rev(self.context, None)
+        self.assertEqual(self.context['saved_rev'], '2-b')
+
+        # revision of coalesced save is known once it is written
+        future = AsyncResult()
+        keep_saved_rev(self.context, future)
+        self.assertEqual(self.context['saved_rev'], '2-b')
+        future.set(('1' * 32, '3-c'))
+        gevent.sleep(0)
+        self.assertEqual(self.context['saved_rev'], '3-c')
+
+    def test_remove(self):
+        self.snapshotter.dump()
+        self.snapshotter.remove()
+
+        self.assertFalse(os.path.exists(self.path))
+        self.snapshotter.remove()
+
+    def test_prepare_snapshotter(self):
+        self.assertIsNone(prepare_snapshotter(self.context, None, '1' * 32))
+        self.assertIsNone(prepare_snapshotter(self.context, {}, '1' * 32))
+
+        snapshotter = prepare_snapshotter(
+            self.context, {'directory': self.directory, 'interval': 5}, '1' * 32
+        )
+        self.assertEqual(snapshotter.path, os.path.join(self.directory, '1' * 32 + '.json'))
+        self.assertEqual(snapshotter.interval, 5)
+
+
+class TestSnapshotContextSnapshotter(TestContextSnapshotter):
+    context_class = SnapshotContext
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestContextSnapshotter))
+    suite.addTest(unittest.makeSuite(TestSnapshotContextSnapshotter))
+    return suite
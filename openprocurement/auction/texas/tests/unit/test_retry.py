@@ -0,0 +1,82 @@
+import unittest
+import mock
+
+from openprocurement.auction.texas.retry import CircuitBreaker, RetryPolicy
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        breaker.failure()
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_after_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        with mock.patch('openprocurement.auction.texas.retry.time', return_value=100):
+            breaker.failure()
+        with mock.patch('openprocurement.auction.texas.retry.time', return_value=131):
+            self.assertTrue(breaker.allow())
+            breaker.failure()
+            self.assertFalse(breaker.allow())
+            breaker.success()
+            self.assertTrue(breaker.allow())
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_delay_grows_exponentially(self):
+        policy = RetryPolicy(base_delay=0.1, multiplier=2, max_delay=1, jitter=0)
+        self.assertEqual([policy.delay(attempt) for attempt in range(1, 6)], [0.1, 0.2, 0.4, 0.8, 1])
+
+    def test_jitter(self):
+        policy = RetryPolicy(base_delay=1, jitter=0.5)
+        with mock.patch('openprocurement.auction.texas.retry.random', return_value=0.5):
+            self.assertEqual(policy.delay(1), 0.75)
+
+    @mock.patch('openprocurement.auction.texas.retry.gevent.sleep')
+    def test_attempts(self, sleep):
+        policy = RetryPolicy(retries=4, base_delay=1, jitter=0)
+        self.assertEqual(list(policy.attempts()), [0, 1, 2, 3])
+        self.assertEqual(sleep.call_args_list, [mock.call(1), mock.call(2), mock.call(4)])
+
+    def test_deadline(self):
+        clock = [0]
+
+        def sleep(delay):
+            clock[0] += delay
+
+        policy = RetryPolicy(retries=10, base_delay=1, jitter=0, deadline=5)
+        with mock.patch('openprocurement.auction.texas.retry.gevent.sleep', sleep), \
+                mock.patch('openprocurement.auction.texas.retry.time', lambda: clock[0]):
+            self.assertEqual(list(policy.attempts()), [0, 1, 2])
+        self.assertEqual(clock[0], 3)
+
+    def test_open_breaker_stops_attempts(self):
+        policy = RetryPolicy(retries=10, base_delay=0, breaker=CircuitBreaker(failure_threshold=2))
+        attempts = []
+        for attempt in policy.attempts():
+            attempts.append(attempt)
+            policy.breaker.failure()
+        self.assertEqual(attempts, [0, 1])
+        self.assertEqual(list(policy.attempts()), [])
+
+    def test_from_config(self):
+        policy = RetryPolicy.from_config({'base_delay': 0, 'failure_threshold': 5}, retries=3)
+        self.assertEqual(policy.retries, 3)
+        self.assertEqual(policy.base_delay, 0)
+        self.assertEqual(policy.breaker.failure_threshold, 5)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestCircuitBreaker))
+    suite.addTest(unittest.makeSuite(TestRetryPolicy))
+    return suite
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from couchdb import json as couchdb_json
+
+from openprocurement.auction.texas.serialization import CODECS, encoded_size, use_codec
+from openprocurement.auction.texas.state import AuctionState, LABELS
+from openprocurement.auction.texas.structures import draft, freeze
+
+
+class TestJSONCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.auction_document = {
+            '_id': '1' * 32,
+            'current_stage': 1,
+            'stages': [
+                {'start': '2018-01-01T10:00:00', 'type': 'pause'},
+                {'start': '2018-01-01T10:00:10', 'type': 'english', 'amount': 100.5, 'label': LABELS[1]},
+            ],
+            'results': [{'bidder_id': '2' * 32, 'amount': 100.5, 'time': '2018-01-01T10:00:15'}],
+            'title': u'Аукціон',
+        }
+        # labels are byte strings, they are decoded back as unicode
+        self.decoded_document = json.loads(json.dumps(self.auction_document))
+
+    def test_state_is_encoded_without_conversion(self):
+        encode, decode = CODECS['json']()
+        state = AuctionState.from_document(self.auction_document)
+        self.assertEqual(json.loads(encode(state)), self.decoded_document)
+
+    def test_copy_on_write_document_is_encoded(self):
+        encode, decode = CODECS['json']()
+        auction_document = draft(freeze(AuctionState.from_document(self.auction_document)))
+        auction_document['current_stage'] = 0
+        self.assertEqual(json.loads(encode(auction_document)), dict(self.decoded_document, current_stage=0))
+
+    def test_unknown_value(self):
+        encode, decode = CODECS['json']()
+        with self.assertRaises(TypeError):
+            encode({'value': object()})
+
+    def test_use_codec(self):
+        use_codec('json')
+        state = AuctionState.from_document(self.auction_document)
+        self.assertEqual(couchdb_json.decode(couchdb_json.encode(state)), self.decoded_document)
+
+        with self.assertRaises(AttributeError):
+            use_codec('unknown')
+
+    def test_encoded_size(self):
+        use_codec('json')
+        body = couchdb_json.encode(self.auction_document)
+        self.assertEqual(encoded_size(), len(body))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestJSONCodec))
+    return suite
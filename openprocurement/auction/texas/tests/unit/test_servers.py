@@ -1,12 +1,42 @@
+import json
 import unittest
+import mock
+from flask import Flask
+
+from openprocurement.auction.texas import views
+from openprocurement.auction.texas.metrics import DatabaseMetrics
 
 
 class TestFlaskApplication(unittest.TestCase):
     pass
 
 
+class TestDatabaseStats(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.add_url_rule('/database_stats', 'database_stats', views.database_stats)
+        database = mock.MagicMock(metrics=DatabaseMetrics())
+        database.metrics.increment('retries', '1' * 32)
+        self.app.gsm = mock.MagicMock()
+        self.app.gsm.queryUtility.return_value = database
+        self.client = self.app.test_client()
+
+    def test_disabled_by_default(self):
+        self.assertEqual(self.client.get('/database_stats').status_code, 404)
+
+    def test_enabled_in_config(self):
+        self.app.config['DATABASE_STATS'] = True
+
+        response = self.client.get('/database_stats')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['1' * 32]['retries']['count'], 1)
+
+
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(TestFlaskApplication))
+    suite.addTest(unittest.makeSuite(TestDatabaseStats))
 
     return suite
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+from copy import deepcopy
+
+from yaml import safe_dump
+
+from openprocurement.auction.texas.state import (
+    AuctionState, BidderLabels, ResultRecord, StageRecord, to_document
+)
+from openprocurement.auction.texas.structures import (
+    ReadOnlyError, draft, freeze
+)
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.stage = StageRecord(start='2018-01-01T10:00:10', type='english', amount=100)
+
+    def test_dictionary_interface(self):
+        self.assertEqual(self.stage['type'], 'english')
+        self.assertEqual(self.stage.get('time', ''), '')
+        self.assertNotIn('time', self.stage)
+        self.assertEqual(len(self.stage), 3)
+        self.assertEqual(self.stage, {'start': '2018-01-01T10:00:10', 'type': 'english', 'amount': 100})
+        with self.assertRaises(KeyError):
+            self.stage['time']
+
+    def test_update_with_result(self):
+        result = ResultRecord(bidder_id='1' * 32, time='2018-01-01T10:00:20', amount=200)
+        self.stage.update(result)
+
+        self.assertEqual(self.stage['amount'], 200)
+        self.assertEqual(self.stage['bidder_id'], '1' * 32)
+
+    def test_unknown_key(self):
+        with self.assertRaises(KeyError):
+            self.stage['unknown'] = 1
+
+    def test_from_mapping(self):
+        stage = StageRecord.from_mapping({'start': '2018-01-01T10:00:00', 'type': 'pause'})
+        self.assertIsInstance(stage, StageRecord)
+
+        stage = {'start': '2018-01-01T10:00:00', 'type': 'pause', 'unknown': 1}
+        self.assertIs(StageRecord.from_mapping(stage), stage)
+
+    def test_empty_record_is_false(self):
+        self.assertFalse(StageRecord())
+
+    def test_freeze_and_draft(self):
+        frozen = freeze(self.stage)
+        with self.assertRaises(ReadOnlyError):
+            frozen['amount'] = 200
+        self.assertIs(freeze(frozen), frozen)
+
+        stage = draft(frozen)
+        stage['amount'] = 200
+        self.assertEqual(frozen['amount'], 100)
+
+    def test_deepcopy(self):
+        stage = deepcopy(self.stage)
+        stage['amount'] = 200
+
+        self.assertIsInstance(stage, StageRecord)
+        self.assertEqual(self.stage['amount'], 100)
+
+
+class TestBidderLabels(unittest.TestCase):
+
+    def test_labels_are_interned(self):
+        labels = BidderLabels()
+
+        self.assertIs(labels[1], labels[1])
+        self.assertIsNot(labels[1], labels[2])
+        self.assertEqual(len(labels), 2)
+        self.assertEqual(labels[1], {'en': 'Bidder #1', 'uk': 'Учасник №1', 'ru': 'Участник №1'})
+
+    def test_labels_are_read_only(self):
+        with self.assertRaises(ReadOnlyError):
+            BidderLabels()[1]['en'] = 'Bidder'
+
+
+class TestAuctionState(unittest.TestCase):
+
+    def setUp(self):
+        self.auction_document = {
+            '_id': '1' * 32,
+            'current_stage': 1,
+            'stages': [
+                {'start': '2018-01-01T10:00:00', 'type': 'pause'},
+                {'start': '2018-01-01T10:00:10', 'type': 'english', 'amount': 100,
+                 'bidder_id': '2' * 32, 'time': '2018-01-01T10:00:15',
+                 'label': {'en': 'Bidder #1', 'uk': 'Bidder #1', 'ru': 'Bidder #1'}},
+            ],
+            'results': [
+                {'bidder_id': '2' * 32, 'time': '2018-01-01T10:00:15', 'amount': 100,
+                 'label': {'en': 'Bidder #1', 'uk': 'Bidder #1', 'ru': 'Bidder #1'}},
+            ],
+            'initial_bids': [],
+        }
+
+    def test_from_document(self):
+        state = AuctionState.from_document(deepcopy(self.auction_document))
+
+        self.assertIsInstance(state['stages'][0], StageRecord)
+        self.assertIsInstance(state['results'][0], ResultRecord)
+        self.assertEqual(state, self.auction_document)
+
+    def test_to_document(self):
+        state = AuctionState.from_document(deepcopy(self.auction_document))
+        state['stages'].append(StageRecord(start='2018-01-01T10:00:20', type='pause'))
+        auction_document = state.to_document()
+
+        self.assertIs(type(auction_document), dict)
+        self.assertIs(type(auction_document['stages'][0]), dict)
+        self.assertEqual(auction_document['stages'][:2], self.auction_document['stages'])
+        self.assertEqual(json.loads(json.dumps(auction_document)), auction_document)
+
+    def test_to_document_of_snapshot(self):
+        state = freeze(AuctionState.from_document(deepcopy(self.auction_document)))
+        self.assertEqual(to_document(draft(state)), self.auction_document)
+
+    def test_yaml_dump(self):
+        state = draft(freeze(AuctionState.from_document(deepcopy(self.auction_document))))
+        self.assertEqual(safe_dump(state), safe_dump(self.auction_document))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestRecords))
+    suite.addTest(unittest.makeSuite(TestBidderLabels))
+    suite.addTest(unittest.makeSuite(TestAuctionState))
+    return suite
@@ -0,0 +1,49 @@
+import unittest
+from copy import deepcopy
+
+from openprocurement.auction.texas.database import UPDATE_HANDLERS
+from openprocurement.auction.texas.header import HEADER_FIELDS
+from openprocurement.auction.texas.transitions import (
+    CANCELED_STAGE,
+    RESCHEDULED_STAGE,
+    TRANSITIONS,
+)
+
+
+class TestTransitions(unittest.TestCase):
+
+    def setUp(self):
+        self.auction_document = {'current_stage': 2, 'stages': [{}, {}, {}]}
+
+    def test_transitions_change_only_live_fields(self):
+        params = {'set_stage': {'stage': 1}, 'cancel': {'end_date': '2018-01-01T00:00:00+02:00'}}
+        for name, transition in TRANSITIONS.items():
+            auction_document = transition(deepcopy(self.auction_document), **params.get(name, {}))
+            changed = set(key for key in auction_document if auction_document[key] != self.auction_document.get(key))
+            self.assertFalse(changed & set(HEADER_FIELDS + ['stages']), name)
+
+    def test_set_stage_from_query_string(self):
+        TRANSITIONS['set_stage'](self.auction_document, stage='-100')
+        self.assertEqual(self.auction_document['current_stage'], CANCELED_STAGE)
+
+    def test_increment_stage(self):
+        TRANSITIONS['increment_stage'](self.auction_document)
+        self.assertEqual(self.auction_document['current_stage'], 3)
+
+    def test_cancel(self):
+        TRANSITIONS['cancel'](self.auction_document, end_date='2018-01-01T00:00:00+02:00')
+        self.assertEqual(self.auction_document['current_stage'], CANCELED_STAGE)
+        self.assertEqual(self.auction_document['endDate'], '2018-01-01T00:00:00+02:00')
+
+    def test_reschedule(self):
+        TRANSITIONS['reschedule'](self.auction_document)
+        self.assertEqual(self.auction_document['current_stage'], RESCHEDULED_STAGE)
+
+    def test_update_handlers_match_transitions(self):
+        self.assertEqual(set(UPDATE_HANDLERS), set(TRANSITIONS))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestTransitions))
+    return suite
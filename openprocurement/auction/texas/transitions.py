@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+State transitions of auction document which don't depend on anything but
+the document itself, so they could be applied by database atomically.
+
+Every transition changes provided document in place and returns it.
+Parameters could come as strings, since databases could pass them through
+query string.
+
+Transitions change only top level fields of live document, which are never
+moved to header document or to archive of stages, so databases apply them to
+stored documents as is, without joining header and archived stages.
+"""
+
+CANCELED_STAGE = -100
+RESCHEDULED_STAGE = -101
+
+
+def set_stage(auction_document, stage):
+    auction_document['current_stage'] = int(stage)
+    return auction_document
+
+
+def increment_stage(auction_document):
+    auction_document['current_stage'] += 1
+    return auction_document
+
+
+def cancel(auction_document, end_date):
+    auction_document['current_stage'] = CANCELED_STAGE
+    auction_document['endDate'] = end_date
+    return auction_document
+
+
+def reschedule(auction_document):
+    auction_document['current_stage'] = RESCHEDULED_STAGE
+    return auction_document
+
+
+TRANSITIONS = {
+    'set_stage': set_stage,
+    'increment_stage': increment_stage,
+    'cancel': cancel,
+    'reschedule': reschedule,
+}
@@ -2,35 +2,37 @@
 import iso8601
 
 from contextlib import contextmanager
+from copy import deepcopy
 from datetime import datetime, time, timedelta
 
+from gevent.event import AsyncResult
 from openprocurement.auction.worker_core.constants import TIMEZONE
 from openprocurement.auction.worker_core.utils import prepare_service_stage
 
 from openprocurement.auction.texas.constants import (
     PAUSE_DURATION, DEADLINE_HOUR, END, MAIN_ROUND, PAUSE
 )
+from openprocurement.auction.texas.transitions import TRANSITIONS
+from openprocurement.auction.texas.state import (
+    LABELS, ResultRecord, StageRecord
+)
 
 
 def prepare_results_stage(bidder_id="", bidder_name="", amount="", time=""):
-    stage = dict(
+    stage = ResultRecord(
         bidder_id=bidder_id,
         time=str(time),
         amount=amount or 0,
-        label=dict(
-            en="Bidder #{}".format(bidder_name),
-            uk="Учасник №{}".format(bidder_name),
-            ru="Участник №{}".format(bidder_name)
-        )
+        label=LABELS[bidder_name]
     )
     return stage
 
 
 def prepare_auction_stages(stage_start, auction_data, fast_forward=False):
-    pause_stage = prepare_service_stage(
+    pause_stage = StageRecord.from_mapping(prepare_service_stage(
         start=stage_start.isoformat(), type=PAUSE
-    )
-    main_round_stage = {}
+    ))
+    main_round_stage = StageRecord()
     stages = [pause_stage, main_round_stage]
 
     stage_start += timedelta(seconds=PAUSE_DURATION)
@@ -47,10 +49,10 @@ def prepare_auction_stages(stage_start, auction_data, fast_forward=False):
 
 
 def prepare_end_stage(start):
-    stage = {
-        'start': start.isoformat(),
-        'type': END,
-    }
+    stage = StageRecord(
+        start=start.isoformat(),
+        type=END,
+    )
     return stage
 
 
@@ -103,8 +105,39 @@ def open_bidders_name(auction_document, bids_information):
 def update_auction_document(context, database):
     auction_document = context['auction_document']
     yield auction_document
-    database.save_auction_document(auction_document, context['auction_doc_id'])
+    response = database.save_auction_document(auction_document, context['auction_doc_id'])
+    context['auction_document'] = auction_document
+    keep_saved_rev(context, response)
+
+
+def keep_saved_rev(context, response):
+    """
+    Store revision of the last successful save of auction document to
+    context, snapshot of context is used after restart only if document in
+    database has this revision
+    """
+    if isinstance(response, AsyncResult):
+        # save is coalesced or journaled, revision is known once document
+        # is written to database
+        response.rawlink(lambda result: result.successful() and keep_saved_rev(context, result.value))
+    elif response:
+        context['saved_rev'] = response[1]
+
+
+def apply_transition(context, database, transition, **params):
+    """
+    Apply transition to auction document in database and to its copy in
+    context, so context doesn't have to be refreshed from database
+    """
+    auction_document = context['auction_document']
+    TRANSITIONS[transition](auction_document, **params)
+    rev = database.apply_transition(context['auction_doc_id'], transition, **params)
+    if rev:
+        auction_document['_rev'] = rev
     context['auction_document'] = auction_document
+    if rev:
+        context['saved_rev'] = rev
+    return rev
 
 
 @contextmanager
@@ -121,11 +154,13 @@ def convert_datetime(datetime_stamp):
 # AUCTION PROTOCOL FUNCTIONS
 
 def prepare_auction_protocol(context):
+    auction_data = context.view("auction_data")["data"]
     auction_protocol = {
         "id": context["auction_doc_id"],
-        "auctionId": context["auction_data"]["data"].get("auctionID", ""),
+        "auctionId": auction_data.get("auctionID", ""),
         "auction_id": context["auction_doc_id"],
-        "items": context["auction_data"]["data"].get("items", []),
+        # protocol gets its own copy of items, not the whole auction data
+        "items": deepcopy(auction_data.get("items", [])),
         "timeline": {
             "auction_start": {
                 "initial_bids": []
@@ -16,33 +16,34 @@ from openprocurement.auction.utils import (
     prepare_extra_journal_fields, get_bidder_id
 )
 
+from openprocurement.auction.texas.database import IDatabase
+
 INVALIDATE_GRANT = timedelta(0, 230)
 
 
 def login():
     if 'bidder_id' in request.args and 'hash' in request.args:
-        for bidder_info in app.context['bidders_data']:
-            if bidder_info['id'] == request.args['bidder_id']:
-                next_url = request.args.get('next') or request.referrer or None
-                if 'X-Forwarded-Path' in request.headers:
-                    callback_url = urljoin(
-                        request.headers['X-Forwarded-Path'],
-                        'authorized'
-                    )
-                else:
-                    callback_url = url_for('authorized', next=next_url, _external=True)
-                response = app.remote_oauth.authorize(
-                    callback=callback_url,
-                    bidder_id=request.args['bidder_id'],
-                    hash=request.args['hash']
+        if app.context['bidder_registry'].is_active(request.args['bidder_id']):
+            next_url = request.args.get('next') or request.referrer or None
+            if 'X-Forwarded-Path' in request.headers:
+                callback_url = urljoin(
+                    request.headers['X-Forwarded-Path'],
+                    'authorized'
                 )
-                if 'return_url' in request.args:
-                    session['return_url'] = request.args['return_url']
-                session['login_bidder_id'] = request.args['bidder_id']
-                session['login_hash'] = request.args['hash']
-                session['login_callback'] = callback_url
-                app.logger.debug("Session: {}".format(repr(session)))
-                return response
+            else:
+                callback_url = url_for('authorized', next=next_url, _external=True)
+            response = app.remote_oauth.authorize(
+                callback=callback_url,
+                bidder_id=request.args['bidder_id'],
+                hash=request.args['hash']
+            )
+            if 'return_url' in request.args:
+                session['return_url'] = request.args['return_url']
+            session['login_bidder_id'] = request.args['bidder_id']
+            session['login_hash'] = request.args['hash']
+            session['login_callback'] = callback_url
+            app.logger.debug("Session: {}".format(repr(session)))
+            return response
     return abort(401)
 
 
@@ -163,3 +164,13 @@ def kickclient():
                     )
                     return jsonify({"status": "ok"})
     abort(401)
+
+
+def database_stats():
+    # statistics reveal ids of auctions, so view is disabled by default
+    if not app.config.get('DATABASE_STATS', False):
+        abort(404)
+    database = app.gsm.queryUtility(IDatabase)
+    if database is None:
+        abort(404)
+    return jsonify(database.metrics.stats())
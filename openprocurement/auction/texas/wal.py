@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Local write-ahead journal of auction documents.
+
+Save of auction document is acknowledged as soon as document is appended
+to local journal file and synced to disk, database behind the journal is
+updated asynchronously. Appends which arrive while the previous sync is in
+progress are written and synced together (group commit), so concurrent
+bids share one fsync.
+
+Journal is a file of JSON lines:
+
+    {"id": "<auction id>", "document": {...}}
+
+Every worker journals only its own auction document in its own file
+'<directory>/<auction id>.wal', so workers sharing database config never
+truncate or replay records of each other. Records of document which were
+saved to database are dropped by truncating journal when nothing is
+pending. Records left after crash are replayed to database on start, the
+last complete record wins.
+"""
+import json
+import logging
+import os
+
+import gevent
+from gevent.event import AsyncResult, Event
+from gevent.lock import BoundedSemaphore
+from zope.interface import implementer
+
+from openprocurement.auction.texas.database import IDatabase
+from openprocurement.auction.texas.journal import (
+    AUCTION_WORKER_DB_JOURNAL_REPLAY,
+    AUCTION_WORKER_DB_JOURNAL_ERROR,
+)
+from openprocurement.auction.texas.state import to_document
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+
+class WriteAheadJournal(object):
+    """
+    Append-only journal file with group commit
+
+    Attributes:
+        path: path to journal file
+        :type path: str
+        commit_delay: time in seconds committer waits for more records
+                      before sync, 0 commits whatever was appended while
+                      the previous sync was running
+        :type commit_delay: float
+        syncs: number of fsync calls made
+        :type syncs: int
+    """
+
+    def __init__(self, path, commit_delay=0):
+        self.path = path
+        self.commit_delay = commit_delay
+        self.syncs = 0
+        self._file = open(path, 'ab')
+        self._buffer = []
+        self._waiters = []
+        self._appended = Event()
+        self._committer = gevent.spawn(self._commit_periodically)
+
+    def read(self):
+        """
+        Return the last complete record of every document in journal
+        """
+        records = {}
+        with open(self.path, 'rb') as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn write of the last record
+                    break
+                records[record['id']] = record['document']
+        return records
+
+    def append(self, auction_doc_id, public_document):
+        """
+        Append record to journal
+
+        :return: future which is resolved when record is synced to disk
+        """
+        result = AsyncResult()
+        self._buffer.append(json.dumps({'id': auction_doc_id, 'document': public_document}) + '\n')
+        self._waiters.append(result)
+        self._appended.set()
+        return result
+
+    def commit(self):
+        """
+        Write and sync all appended records
+        """
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, []
+        waiters, self._waiters = self._waiters, []
+        try:
+            self._file.write(''.join(buffer))
+            self._file.flush()
+            # sync in thread pool, so greenlets keep appending records for
+            # the next group meanwhile
+            gevent.get_hub().threadpool.apply(os.fsync, (self._file.fileno(),))
+            self.syncs += 1
+        except (IOError, OSError), e:
+            for waiter in waiters:
+                waiter.set_exception(e)
+            return
+        for waiter in waiters:
+            waiter.set(True)
+
+    def truncate(self):
+        """
+        Drop all records, has to be called only when they are saved to
+        database
+        """
+        self.commit()
+        self._file.truncate(0)
+        self._file.flush()
+        gevent.get_hub().threadpool.apply(os.fsync, (self._file.fileno(),))
+
+    def close(self):
+        self._committer.kill()
+        self.commit()
+        self._file.close()
+
+    def _commit_periodically(self):
+        while True:
+            self._appended.wait()
+            self._appended.clear()
+            if self.commit_delay:
+                gevent.sleep(self.commit_delay)
+            self.commit()
+
+
+@implementer(IDatabase)
+class JournaledDatabase(object):
+    """
+    Database which acknowledges saves once they are in local journal and
+    saves documents to wrapped database in background. Only the latest
+    version of document is saved to wrapped database.
+
+    Documents are written with revision they had when they were journaled.
+    Wrapped database replaces it with the last known one if it is sole
+    writer, otherwise with the one it gets from database before every
+    save, so documents replayed after crash are written in both modes.
+
+    Saves of other documents, e.g. by bulk commands, go to wrapped
+    database directly.
+
+    Attributes:
+        database: wrapped database
+        :type database: IDatabase
+        auction_doc_id: identifier of journaled document
+        :type auction_doc_id: str
+        journal: journal of saves which are not in database yet
+        :type journal: WriteAheadJournal
+    """
+
+    def __init__(self, database, config, auction_doc_id):
+        """
+        :param database: wrapped database
+        :param config: 'journal' section of database config with
+                       'directory' of journal files and optional
+                       'commit_delay'
+        :param auction_doc_id: identifier of journaled document
+        """
+        self.database = database
+        self.auction_doc_id = auction_doc_id
+        self.journal = WriteAheadJournal(
+            os.path.join(config['directory'], '{}.wal'.format(auction_doc_id)),
+            config.get('commit_delay', 0)
+        )
+        self._pending = {}
+        # futures of saves which are journaled but not in database yet
+        self._results = {}
+        self._changed = Event()
+        self._write_lock = BoundedSemaphore()
+        self._writer = gevent.spawn(self._write_periodically)
+        self.replay()
+
+    @property
+    def metrics(self):
+        return self.database.metrics
+
+    def replay(self):
+        """
+        Save document left in journal after crash to database
+        """
+        public_document = self.journal.read().get(self.auction_doc_id)
+        if public_document is not None:
+            LOGGER.info("Replay journaled auction document {}".format(self.auction_doc_id),
+                        extra={'MESSAGE_ID': AUCTION_WORKER_DB_JOURNAL_REPLAY})
+            self._pending[self.auction_doc_id] = public_document
+        self._write_pending()
+        if self._pending:
+            self._changed.set()
+
+    def get_auction_document(self, auction_doc_id):
+        if auction_doc_id in self._pending:
+            # read own saves which are not in database yet
+            return to_document(self._pending[auction_doc_id])
+        return self.database.get_auction_document(auction_doc_id)
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        """
+        Append document to journal and wait until it is synced to disk
+
+        :return: future which is resolved with id and revision of document
+                 once it is written to database or None if document was
+                 not written to journal
+        :rtype: gevent.event.AsyncResult
+        """
+        if auction_doc_id != self.auction_doc_id:
+            return self.database.save_auction_document(auction_document, auction_doc_id)
+        public_document = to_document(auction_document)
+        # document is pending before it is durable, so journal isn't
+        # truncated while record is in flight
+        self._pending[auction_doc_id] = public_document
+        try:
+            with self.metrics.measure('journal_append', auction_doc_id):
+                self.journal.append(auction_doc_id, public_document).get()
+        except (IOError, OSError), e:
+            LOGGER.error("Error while write auction document to journal: {}".format(e),
+                         extra={'MESSAGE_ID': AUCTION_WORKER_DB_JOURNAL_ERROR})
+            return None
+        self._changed.set()
+        # saves which are written together share the result
+        return self._results.setdefault(auction_doc_id, AsyncResult())
+
+    def apply_transition(self, auction_doc_id, transition, **params):
+        # transition must be applied after journaled saves
+        self._write_pending()
+        return self.database.apply_transition(auction_doc_id, transition, **params)
+
+    def apply_transitions(self, auction_doc_ids, transition, **params):
+        self._write_pending()
+        return self.database.apply_transitions(auction_doc_ids, transition, **params)
+
+    def query_auctions(self, index, start_key=None, end_key=None, limit=100, bookmark=None):
+        # documents which are not in database yet are not queried
+        return self.database.query_auctions(
+            index, start_key=start_key, end_key=end_key, limit=limit, bookmark=bookmark
+        )
+
+    def flush(self):
+        self.journal.commit()
+        self._write_pending()
+        self.database.flush()
+
+    def _write(self, public_document, auction_doc_id):
+        """
+        Save document to wrapped database and return result of the write
+        """
+        response = self.database.save_auction_document(public_document, auction_doc_id)
+        if isinstance(response, AsyncResult):
+            # database which coalesces saves returns future, record is kept
+            # in journal until the write is done
+            try:
+                response = response.get()
+            except Exception, e:
+                LOGGER.error("Error while write journaled auction document to database: {}".format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_JOURNAL_ERROR})
+                return None
+        return response
+
+    def _write_pending(self):
+        with self._write_lock:
+            for auction_doc_id in list(self._pending):
+                public_document = self._pending[auction_doc_id]
+                response = self._write(public_document, auction_doc_id)
+                if response is None:
+                    continue
+                # document could be saved again during write
+                if self._pending.get(auction_doc_id) is public_document:
+                    del self._pending[auction_doc_id]
+                    result = self._results.pop(auction_doc_id, None)
+                    if result is not None:
+                        result.set(response)
+            if not self._pending:
+                self.journal.truncate()
+
+    def _write_periodically(self):
+        while True:
+            self._changed.wait()
+            self._changed.clear()
+            self._write_pending()
+            if self._pending:
+                # database is unavailable, journal keeps documents
+                gevent.sleep(1)
+                self._changed.set()
+
+
+def prepare_journal(database, config, auction_doc_id):
+    """
+    Wrap database with journal of auction document if 'journal' section is
+    in database config
+    """
+    if not config.get('journal'):
+        return database
+    return JournaledDatabase(database, config['journal'], auction_doc_id)
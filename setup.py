@@ -14,8 +14,12 @@ EXTRAS_REQUIRE = {
     'test': [
         'pytest',
         'pytest-mock',
-        'pytest-cov'
-    ]
+        'pytest-cov',
+        'lmdb',
+    ],
+    'lmdb': [
+        'lmdb',
+    ],
 }
 ENTRY_POINTS = {
     'console_scripts': [
@@ -27,6 +31,15 @@ ENTRY_POINTS = {
     'openprocurement.auction.robottests': [
         'texas = openprocurement.auction.texas.tests.functional.main:includeme'
     ],
+    'openprocurement.auction.texas.database': [
+        'couchdb_events = openprocurement.auction.texas.eventsourcing:couchdb_events_database',
+        'sqlite = openprocurement.auction.texas.sqlite_database:sqlite_database',
+        'lmdb = openprocurement.auction.texas.lmdb_database:lmdb_database',
+    ],
+    'openprocurement.auction.texas.context': [
+        'shared_memory = openprocurement.auction.texas.sharedmemory:shared_memory_context',
+        'shared_memory_reader = openprocurement.auction.texas.sharedmemory:shared_memory_reader_context',
+    ],
 }
 
 setup(name='openprocurement.auction.texas',